@@ -2,12 +2,16 @@
 Chat endpoints for conversational AI with RAG.
 CRITICAL: Stateless chat engine with per-user history management.
 """
-from typing import Annotated, List
+import asyncio
+import json
+from typing import Annotated, Dict, List
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from supabase import Client
 
+from app.core.config import settings
 from app.core.dependencies import get_current_user, get_supabase
 from app.db.schemas import (
     ChatRequest,
@@ -123,35 +127,22 @@ async def get_conversation_messages(
     return [MessageResponse(**msg) for msg in result.data]
 
 
-@router.post("", response_model=ChatResponse)
-async def chat(
-    request: ChatRequest,
-    current_user: Annotated[dict, Depends(get_current_user)],
-    supabase: Annotated[Client, Depends(get_supabase)]
-):
+def _resolve_conversation(request: ChatRequest, user_id: str, supabase: Client) -> str:
     """
-    Send a message and get AI response with RAG.
-
-    CRITICAL: This endpoint is STATELESS.
-    - Fetches chat history from database for each request
-    - Passes history explicitly to chat engine
-    - Prevents multi-user data leakage
-
-    Args:
-        request: Chat message and conversation ID
-        current_user: Current authenticated user
-        supabase: Supabase client
+    Validate the requested conversation, or create one.
 
     Returns:
-        User message and AI response
+        Conversation ID
+
+    Raises:
+        HTTPException: If the conversation doesn't exist or isn't the user's
     """
-    # Create or validate conversation
     if request.conversation_id:
         # Verify conversation exists and belongs to user
         conv_result = supabase.table("conversations")\
             .select("id")\
             .eq("id", request.conversation_id)\
-            .eq("user_id", current_user["user_id"])\
+            .eq("user_id", user_id)\
             .execute()
 
         if not conv_result.data:
@@ -159,42 +150,46 @@ async def chat(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Conversation not found"
             )
-        conversation_id = request.conversation_id
-    else:
-        # Create new conversation
-        conversation_id = str(uuid4())
-        supabase.table("conversations").insert({
-            "id": conversation_id,
-            "user_id": current_user["user_id"],
-            "title": request.message[:50] + "..." if len(request.message) > 50 else request.message
-        }).execute()
+        return request.conversation_id
 
-    # Fetch chat history for this conversation
+    # Create new conversation
+    conversation_id = str(uuid4())
+    supabase.table("conversations").insert({
+        "id": conversation_id,
+        "user_id": user_id,
+        "title": request.message[:50] + "..." if len(request.message) > 50 else request.message
+    }).execute()
+    return conversation_id
+
+
+def _load_history(conversation_id: str, supabase: Client) -> List[Dict[str, str]]:
+    """Fetch the chat history of a conversation, oldest first."""
     history_result = supabase.table("messages")\
         .select("role, content")\
         .eq("conversation_id", conversation_id)\
         .order("created_at", desc=False)\
         .execute()
 
-    chat_history = [
+    return [
         {"role": msg["role"], "content": msg["content"]}
         for msg in history_result.data
     ]
 
-    # Get AI response using ChatService (stateless)
-    chat_service = ChatService(supabase)
-    ai_response = await chat_service.get_response(
-        message=request.message,
-        chat_history=chat_history
-    )
 
+def _save_exchange(
+    conversation_id: str,
+    message: str,
+    ai_response: str,
+    supabase: Client
+) -> ChatResponse:
+    """Persist the user message and the assistant response, and touch the conversation."""
     # Save user message
     user_msg_id = str(uuid4())
     user_msg_result = supabase.table("messages").insert({
         "id": user_msg_id,
         "conversation_id": conversation_id,
         "role": "user",
-        "content": request.message
+        "content": message
     }).execute()
 
     # Save assistant message
@@ -217,3 +212,104 @@ async def chat(
         user_message=MessageResponse(**user_msg_result.data[0]),
         assistant_message=MessageResponse(**assistant_msg_result.data[0])
     )
+
+
+def _sse(event: str, data) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("", response_model=ChatResponse)
+async def chat(
+    request: ChatRequest,
+    current_user: Annotated[dict, Depends(get_current_user)],
+    supabase: Annotated[Client, Depends(get_supabase)]
+):
+    """
+    Send a message and get AI response with RAG.
+
+    CRITICAL: This endpoint is STATELESS.
+    - Fetches chat history from database for each request
+    - Passes history explicitly to chat engine
+    - Prevents multi-user data leakage
+
+    Args:
+        request: Chat message and conversation ID
+        current_user: Current authenticated user
+        supabase: Supabase client
+
+    Returns:
+        User message and AI response
+    """
+    # Create or validate conversation
+    conversation_id = _resolve_conversation(request, current_user["user_id"], supabase)
+
+    # Fetch chat history for this conversation
+    chat_history = _load_history(conversation_id, supabase)
+
+    # Get AI response using ChatService (stateless)
+    chat_service = ChatService(supabase)
+    ai_response = await chat_service.get_response(
+        message=request.message,
+        chat_history=chat_history
+    )
+
+    return _save_exchange(conversation_id, request.message, ai_response, supabase)
+
+
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    current_user: Annotated[dict, Depends(get_current_user)],
+    supabase: Annotated[Client, Depends(get_supabase)]
+):
+    """
+    Send a message and stream the AI response as Server-Sent Events.
+
+    Stateless like POST /chat. Events:
+    - start: {"conversation_id"} once the conversation is resolved
+    - token: {"delta"} for each piece of the response as it's generated
+    - done: the ChatResponse, after both messages are persisted
+    - error: {"detail"} if generation fails (nothing is persisted)
+
+    Args:
+        request: Chat message and conversation ID
+        current_user: Current authenticated user
+        supabase: Supabase client
+
+    Returns:
+        text/event-stream response
+    """
+    # Resolved before streaming so a bad conversation ID is still a plain 404
+    conversation_id = _resolve_conversation(request, current_user["user_id"], supabase)
+    chat_history = _load_history(conversation_id, supabase)
+    chat_service = ChatService(supabase)
+
+    async def events():
+        yield _sse("start", {"conversation_id": conversation_id})
+
+        tokens = []
+        try:
+            async for token in chat_service.stream_response(request.message, chat_history):
+                tokens.append(token)
+                yield _sse("token", {"delta": token})
+
+            # Persist off the event loop so other streams keep flowing
+            result = await asyncio.to_thread(
+                _save_exchange, conversation_id, request.message, "".join(tokens), supabase
+            )
+        except Exception as e:
+            detail = "Internal server error" if settings.is_production else str(e)
+            yield _sse("error", {"detail": detail})
+            return
+
+        yield _sse("done", result.model_dump(mode="json"))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Don't let nginx buffer the stream
+        }
+    )
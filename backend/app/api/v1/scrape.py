@@ -52,7 +52,10 @@ async def trigger_scrape(
         reddit_url=request.reddit_url,
         max_comments=request.max_comments,
         user_id=current_user["user_id"],
-        job_id=job_id
+        job_id=job_id,
+        selection=request.selection,
+        sentiment_backend=request.sentiment_backend,
+        analysis_mode=request.analysis_mode
     )
 
     # Save job to database
@@ -118,7 +121,8 @@ async def get_task_status(
         response_data["result"] = {
             "total_comments": job.get("total_comments", 0),
             "processed_comments": job.get("processed_comments", 0),
-            "insights_generated": task.result.get("insights_count", 0) if task.result else 0
+            "insights_generated": task.result.get("insights_count", 0) if task.result else 0,
+            "sampling": (job.get("metadata") or {}).get("sampling")
         }
     elif task.failed():
         response_data["error"] = str(task.info) if task.info else "Task failed"
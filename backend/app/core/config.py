@@ -39,6 +39,10 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = Field(...)
+    BULK_LOAD_ENABLED: bool = Field(default=True)  # Insert insights by binary COPY over DATABASE_URL
+    DATABASE_POOL_MIN_SIZE: int = Field(default=1, ge=0)
+    DATABASE_POOL_MAX_SIZE: int = Field(default=4, ge=1)  # Connections per worker process
+    DATABASE_CONNECT_TIMEOUT: float = Field(default=10.0)  # Seconds
 
     # LLM APIs
     OPENAI_API_KEY: str = Field(...)
@@ -48,6 +52,26 @@ class Settings(BaseSettings):
     REDDIT_CLIENT_ID: str = Field(...)
     REDDIT_CLIENT_SECRET: str = Field(...)
     REDDIT_USER_AGENT: str = Field(default="JudgmentAI/1.0")
+    REDDIT_MORECHILDREN_BATCH_SIZE: int = Field(default=100, ge=1, le=100)
+    REDDIT_MORECHILDREN_CONCURRENCY: int = Field(default=4, ge=1)
+    REDDIT_MORECHILDREN_MAX_REQUESTS: int = Field(default=100, ge=0)  # Per thread
+    REDDIT_MORECHILDREN_TIME_BUDGET: float = Field(default=120.0)  # Seconds per thread (PRAW)
+
+    # Reddit HTTP client (one pooled client per worker process)
+    REDDIT_HTTP2: bool = Field(default=True)
+    REDDIT_HTTP_MAX_CONNECTIONS: int = Field(default=20)
+    REDDIT_HTTP_MAX_KEEPALIVE: int = Field(default=10)
+    REDDIT_HTTP_KEEPALIVE_EXPIRY: float = Field(default=60.0)  # Seconds
+
+    # Reddit rate limiting (token bucket in Redis shared by all workers)
+    REDDIT_RATE_LIMIT_PER_MINUTE: float = Field(default=60.0, gt=0)
+    REDDIT_RATE_LIMIT_BURST: int = Field(default=10, ge=1)
+    REDDIT_RATE_LIMIT_MAX_WAIT: float = Field(default=10.0)  # Longer waits re-queue the task
+    REDDIT_RATE_LIMIT_MAX_RETRIES: int = Field(default=10)
+    REDDIT_RATE_LIMIT_RETRY_JITTER: float = Field(default=0.5, ge=0)  # Random extra share of the wait before a re-queued retry
+
+    # Which comments to keep when a thread exceeds max_comments: first | top | stratified
+    COMMENT_SELECTION_MODE: str = Field(default="first")
 
     # Google Search
     GOOGLE_API_KEY: str | None = Field(default=None)
@@ -57,14 +81,121 @@ class Settings(BaseSettings):
     CELERY_BROKER_URL: str = Field(default="redis://localhost:6379/0")
     CELERY_RESULT_BACKEND: str = Field(...)
 
+    # Redis for shared worker state (defaults to the Celery broker)
+    REDIS_URL_STR: str | None = Field(default=None, alias="REDIS_URL")
+
+    @property
+    def REDIS_URL(self) -> str:
+        """Redis URL for shared state, falling back to the broker."""
+        return self.REDIS_URL_STR or self.CELERY_BROKER_URL
+
+    # Analysis
+    SPACY_MODEL: str = Field(default="en_core_web_lg")
+    MODEL_PRELOAD: bool = Field(default=True)  # Load models at worker start (spaCy in the parent before forking, the local model per child)
+    SPACY_BATCH_SIZE: int = Field(default=64, ge=1)
+    # >1 forks parser processes; Celery prefork children are daemonic and can't fork
+    SPACY_N_PROCESS: int = Field(default=1, ge=1)
+    ANALYSIS_CHUNK_SIZE: int = Field(default=200, ge=1)  # Comments per abatch_analyze call
+    SENTIMENT_BACKEND: str = Field(default="openai")  # openai | local (CPU model)
+    SENTIMENT_MODEL: str = Field(default="gpt-4o-mini")
+    # per_aspect: one request per aspect | multi_aspect: one per comment | packed: one per pack
+    SENTIMENT_MODE: str = Field(default="multi_aspect")
+    SENTIMENT_PACK_SIZE: int = Field(default=8, ge=1)  # Comments per request in packed mode
+    OPENAI_MAX_CONCURRENCY: int = Field(default=16, ge=1)  # In-flight classification requests
+    OPENAI_REQUEST_TIMEOUT: float = Field(default=30.0)  # Seconds per request
+    # Local backend: Hugging Face id or directory (ONNX export preferred)
+    SENTIMENT_LOCAL_MODEL: str = Field(default="yangheng/deberta-v3-base-absa-v1.1")
+    SENTIMENT_LOCAL_BATCH_SIZE: int = Field(default=32, ge=1)  # (text, aspect) pairs per forward pass
+    SENTIMENT_LOCAL_THREADS: int | None = Field(default=None)  # CPU threads (default: runtime's choice)
+    SENTIMENT_CACHE_ENABLED: bool = Field(default=True)  # Reuse labels of seen (text, aspect) pairs
+    SENTIMENT_CACHE_TTL: int = Field(default=30 * 24 * 3600)  # Seconds in Redis
+    SENTIMENT_CACHE_LOCAL_SIZE: int = Field(default=10000, ge=0)  # Entries in the in-process LRU
+    SENTIMENT_LEXICON_PATH: str | None = Field(default=None)  # JSON {term: score} for the fallback
+    SENTIMENT_NEGATION_WINDOW: int = Field(default=3, ge=0)  # Tokens before a term checked for negation
+    PIPELINE_BATCH_SIZE: int = Field(default=100, ge=1)  # Comments per batch between pipeline stages
+    PIPELINE_QUEUE_SIZE: int = Field(default=4, ge=1)  # Batches buffered between two stages
+    # full: analyze every comment | sample: adaptive stratified sample with confidence intervals
+    ANALYSIS_MODE: str = Field(default="full")
+    SAMPLING_CONFIDENCE: float = Field(default=0.95, gt=0.0, lt=1.0)
+    SAMPLING_MARGIN: float = Field(default=0.05, gt=0.0, lt=0.5)  # Target interval half-width
+    SAMPLING_MIN_SIZE: int = Field(default=200, ge=1)  # Comments before convergence is checked
+    SAMPLING_TOP_ASPECTS: int = Field(default=5, ge=0)  # Most mentioned aspects that must converge
+    SAMPLING_MIN_MENTIONS: int = Field(default=30, ge=1)  # Mentions before an interval is trusted
+    DEDUP_ENABLED: bool = Field(default=True)  # Collapse near-duplicate comments
+    DEDUP_SIMILARITY_THRESHOLD: float = Field(default=0.8, ge=0.0, le=1.0)
+
     # Vector Store
     EMBEDDING_MODEL: str = Field(default="text-embedding-3-small")
-    VECTOR_DIMENSION: int = Field(default=1536)
+    VECTOR_DIMENSION: int = Field(default=1536, ge=1)  # Stored dimension (sent to text-embedding-3 as dimensions)
+    VECTOR_PRECISION: str = Field(default="vector")  # "vector" (float32) or "halfvec" (float16)
+    VECTOR_BINARY_INDEX: bool = Field(default=False)  # Index binary_quantize(embedding), rerank on the column
+    VECTOR_RERANK_FACTOR: int = Field(default=4, ge=1)  # Binary candidates per result
+    VECTOR_INDEX_METHOD: str = Field(default="auto")  # "auto" (by row count), "hnsw" or "ivfflat"
+    VECTOR_HNSW_MAX_ROWS: int = Field(default=5_000_000, ge=0)  # auto uses IVFFlat above this
+    VECTOR_INDEX_REBUILD_GROWTH: float = Field(default=2.0, gt=1.0)  # Retrain IVF once rows grow this much
+    VECTOR_INDEX_BUILD_MEMORY: str = Field(default="1GB")  # maintenance_work_mem for index builds
+    VECTOR_HNSW_EF_SEARCH: int = Field(default=40, ge=1)  # HNSW candidate list per query (recall vs latency)
+    VECTOR_IVFFLAT_PROBES: int = Field(default=10, ge=1)  # IVF lists scanned per query
+    EMBEDDING_BATCH_SIZE: int = Field(default=512, ge=1, le=2048)  # Inputs per request (API max 2048)
+    EMBEDDING_BATCH_TOKENS: int = Field(default=100_000, ge=1)  # Tokens per request (API max 300k)
+    EMBEDDING_CONCURRENCY: int = Field(default=4, ge=1)  # Requests in flight
+    EMBEDDING_MAX_RETRIES: int = Field(default=3, ge=0)
+    EMBEDDING_CACHE_ENABLED: bool = Field(default=True)  # Reuse vectors of seen input strings
+    EMBEDDING_CACHE_TTL: int = Field(default=30 * 24 * 3600)  # Seconds in Redis
+    EMBEDDING_CACHE_LOCAL_SIZE: int = Field(default=5000, ge=0)  # Entries in the in-process LRU (~3 KB each)
 
     # Chat
     DEFAULT_LLM_MODEL: str = Field(default="gpt-4o-mini")
     MAX_CHAT_HISTORY: int = Field(default=20)
 
+    @field_validator("COMMENT_SELECTION_MODE")
+    @classmethod
+    def validate_selection_mode(cls, value: str) -> str:
+        """Reject unknown comment selection modes at startup."""
+        if value not in ("first", "top", "stratified"):
+            raise ValueError("COMMENT_SELECTION_MODE must be first, top or stratified")
+        return value
+
+    @field_validator("SENTIMENT_BACKEND")
+    @classmethod
+    def validate_sentiment_backend(cls, value: str) -> str:
+        """Reject unknown sentiment backends at startup."""
+        if value not in ("openai", "local"):
+            raise ValueError("SENTIMENT_BACKEND must be openai or local")
+        return value
+
+    @field_validator("ANALYSIS_MODE")
+    @classmethod
+    def validate_analysis_mode(cls, value: str) -> str:
+        """Reject unknown analysis modes at startup."""
+        if value not in ("full", "sample"):
+            raise ValueError("ANALYSIS_MODE must be full or sample")
+        return value
+
+    @field_validator("SENTIMENT_MODE")
+    @classmethod
+    def validate_sentiment_mode(cls, value: str) -> str:
+        """Reject unknown sentiment classification modes at startup."""
+        if value not in ("per_aspect", "multi_aspect", "packed"):
+            raise ValueError("SENTIMENT_MODE must be per_aspect, multi_aspect or packed")
+        return value
+
+    @field_validator("VECTOR_PRECISION")
+    @classmethod
+    def validate_vector_precision(cls, value: str) -> str:
+        """Reject unknown embedding column types at startup."""
+        if value not in ("vector", "halfvec"):
+            raise ValueError("VECTOR_PRECISION must be vector or halfvec")
+        return value
+
+    @field_validator("VECTOR_INDEX_METHOD")
+    @classmethod
+    def validate_vector_index_method(cls, value: str) -> str:
+        """Reject unknown vector index methods at startup."""
+        if value not in ("auto", "hnsw", "ivfflat"):
+            raise ValueError("VECTOR_INDEX_METHOD must be auto, hnsw or ivfflat")
+        return value
+
     @property
     def is_production(self) -> bool:
         """Check if running in production."""
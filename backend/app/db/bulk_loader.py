@@ -0,0 +1,191 @@
+"""
+Bulk insight ingestion over a direct Postgres connection.
+
+PostgREST inserts serialize every embedding as a JSON array of floats. The
+loader streams rows with binary COPY instead (pgvector's binary format, four
+bytes per dimension) over a pooled asyncpg connection from DATABASE_URL.
+When asyncpg/pgvector aren't installed, BULK_LOAD_ENABLED is off or the
+database can't be reached, inserts fall back to PostgREST.
+
+Writes are upserts on the (deterministic) insight id, so retried tasks and
+resubmitted threads overwrite their rows instead of duplicating them.
+"""
+import asyncio
+import json
+from typing import Dict, List
+from uuid import UUID
+
+from supabase import Client
+
+from app.core.config import settings
+from app.utils.helpers import chunk_list
+
+try:
+    import asyncpg
+    from pgvector.asyncpg import register_vector
+except ImportError:
+    asyncpg = None
+
+# Rows per PostgREST upsert (fallback path)
+INSERT_BATCH_SIZE = 500
+
+# Insight columns written by COPY (created_at default applies when omitted)
+INSIGHT_COLUMNS = ("id", "source_url", "aspect", "sentiment", "text", "embedding", "metadata")
+
+# Staged rows are merged into insights, overwriting rows with the same id
+_STAGE_TABLE = "insights_stage"
+_MERGE_SQL = f"""
+    INSERT INTO insights ({", ".join(INSIGHT_COLUMNS)})
+    SELECT {", ".join(INSIGHT_COLUMNS)} FROM {_STAGE_TABLE}
+    ON CONFLICT (id) DO UPDATE SET
+        {", ".join(f"{column} = EXCLUDED.{column}" for column in INSIGHT_COLUMNS[1:])}
+"""
+
+# Global connection pool instance (bound to the event loop that created it)
+_pg_pool = None
+_pg_pool_loop: asyncio.AbstractEventLoop | None = None
+
+
+async def create_pg_pool():
+    """
+    Create a new asyncpg pool on the running event loop.
+
+    Returns:
+        asyncpg.Pool with the pgvector codecs registered
+
+    Raises:
+        RuntimeError: If asyncpg/pgvector aren't installed
+    """
+    if asyncpg is None:
+        raise RuntimeError("asyncpg and pgvector are required for bulk loading")
+
+    return await asyncpg.create_pool(
+        settings.DATABASE_URL,
+        min_size=settings.DATABASE_POOL_MIN_SIZE,
+        max_size=settings.DATABASE_POOL_MAX_SIZE,
+        timeout=settings.DATABASE_CONNECT_TIMEOUT,
+        statement_cache_size=0,  # Safe behind PgBouncer in transaction mode
+        init=register_vector
+    )
+
+
+async def get_pg_pool():
+    """
+    Get or create the asyncpg pool for the running event loop.
+
+    Returns:
+        asyncpg.Pool with the pgvector codecs registered
+
+    Raises:
+        RuntimeError: If asyncpg/pgvector aren't installed
+    """
+    global _pg_pool, _pg_pool_loop
+
+    loop = asyncio.get_running_loop()
+
+    if _pg_pool is None or _pg_pool_loop is not loop:
+        _pg_pool = await create_pg_pool()
+        _pg_pool_loop = loop
+
+    return _pg_pool
+
+
+async def close_pg_pool():
+    """Close the connection pool (for cleanup on shutdown)."""
+    global _pg_pool, _pg_pool_loop
+
+    if _pg_pool is not None and _pg_pool_loop is asyncio.get_running_loop():
+        await _pg_pool.close()
+
+    _pg_pool = None
+    _pg_pool_loop = None
+
+
+async def copy_insights(records: List[Dict]) -> int:
+    """
+    Upsert insight records: binary COPY into a temporary table, then merge.
+
+    Runs in one transaction: on error nothing is written.
+
+    Args:
+        records: Insight records (as for the insights table)
+
+    Returns:
+        Number of rows written
+    """
+    rows = [
+        (
+            UUID(record["id"]),
+            record["source_url"],
+            record["aspect"],
+            record["sentiment"],
+            record["text"],
+            record["embedding"],
+            json.dumps(record.get("metadata") or {})
+        )
+        for record in records
+    ]
+
+    pool = await get_pg_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                f"CREATE TEMP TABLE {_STAGE_TABLE} "
+                f"(LIKE insights INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            await conn.copy_records_to_table(_STAGE_TABLE, records=rows, columns=INSIGHT_COLUMNS)
+            status = await conn.execute(_MERGE_SQL)
+    return int(status.split()[-1])  # "INSERT 0 <rows>"
+
+
+class InsightWriter:
+    """
+    Upserts insight records by binary COPY, falling back to PostgREST.
+
+    Usage:
+        writer = InsightWriter(supabase)
+        stored = await writer.write(records)
+    """
+
+    def __init__(self, supabase: Client):
+        """
+        Initialize writer.
+
+        Args:
+            supabase: Supabase client (service role) for the fallback path
+        """
+        self.supabase = supabase
+        self.bulk = settings.BULK_LOAD_ENABLED and asyncpg is not None
+
+    async def write(self, records: List[Dict]) -> int:
+        """
+        Upsert records.
+
+        Args:
+            records: Insight records
+
+        Returns:
+            Number of rows written
+        """
+        # One row per id (an upsert can't touch the same row twice); the last wins
+        records = list({record["id"]: record for record in records}.values())
+        if not records:
+            return 0
+
+        if self.bulk:
+            try:
+                return await copy_insights(records)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                # Don't retry COPY for the rest of this writer's records
+                print(f"Bulk COPY unavailable, falling back to PostgREST: {e}")
+                self.bulk = False
+
+        return await asyncio.to_thread(self._insert, records)
+
+    def _insert(self, records: List[Dict]) -> int:
+        """Upsert through PostgREST in batches (blocking)."""
+        stored = 0
+        for chunk in chunk_list(records, INSERT_BATCH_SIZE):
+            result = self.supabase.table("insights").upsert(chunk, on_conflict="id").execute()
+            stored += len(result.data) if result.data else 0
+        return stored
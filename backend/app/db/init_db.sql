@@ -37,19 +37,38 @@ CREATE TABLE IF NOT EXISTS insights (
     aspect TEXT NOT NULL,
     sentiment TEXT NOT NULL CHECK (sentiment IN ('positive', 'negative', 'neutral')),
     text TEXT NOT NULL,
-    embedding VECTOR(1536), -- OpenAI text-embedding-3-small dimension
+    embedding VECTOR(1536), -- Default layout; see VECTOR_PRECISION / VECTOR_DIMENSION
     metadata JSONB,
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
 -- Vector similarity search index (CRITICAL for performance)
-CREATE INDEX idx_insights_embedding ON insights USING ivfflat (embedding vector_cosine_ops)
-WITH (lists = 100);
+-- HNSW needs no training data, so it can be created on the empty table. Scrape jobs
+-- queue maintain_vector_index, which switches to IVFFlat / retrains it as rows grow
+-- (python -m app.db.maintenance index-report | rebuild-index).
+-- For halfvec, a shorter dimension or a binary-quantized index, set the VECTOR_*
+-- settings and run: python -m app.db.maintenance migrate-vectors
+CREATE INDEX idx_insights_embedding ON insights USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
 
 -- Index for filtering by source
 CREATE INDEX idx_insights_source_url ON insights(source_url);
 CREATE INDEX idx_insights_aspect ON insights(aspect);
 
+-- ==================== Thread Comments Table (Incremental Re-scrape) ====================
+-- Comments already analyzed per thread; re-scrapes only analyze new/edited ones
+CREATE TABLE IF NOT EXISTS thread_comments (
+    thread_url TEXT NOT NULL,
+    comment_id TEXT NOT NULL,
+    edited DOUBLE PRECISION DEFAULT 0, -- Reddit edit timestamp (0 = never edited)
+    content_hash TEXT NOT NULL,
+    analyzed_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (thread_url, comment_id)
+);
+
+-- Lookup of insights by comment when an edited comment is re-analyzed
+CREATE INDEX idx_insights_comment_id ON insights((metadata->>'comment_id'));
+
 -- ==================== Scrape Jobs Table ====================
 CREATE TABLE IF NOT EXISTS scrape_jobs (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -60,6 +79,7 @@ CREATE TABLE IF NOT EXISTS scrape_jobs (
     total_comments INTEGER DEFAULT 0,
     processed_comments INTEGER DEFAULT 0,
     error TEXT,
+    metadata JSONB, -- e.g. sampling estimates and confidence intervals
     created_at TIMESTAMPTZ DEFAULT NOW(),
     completed_at TIMESTAMPTZ
 );
@@ -67,6 +87,9 @@ CREATE TABLE IF NOT EXISTS scrape_jobs (
 CREATE INDEX idx_scrape_jobs_user_id ON scrape_jobs(user_id);
 CREATE INDEX idx_scrape_jobs_task_id ON scrape_jobs(task_id);
 
+-- Databases created before scrape_jobs.metadata existed
+ALTER TABLE scrape_jobs ADD COLUMN IF NOT EXISTS metadata JSONB;
+
 -- ==================== Row Level Security (RLS) ====================
 
 -- Enable RLS on all tables
@@ -121,6 +144,9 @@ CREATE POLICY "Users can create own scrape jobs"
     ON scrape_jobs FOR INSERT
     WITH CHECK (auth.uid() = user_id);
 
+-- Thread comments: backend only (service role bypasses RLS)
+ALTER TABLE thread_comments ENABLE ROW LEVEL SECURITY;
+
 -- Insights: Public read access (all users can search insights)
 -- Service role can write
 ALTER TABLE insights ENABLE ROW LEVEL SECURITY;
@@ -151,5 +177,6 @@ CREATE TRIGGER update_conversations_updated_at
 -- 1. Make sure to run: CREATE EXTENSION vector; first
 -- 2. The service_role key bypasses RLS for backend operations
 -- 3. User JWT tokens will enforce RLS policies
--- 4. Vector index (ivfflat) is approximate but fast for large datasets
--- 5. Adjust embedding dimension if using different model
+-- 4. Vector index (HNSW, IVFFlat for very large tables) is approximate but fast;
+--    tune recall with VECTOR_HNSW_EF_SEARCH / VECTOR_IVFFLAT_PROBES
+-- 5. Embedding type, dimension and index follow the VECTOR_* settings (make migrate-vectors)
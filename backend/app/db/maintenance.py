@@ -0,0 +1,160 @@
+"""
+Database maintenance commands.
+
+    python -m app.db.maintenance compact [--dry-run]
+    python -m app.db.maintenance migrate-vectors [--dry-run]
+    python -m app.db.maintenance index-report [--sample 50] [--k 10]
+    python -m app.db.maintenance rebuild-index [--force]
+
+compact: remove duplicate insights left by retried tasks and resubmitted
+threads from before insight ids were deterministic, or keyed on a different
+form of the thread URL. Of each group of rows with the same submission,
+comment and aspect the newest is kept. Rows identify their comment by
+comment_id, or by comment_index and text for older PRAW rows; rows with
+neither are kept.
+
+migrate-vectors: convert insights.embedding and its index to the configured
+VECTOR_PRECISION, VECTOR_DIMENSION and VECTOR_BINARY_INDEX (see vector_schema).
+
+index-report / rebuild-index: embedding index size and sampled recall, and a
+concurrent rebuild when it's missing or outgrown (see vector_index).
+"""
+import argparse
+import asyncio
+import json
+import re
+from typing import List
+
+from app.db import vector_schema
+from app.db.bulk_loader import close_pg_pool, get_pg_pool
+from app.db.vector_index import index_report, plan_index, rebuild_index
+
+# Thread key like ThreadStateService.canonical_url: the submission id, or the
+# normalized URL when there's none (slugged, short and old./www. links agree)
+_CANONICAL_URL_SQL = (
+    "coalesce("
+    "lower(substring(source_url from '(?i)(?:reddit\\.com/(?:r/\\w+/)?comments/|redd\\.it/)(\\w+)')), "
+    "replace(lower(regexp_replace(regexp_replace(source_url, '[?#].*$', ''), "
+    "'(\\.json)?/*$', '')), '://old.reddit.com', '://www.reddit.com'))"
+)
+
+# Comment a row belongs to: its comment id, or for older PRAW rows its position
+# in the scrape together with its text. Rows with neither can't be told apart
+# from other comments with the same text ("This.", "+1") and are left alone.
+_COMMENT_KEY_SQL = (
+    "coalesce(metadata->>'comment_id', "
+    "(metadata->>'comment_index') || ':' || md5(text))"
+)
+
+# Rows that aren't the newest of their (thread, comment, aspect) group
+_DUPLICATES_SQL = f"""
+    SELECT id FROM (
+        SELECT id, row_number() OVER (
+            PARTITION BY
+                {_CANONICAL_URL_SQL},
+                {_COMMENT_KEY_SQL},
+                lower(aspect)
+            ORDER BY created_at DESC, id
+        ) AS position
+        FROM insights
+        WHERE {_COMMENT_KEY_SQL} IS NOT NULL
+    ) ranked
+    WHERE position > 1
+"""
+
+
+async def compact_insights(dry_run: bool = False) -> int:
+    """
+    Delete duplicate insights, then vacuum the table.
+
+    Args:
+        dry_run: Only count the duplicates
+
+    Returns:
+        Number of duplicate rows (deleted unless dry_run)
+    """
+    pool = await get_pg_pool()
+    async with pool.acquire() as conn:
+        if dry_run:
+            return await conn.fetchval(f"SELECT count(*) FROM ({_DUPLICATES_SQL}) duplicates")
+
+        status = await conn.execute(f"DELETE FROM insights WHERE id IN ({_DUPLICATES_SQL})")
+        # Reclaim the dead rows and refresh planner statistics (not allowed in a transaction)
+        await conn.execute("VACUUM (ANALYZE) insights")
+    return int(status.split()[-1])  # "DELETE <rows>"
+
+
+async def migrate_vectors(dry_run: bool = False) -> List[str]:
+    """
+    Convert the embedding column, then rebuild its index.
+
+    Args:
+        dry_run: Only return the statements
+
+    Returns:
+        Statements (executed unless dry_run; the index is built concurrently)
+    """
+    pool = await get_pg_pool()
+    async with pool.acquire() as conn:
+        current = await conn.fetchval(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = 'insights'::regclass AND attname = 'embedding'"
+        )
+        dimension = int(re.search(r"\((\d+)\)", current).group(1))
+
+        statements = [f"DROP INDEX IF EXISTS {vector_schema.EMBEDDING_INDEX}"]
+        if current != vector_schema.column_type():
+            statements.append(
+                f"ALTER TABLE insights ALTER COLUMN embedding TYPE {vector_schema.column_type()} "
+                f"USING {vector_schema.migration_expression(dimension)}"
+            )
+
+        if not dry_run:
+            async with conn.transaction():
+                for statement in statements:
+                    await conn.execute(statement)
+            await conn.execute("ANALYZE insights")
+
+        rows = await conn.fetchval("SELECT count(*) FROM insights")
+
+    statements.append(vector_schema.index_definition(*plan_index(rows), concurrently=True))
+    if not dry_run:
+        await rebuild_index(force=True)
+    return statements
+
+
+async def _main(args: argparse.Namespace):
+    try:
+        if args.command == "compact":
+            count = await compact_insights(dry_run=args.dry_run)
+            verb = "Found" if args.dry_run else "Deleted"
+            print(f"{verb} {count} duplicate insights")
+        elif args.command == "migrate-vectors":
+            for statement in await migrate_vectors(dry_run=args.dry_run):
+                print(f"{statement};")
+        elif args.command == "index-report":
+            print(json.dumps(await index_report(args.sample, args.k), indent=2, default=str))
+        elif args.command == "rebuild-index":
+            print(json.dumps(await rebuild_index(force=args.force), indent=2))
+    finally:
+        await close_pg_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JudgmentAI database maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compact = commands.add_parser("compact", help="Remove duplicate insights")
+    compact.add_argument("--dry-run", action="store_true", help="Only count duplicates")
+
+    migrate = commands.add_parser("migrate-vectors", help="Apply the configured vector storage")
+    migrate.add_argument("--dry-run", action="store_true", help="Only print the statements")
+
+    report = commands.add_parser("index-report", help="Embedding index size and recall")
+    report.add_argument("--sample", type=int, default=50, help="Query vectors to sample")
+    report.add_argument("--k", type=int, default=10, help="Results per query")
+
+    rebuild = commands.add_parser("rebuild-index", help="Rebuild the embedding index if outgrown")
+    rebuild.add_argument("--force", action="store_true", help="Rebuild even if up to date")
+
+    asyncio.run(_main(parser.parse_args()))
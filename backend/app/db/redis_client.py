@@ -0,0 +1,41 @@
+"""
+Redis client shared by workers for cluster-wide state (rate limits, caches).
+Uses the broker Redis unless REDIS_URL is set.
+"""
+import asyncio
+from typing import Dict, Tuple
+
+from redis import asyncio as aioredis
+
+from app.core.config import settings
+
+# Global Redis clients, keyed by decode_responses (each bound to the event loop that created it)
+_redis_clients: Dict[bool, Tuple[aioredis.Redis, asyncio.AbstractEventLoop]] = {}
+
+
+async def get_redis_client(decode_responses: bool = True) -> aioredis.Redis:
+    """
+    Get or create the async Redis client for the running event loop.
+
+    Args:
+        decode_responses: Decode responses to str (False for binary values)
+
+    Returns:
+        Configured Redis client
+    """
+    loop = asyncio.get_running_loop()
+    entry = _redis_clients.get(decode_responses)
+
+    if entry is None or entry[1] is not loop:
+        client = aioredis.from_url(settings.REDIS_URL, decode_responses=decode_responses)
+        entry = _redis_clients[decode_responses] = (client, loop)
+
+    return entry[0]
+
+
+async def close_redis_client():
+    """Close the Redis client connection pools (for cleanup on shutdown)."""
+    for client, _ in _redis_clients.values():
+        await client.aclose()
+
+    _redis_clients.clear()
@@ -107,6 +107,18 @@ class ScrapeRequest(BaseModel):
     """Request schema for triggering a Reddit scrape."""
     reddit_url: str = Field(..., description="URL to Reddit post or subreddit")
     max_comments: int = Field(default=1000, ge=1, le=10000)
+    selection: Literal["first", "top", "stratified"] | None = Field(
+        default=None,
+        description="Which comments to keep when the thread exceeds max_comments"
+    )
+    sentiment_backend: Literal["openai", "local"] | None = Field(
+        default=None,
+        description="Sentiment classifier for this job (defaults to SENTIMENT_BACKEND)"
+    )
+    analysis_mode: Literal["full", "sample"] | None = Field(
+        default=None,
+        description="Analyze every comment, or a sample sized to a target confidence interval"
+    )
 
 
 class ScrapeTaskResponse(BaseModel):
@@ -119,6 +131,6 @@ class ScrapeTaskResponse(BaseModel):
 class TaskStatusResponse(BaseModel):
     """Response schema for task status check."""
     task_id: str
-    status: Literal["pending", "started", "progress", "success", "failure"]
+    status: Literal["pending", "started", "progress", "retry", "success", "failure"]
     result: dict | None = None
     error: str | None = None
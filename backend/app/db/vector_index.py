@@ -0,0 +1,241 @@
+"""
+Lifecycle of the insights embedding index.
+
+HNSW needs no training data and grows with the table, so it's used up to
+VECTOR_HNSW_MAX_ROWS (with a larger graph past a million rows). Beyond that
+IVFFlat builds faster and smaller, with lists sized from the row count
+(rows / 1000, sqrt(rows) past a million rows). IVF centroids only fit the
+rows present at build time, so an IVF index is rebuilt once the table has
+grown VECTOR_INDEX_REBUILD_GROWTH times; the row count of each build is kept
+in the index comment.
+
+Builds run CONCURRENTLY into a new index that then replaces the old one, so
+searches and inserts continue meanwhile. SET and advisory locks are session
+state: run builds over a direct (session) connection, not a transaction pooler.
+
+    python -m app.db.maintenance index-report [--sample 50]
+    python -m app.db.maintenance rebuild-index [--force]
+"""
+import json
+import math
+import time
+from typing import Dict, List, Tuple
+
+from app.core.config import settings
+from app.db.bulk_loader import get_pg_pool
+from app.db.vector_schema import EMBEDDING_INDEX, column_type, index_definition, search_query
+
+# Name of an index while it's being built
+BUILD_INDEX = f"{EMBEDDING_INDEX}_build"
+
+# Advisory lock key so only one worker builds at a time
+_BUILD_LOCK = 0x1D5E7
+
+_INDEX_SQL = """
+    SELECT am.amname AS method,
+           i.indisvalid AS valid,
+           pg_relation_size(c.oid) AS size,
+           pg_get_indexdef(c.oid) AS definition,
+           obj_description(c.oid, 'pg_class') AS comment
+    FROM pg_class c
+    JOIN pg_index i ON i.indexrelid = c.oid
+    JOIN pg_am am ON am.oid = c.relam
+    WHERE c.relname = $1
+"""
+
+
+def plan_index(rows: int) -> Tuple[str, str]:
+    """
+    Index method and options for a table size.
+
+    Args:
+        rows: Rows in insights
+
+    Returns:
+        (method, WITH options)
+    """
+    method = settings.VECTOR_INDEX_METHOD
+    if method == "auto":
+        method = "hnsw" if rows <= settings.VECTOR_HNSW_MAX_ROWS else "ivfflat"
+
+    if method == "hnsw":
+        if rows > 1_000_000:
+            return "hnsw", "m = 24, ef_construction = 128"
+        return "hnsw", "m = 16, ef_construction = 64"
+
+    lists = rows // 1000 if rows <= 1_000_000 else int(math.sqrt(rows))
+    return "ivfflat", f"lists = {max(lists, 1)}"
+
+
+def search_settings(top_k: int, ef_search: int | None = None, probes: int | None = None) -> List[str]:
+    """
+    SET LOCAL statements for one search (run inside its transaction).
+
+    Args:
+        top_k: Results the search returns
+        ef_search: HNSW candidate list size (default VECTOR_HNSW_EF_SEARCH)
+        probes: IVF lists to scan (default VECTOR_IVFFLAT_PROBES)
+
+    Returns:
+        SQL statements
+    """
+    # HNSW returns at most ef_search rows, so it must cover the (binary) candidates
+    candidates = top_k * settings.VECTOR_RERANK_FACTOR if settings.VECTOR_BINARY_INDEX else top_k
+    ef_search = max(ef_search or settings.VECTOR_HNSW_EF_SEARCH, candidates)
+    probes = probes or settings.VECTOR_IVFFLAT_PROBES
+    return [
+        f"SET LOCAL hnsw.ef_search = {int(ef_search)}",
+        f"SET LOCAL ivfflat.probes = {int(probes)}"
+    ]
+
+
+async def _row_count(conn) -> int:
+    """Rows in insights (planner estimate, exact when never analyzed)."""
+    rows = await conn.fetchval("SELECT reltuples::bigint FROM pg_class WHERE oid = 'insights'::regclass")
+    if rows is None or rows < 0:
+        rows = await conn.fetchval("SELECT count(*) FROM insights")
+    return rows
+
+
+async def _index_info(conn, name: str = EMBEDDING_INDEX) -> Dict | None:
+    """Method, validity, size, definition and build row count of an index."""
+    row = await conn.fetchrow(_INDEX_SQL, name)
+    if row is None:
+        return None
+    info = dict(row)
+    info["built_rows"] = json.loads(info.pop("comment") or "{}").get("rows")
+    return info
+
+
+async def check_index(conn) -> Tuple[bool, str]:
+    """
+    Whether the embedding index should be (re)built.
+
+    Args:
+        conn: asyncpg connection
+
+    Returns:
+        (rebuild, reason)
+    """
+    rows = await _row_count(conn)
+    method, options = plan_index(rows)
+    index = await _index_info(conn)
+
+    if index is None or not index["valid"]:
+        return True, "index missing or invalid"
+    if index["method"] != method:
+        return True, f"{index['method']} -> {method} at {rows} rows"
+    if method == "ivfflat":
+        built_rows = index["built_rows"] or 0
+        if rows > built_rows * settings.VECTOR_INDEX_REBUILD_GROWTH:
+            return True, f"IVF trained on {built_rows} rows, table has {rows}"
+    return False, "up to date"
+
+
+async def rebuild_index(force: bool = False) -> Dict:
+    """
+    Rebuild the embedding index concurrently if it's missing or outgrown.
+
+    Args:
+        force: Rebuild even if the index is up to date
+
+    Returns:
+        Dict with rebuilt, reason and, when rebuilt, method, options, rows and seconds
+    """
+    pool = await get_pg_pool()
+    async with pool.acquire() as conn:
+        if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", _BUILD_LOCK):
+            return {"rebuilt": False, "reason": "build already running"}
+
+        try:
+            rebuild, reason = await check_index(conn)
+            if not (rebuild or force):
+                return {"rebuilt": False, "reason": reason}
+
+            rows = await _row_count(conn)
+            method, options = plan_index(rows)
+            start = time.monotonic()
+
+            await conn.execute(f"SET maintenance_work_mem = '{settings.VECTOR_INDEX_BUILD_MEMORY}'")
+            # Leftover of an interrupted build (CONCURRENTLY leaves invalid indexes behind)
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {BUILD_INDEX}")
+            await conn.execute(index_definition(method, options, name=BUILD_INDEX, concurrently=True))
+
+            async with conn.transaction():
+                await conn.execute(f"DROP INDEX IF EXISTS {EMBEDDING_INDEX}")
+                await conn.execute(f"ALTER INDEX {BUILD_INDEX} RENAME TO {EMBEDDING_INDEX}")
+                await conn.execute(
+                    f"COMMENT ON INDEX {EMBEDDING_INDEX} IS '{json.dumps({'rows': rows})}'"
+                )
+
+            return {
+                "rebuilt": True,
+                "reason": "forced" if force and not rebuild else reason,
+                "method": method,
+                "options": options,
+                "rows": rows,
+                "seconds": round(time.monotonic() - start, 1)
+            }
+        finally:
+            await conn.execute("RESET maintenance_work_mem")
+            await conn.execute("SELECT pg_advisory_unlock($1)", _BUILD_LOCK)
+
+
+async def index_report(sample: int = 50, top_k: int = 10) -> Dict:
+    """
+    Index size and recall@k of indexed search against exact search.
+
+    Args:
+        sample: Stored embeddings used as queries
+        top_k: Results per query
+
+    Returns:
+        Dict with rows, index (method, definition, size, build rows),
+        table size, recall and mean indexed query latency
+    """
+    pool = await get_pg_pool()
+    async with pool.acquire() as conn:
+        rows = await _row_count(conn)
+        index = await _index_info(conn)
+        table_size = await conn.fetchval("SELECT pg_total_relation_size('insights')")
+        rebuild, reason = await check_index(conn)
+
+        queries = await conn.fetch(
+            "SELECT embedding FROM insights WHERE embedding IS NOT NULL ORDER BY random() LIMIT $1",
+            sample
+        )
+        exact_sql = (
+            f"SELECT id FROM insights ORDER BY embedding <=> $1::{column_type()} LIMIT $2"
+        )
+
+        recalls, latencies = [], []
+        for query in queries:
+            embedding = query["embedding"]
+
+            async with conn.transaction():
+                for statement in search_settings(top_k):
+                    await conn.execute(statement)
+                start = time.perf_counter()
+                found = await conn.fetch(search_query("id"), embedding, top_k)
+                latencies.append(time.perf_counter() - start)
+
+            async with conn.transaction():
+                # Sequential scan: exact distances for every row
+                await conn.execute("SET LOCAL enable_indexscan = off")
+                await conn.execute("SET LOCAL enable_bitmapscan = off")
+                expected = await conn.fetch(exact_sql, embedding, top_k)
+
+            if expected:
+                hits = {row["id"] for row in found} & {row["id"] for row in expected}
+                recalls.append(len(hits) / len(expected))
+
+    return {
+        "rows": rows,
+        "index": index,
+        "table_size": table_size,
+        "rebuild_needed": rebuild,
+        "rebuild_reason": reason,
+        "sample": len(recalls),
+        "recall": round(sum(recalls) / len(recalls), 4) if recalls else None,
+        "latency_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None
+    }
@@ -0,0 +1,119 @@
+"""
+Storage layout of insight embeddings, derived from settings.
+
+    VECTOR_DIMENSION        stored dimension (text-embedding-3 models are asked
+                            for it directly through the API's dimensions parameter)
+    VECTOR_PRECISION        "vector" (float32) or "halfvec" (float16) column
+    VECTOR_BINARY_INDEX     index binary_quantize(embedding) with Hamming distance
+                            (1 bit per dimension) and rerank candidates by
+                            cosine distance on the stored column
+
+Retrieval (vector_search), schema migration (maintenance) and the storage
+benchmark all build their SQL from here, so the column, the index and the
+queries can't drift apart.
+"""
+from app.core.config import settings
+
+EMBEDDING_INDEX = "idx_insights_embedding"
+
+# Models that accept the dimensions parameter (and whose vectors can be truncated)
+SHORTENABLE_MODELS = ("text-embedding-3-small", "text-embedding-3-large")
+
+
+def column_type() -> str:
+    """SQL type of insights.embedding, e.g. halfvec(512)."""
+    return f"{settings.VECTOR_PRECISION}({settings.VECTOR_DIMENSION})"
+
+
+def binary_expression(value: str = "embedding") -> str:
+    """Binary quantization of a vector expression, as indexed."""
+    return f"binary_quantize({value})::bit({settings.VECTOR_DIMENSION})"
+
+
+def index_definition(
+    method: str,
+    options: str,
+    name: str = EMBEDDING_INDEX,
+    concurrently: bool = False
+) -> str:
+    """
+    CREATE INDEX statement of the embedding index.
+
+    Args:
+        method: Index access method (ivfflat or hnsw, see vector_index.plan_index)
+        options: WITH options of the method
+        name: Index name
+        concurrently: Build without blocking writes (not inside a transaction)
+
+    Returns:
+        SQL statement
+    """
+    if settings.VECTOR_BINARY_INDEX:
+        target = f"({binary_expression()}) bit_hamming_ops"
+    else:
+        target = f"embedding {settings.VECTOR_PRECISION}_cosine_ops"
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+        f"ON insights USING {method} ({target}) WITH ({options})"
+    )
+
+
+def search_query(columns: str) -> str:
+    """
+    Top-k cosine search over insights.
+
+    With a binary index, the top k * VECTOR_RERANK_FACTOR rows by Hamming
+    distance are fetched through the index and reranked on the stored vectors.
+
+    Args:
+        columns: Columns to select (a "score" column is added)
+
+    Returns:
+        SQL with $1 = query vector and $2 = k
+    """
+    query = f"$1::{column_type()}"
+
+    if not settings.VECTOR_BINARY_INDEX:
+        return f"""
+            SELECT {columns}, 1 - (embedding <=> {query}) AS score
+            FROM insights
+            ORDER BY embedding <=> {query}
+            LIMIT $2
+        """
+
+    return f"""
+        SELECT {columns}, 1 - (embedding <=> {query}) AS score
+        FROM (
+            SELECT * FROM insights
+            ORDER BY {binary_expression()} <~> {binary_expression(query)}
+            LIMIT $2 * {settings.VECTOR_RERANK_FACTOR}
+        ) candidates
+        ORDER BY embedding <=> {query}
+        LIMIT $2
+    """
+
+
+def migration_expression(current_dimension: int) -> str:
+    """
+    USING expression converting the current column to the configured layout.
+
+    Shorter dimensions keep the leading components and renormalize, which is
+    what the API's dimensions parameter does for text-embedding-3 models.
+
+    Args:
+        current_dimension: Dimension of the existing column
+
+    Returns:
+        SQL expression
+
+    Raises:
+        ValueError: If the configured dimension is larger (needs re-embedding)
+    """
+    dimension = settings.VECTOR_DIMENSION
+    if dimension > current_dimension:
+        raise ValueError(
+            f"Can't grow embeddings from {current_dimension} to {dimension} dimensions; re-embed instead"
+        )
+    if dimension < current_dimension:
+        return f"l2_normalize(subvector(embedding::vector, 1, {dimension}))::{column_type()}"
+    return f"embedding::{column_type()}"
@@ -10,6 +10,8 @@ from fastapi.responses import JSONResponse
 
 from app.core.config import settings
 from app.api.v1 import auth, chat, scrape
+from app.db.redis_client import close_redis_client
+from app.services.chat_service import close_rag_components, init_rag_components
 
 
 @asynccontextmanager
@@ -22,10 +24,15 @@ async def lifespan(app: FastAPI):
     print("🚀 JudgmentAI starting up...")
     print(f"📊 Environment: {settings.APP_ENV}")
 
+    # Build the chat LLM, embedding model and DB pool once, off the request path
+    await init_rag_components()
+
     yield
 
     # Shutdown
     print("👋 JudgmentAI shutting down...")
+    await close_rag_components()
+    await close_redis_client()
 
 
 # Initialize FastAPI app
@@ -1,12 +1,37 @@
 """
 NLP analysis service for Aspect-Based Sentiment Analysis (ABSA).
-Uses spaCy for aspect extraction and OpenAI for sentiment classification.
+Uses spaCy for aspect extraction and a sentiment backend (OpenAI or a local
+CPU model, see sentiment_backends) for classification.
 """
+import asyncio
+import json
 from typing import List, Dict, Tuple
-import spacy
-from openai import OpenAI
+from spacy.tokens import Doc
+from openai import AsyncOpenAI
 
 from app.core.config import settings
+from app.services.cache import SentimentCache
+from app.services.lexicon import LexiconScorer
+from app.services.model_registry import get_lexicon, get_nlp
+from app.services.sentiment_backends import get_sentiment_backend
+
+SENTIMENT_LABELS = ("positive", "negative", "neutral")
+# Bump when a prompt changes so cached labels are not reused
+PROMPT_VERSION = "1"
+MAX_ASPECTS_PER_COMMENT = 5
+
+MULTI_ASPECT_PROMPT = (
+    "You are a sentiment analysis assistant. Classify the sentiment expressed about "
+    "each listed aspect in the given text. Respond with a JSON object mapping every "
+    "aspect, spelled exactly as given, to one of: positive, negative, neutral."
+)
+
+PACKED_PROMPT = (
+    "You are a sentiment analysis assistant. For each comment, classify the sentiment "
+    "expressed about each of its listed aspects. Respond with a JSON object mapping "
+    "each comment id to an object that maps every aspect, spelled exactly as given, "
+    "to one of: positive, negative, neutral."
+)
 
 
 class AnalysisService:
@@ -15,39 +40,54 @@ class AnalysisService:
 
     ABSA Process:
     1. Extract noun chunks (aspects) using spaCy
-    2. Classify sentiment for each aspect using SetFit
+    2. Classify sentiment for each aspect with the sentiment backend
     3. Return structured insights
     """
 
-    def __init__(self):
-        """Initialize NLP models."""
+    def __init__(self, backend: str | None = None):
+        """
+        Initialize NLP models.
+
+        Args:
+            backend: Sentiment backend, "openai" or "local" (defaults to SENTIMENT_BACKEND)
+        """
         self._nlp = None
-        self._openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self._lexicon: LexiconScorer | None = None
+        self._async_openai_client: AsyncOpenAI | None = None
+        self._request_semaphore: asyncio.Semaphore | None = None
+        self.backend = get_sentiment_backend(backend, self)
+        version = PROMPT_VERSION if self.backend.uses_llm else self.backend.name
+        self.model_version = f"{self.backend.model}:{version}"  # Part of insight ids
+        self.sentiment_cache = (
+            SentimentCache(self.backend.model, version)
+            if settings.SENTIMENT_CACHE_ENABLED else None
+        )
 
     def _load_models(self):
-        """Lazy-load spaCy model (expensive operation)."""
+        """Get the shared spaCy model (preloaded in workers, see model_registry)."""
         if self._nlp is None:
-            # Load spaCy model for aspect extraction
-            try:
-                self._nlp = spacy.load("en_core_web_lg")
-            except OSError:
-                # Model not downloaded, use smaller model
-                print("Warning: en_core_web_lg not found, using en_core_web_sm")
-                self._nlp = spacy.load("en_core_web_sm")
+            self._nlp = get_nlp()
+            self._lexicon = get_lexicon()
+
+    def _parse(self, text: str) -> Doc:
+        """Parse a single text with the trimmed pipeline."""
+        self._load_models()
+        return self._nlp(text)
 
-    def extract_aspects(self, text: str) -> List[str]:
+    def extract_aspects(self, text: str, doc: Doc | None = None) -> List[str]:
         """
         Extract aspect terms (noun chunks) from text.
 
         Args:
             text: Comment or review text
+            doc: Already parsed text (parsed here if omitted)
 
         Returns:
             List of aspect strings (e.g., ["battery life", "camera quality"])
         """
-        self._load_models()
+        if doc is None:
+            doc = self._parse(text)
 
-        doc = self._nlp(text)
         aspects = []
 
         # Extract noun chunks as aspects
@@ -73,136 +113,432 @@ class AnalysisService:
 
         return unique_aspects
 
-    def classify_sentiment(
+    async def aclassify_sentiment(
         self,
         text: str,
-        aspect: str
+        aspect: str,
+        doc: Doc | None = None,
+        degraded: set | None = None
     ) -> str:
         """
         Classify sentiment for a specific aspect within text using OpenAI.
 
+        Requests are bounded by the request semaphore; a failed request falls
+        back to the rule-based path.
+
         Args:
             text: Full comment text
             aspect: Specific aspect to analyze
+            doc: Already parsed text, used by the rule-based fallback
+            degraded: Receives (text, aspect) pairs answered by the fallback
 
         Returns:
             Sentiment label: "positive", "negative", or "neutral"
         """
         try:
-            # Use OpenAI to classify sentiment (lightweight, no model loading)
-            response = self._openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a sentiment analysis assistant. Classify the sentiment about a specific aspect in the given text. Respond with only one word: positive, negative, or neutral."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Text: {text}\n\nAspect: {aspect}\n\nSentiment:"
-                    }
-                ],
-                temperature=0,
-                max_tokens=10
-            )
+            response = await self._acreate(self._single_aspect_request(text, aspect))
+            return self._parse_label(response.choices[0].message.content)
+
+        except Exception as e:
+            print(f"Error classifying sentiment with OpenAI: {e}")
+            if degraded is not None:
+                degraded.add((text, aspect))
+            return self._fallback_sentiment(text, aspect, doc=doc)
+
+    async def aclassify_aspects(
+        self,
+        text: str,
+        aspects: List[str],
+        doc: Doc | None = None,
+        degraded: set | None = None
+    ) -> Dict[str, str]:
+        """
+        Classify sentiment for every aspect of a comment in one request.
 
-            sentiment = response.choices[0].message.content.strip().lower()
+        Aspects missing or invalid in the JSON answer fall back to
+        aclassify_sentiment; a failed request falls back to the rule-based path.
 
-            # Validate response
-            if sentiment in ["positive", "negative", "neutral"]:
-                return sentiment
-            else:
-                return "neutral"
+        Args:
+            text: Full comment text
+            aspects: Aspects to analyze
+            doc: Already parsed text, used by the rule-based fallback
+            degraded: Receives (text, aspect) pairs answered by the fallback
+
+        Returns:
+            Mapping of aspect to "positive", "negative", or "neutral"
+        """
+        try:
+            response = await self._acreate(self._multi_aspect_request(text, aspects))
+            labels = self._parse_labels(response.choices[0].message.content, aspects)
 
         except Exception as e:
-            print(f"Error classifying sentiment with OpenAI: {e}")
-            # Fallback to simple rule-based approach
-            return self._fallback_sentiment(text, aspect)
+            print(f"Error classifying aspects with OpenAI: {e}")
+            if degraded is not None:
+                degraded.update((text, aspect) for aspect in aspects)
+            return {
+                aspect: self._fallback_sentiment(text, aspect, doc=doc)
+                for aspect in aspects
+            }
+
+        missing = [aspect for aspect in aspects if aspect not in labels]
+        retried = await asyncio.gather(*(
+            self.aclassify_sentiment(text, aspect, doc=doc, degraded=degraded)
+            for aspect in missing
+        ))
+        labels.update(zip(missing, retried, strict=True))
+
+        return labels
+
+    async def aclassify_packed(
+        self,
+        items: List[Tuple[str, List[str]]],
+        docs: List[Doc | None] | None = None,
+        degraded: set | None = None
+    ) -> List[Dict[str, str]]:
+        """
+        Classify the aspects of several comments in one request.
+
+        Comments whose answer is missing or invalid fall back to aclassify_aspects.
+
+        Args:
+            items: (comment text, aspects) pairs
+            docs: Parsed texts aligned with items, used by fallbacks
+            degraded: Receives (text, aspect) pairs answered by the fallback
+
+        Returns:
+            One aspect-to-sentiment mapping per item
+        """
+        docs = docs or [None] * len(items)
+
+        try:
+            response = await self._acreate(self._packed_request(items))
+            answer = self._parse_packed(response.choices[0].message.content)
+
+        except Exception as e:
+            print(f"Error classifying packed comments with OpenAI: {e}")
+            answer = {}
+
+        async def resolve(i: int, text: str, aspects: List[str]) -> Dict[str, str]:
+            labels = self._parse_labels(answer.get(str(i)), aspects)
+            if len(labels) == len(aspects):
+                return labels
+            return await self.aclassify_aspects(text, aspects, doc=docs[i], degraded=degraded)
+
+        return list(await asyncio.gather(*(
+            resolve(i, text, aspects) for i, (text, aspects) in enumerate(items)
+        )))
+
+    async def _acreate(self, request: Dict):
+        """
+        Send a chat completion with bounded concurrency and a timeout.
+
+        Args:
+            request: Keyword arguments for chat.completions.create
+
+        Returns:
+            Chat completion response
+        """
+        if self._async_openai_client is None:
+            # Created lazily so it binds to the event loop that uses it
+            self._async_openai_client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                timeout=settings.OPENAI_REQUEST_TIMEOUT
+            )
+            self._request_semaphore = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
 
-    def _fallback_sentiment(self, text: str, aspect: str) -> str:
+        async with self._request_semaphore:
+            return await asyncio.wait_for(
+                self._async_openai_client.chat.completions.create(**request),
+                timeout=settings.OPENAI_REQUEST_TIMEOUT
+            )
+
+    @staticmethod
+    def _single_aspect_request(text: str, aspect: str) -> Dict:
+        """Build the one-word, single-aspect classification request."""
+        return {
+            "model": settings.SENTIMENT_MODEL,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are a sentiment analysis assistant. Classify the sentiment about a specific aspect in the given text. Respond with only one word: positive, negative, or neutral."
+                },
+                {
+                    "role": "user",
+                    "content": f"Text: {text}\n\nAspect: {aspect}\n\nSentiment:"
+                }
+            ],
+            "temperature": 0,
+            "max_tokens": 10
+        }
+
+    @staticmethod
+    def _multi_aspect_request(text: str, aspects: List[str]) -> Dict:
+        """Build the all-aspects-of-one-comment JSON request."""
+        return {
+            "model": settings.SENTIMENT_MODEL,
+            "messages": [
+                {"role": "system", "content": MULTI_ASPECT_PROMPT},
+                {"role": "user", "content": f"Text: {text}\n\nAspects: {json.dumps(aspects)}"}
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0,
+            "max_tokens": 20 + 15 * len(aspects)
+        }
+
+    @staticmethod
+    def _packed_request(items: List[Tuple[str, List[str]]]) -> Dict:
+        """Build the several-comments-per-request JSON request."""
+        payload = [
+            {"id": str(i), "text": text, "aspects": aspects}
+            for i, (text, aspects) in enumerate(items)
+        ]
+        return {
+            "model": settings.SENTIMENT_MODEL,
+            "messages": [
+                {"role": "system", "content": PACKED_PROMPT},
+                {"role": "user", "content": json.dumps({"comments": payload})}
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0,
+            "max_tokens": 20 + sum(10 + 15 * len(aspects) for _, aspects in items)
+        }
+
+    @staticmethod
+    def _parse_label(content: str) -> str:
+        """Validate a one-word sentiment answer."""
+        sentiment = content.strip().lower()
+
+        # Validate response
+        if sentiment in SENTIMENT_LABELS:
+            return sentiment
+        else:
+            return "neutral"
+
+    @staticmethod
+    def _parse_packed(content: str) -> Dict:
+        """Decode a packed answer, tolerating invalid JSON."""
+        try:
+            answer = json.loads(content)
+        except ValueError:
+            return {}
+        return answer if isinstance(answer, dict) else {}
+
+    @staticmethod
+    def _parse_labels(raw, aspects: List[str]) -> Dict[str, str]:
+        """
+        Validate a model's aspect-to-sentiment answer.
+
+        Args:
+            raw: JSON string or already decoded object
+            aspects: Aspects that were asked about
+
+        Returns:
+            Valid labels only (aspects with bad or missing labels are omitted)
+        """
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except ValueError:
+                return {}
+
+        if not isinstance(raw, dict):
+            return {}
+
+        # Models sometimes change aspect casing
+        answer = {str(key).strip().lower(): value for key, value in raw.items()}
+
+        labels = {}
+        for aspect in aspects:
+            value = answer.get(aspect.lower())
+            if isinstance(value, str) and value.strip().lower() in SENTIMENT_LABELS:
+                labels[aspect] = value.strip().lower()
+        return labels
+
+    def _fallback_sentiment(self, text: str, aspect: str, doc: Doc | None = None) -> str:
         """
-        Simple rule-based sentiment as fallback.
+        Rule-based sentiment as fallback (lexicon scorer on the parsed Doc).
 
         Args:
             text: Comment text
             aspect: Aspect term
+            doc: Already parsed text (parsed here if omitted)
 
         Returns:
             Basic sentiment estimation
         """
-        # Find sentences containing the aspect
+        if doc is None:
+            doc = self._parse(text)
         self._load_models()
-        doc = self._nlp(text.lower())
 
-        aspect_lower = aspect.lower()
-        relevant_sentences = [
-            sent.text for sent in doc.sents
-            if aspect_lower in sent.text
+        return self._lexicon.score(doc, aspect)
+
+    def _general_insight(self, text: str, doc: Doc) -> List[Dict[str, str]]:
+        """Rule-based overall sentiment for comments without aspects."""
+        self._load_models()
+        sentiment = self._lexicon.score(doc)
+        return [{
+            "aspect": "general",
+            "sentiment": sentiment,
+            "text": text[:500]  # Truncate for storage
+        }]
+
+    @staticmethod
+    def _build_insights(
+        text: str,
+        aspects: List[str],
+        sentiments: Dict[str, str]
+    ) -> List[Dict[str, str]]:
+        """Turn classified aspects into insight dicts."""
+        return [
+            {
+                "aspect": aspect,
+                "sentiment": sentiments.get(aspect, "neutral"),
+                "text": text[:500]  # Store truncated text
+            }
+            for aspect in aspects
         ]
 
-        if not relevant_sentences:
-            return "neutral"
+    def count_llm_calls(self, classified: int) -> int:
+        """
+        Count the OpenAI calls made to classify a comment's aspects.
 
-        # Simple keyword matching
-        positive_words = {"good", "great", "excellent", "love", "amazing", "best", "perfect"}
-        negative_words = {"bad", "terrible", "awful", "hate", "worst", "poor", "disappointing"}
+        Args:
+            classified: Aspects of the comment sent to the backend (cache misses)
+
+        Returns:
+            Number of sentiment classification requests (packed comments
+            share a request, so this is an upper bound in packed mode)
+        """
+        if not self.backend.uses_llm:
+            return 0
 
-        context = " ".join(relevant_sentences).lower()
-        pos_count = sum(1 for word in positive_words if word in context)
-        neg_count = sum(1 for word in negative_words if word in context)
+        if settings.SENTIMENT_MODE == "per_aspect":
+            return classified
+        return min(classified, 1)
 
-        if pos_count > neg_count:
-            return "positive"
-        elif neg_count > pos_count:
-            return "negative"
-        else:
-            return "neutral"
+    @staticmethod
+    def _is_analyzable(text: str) -> bool:
+        """Skip empty and very short comments."""
+        return bool(text) and len(text.strip()) >= 10
 
-    def analyze_comment(self, text: str) -> List[Dict[str, str]]:
+    def parse_batch(
+        self,
+        comments: List[str],
+        batch_size: int | None = None,
+        n_process: int | None = None
+    ) -> List[Doc | None]:
         """
-        Perform full ABSA on a single comment.
+        Parse comments with nlp.pipe.
 
         Args:
-            text: Comment text
+            comments: List of comment texts
+            batch_size: Texts per spaCy batch (default SPACY_BATCH_SIZE)
+            n_process: Parser processes (default SPACY_N_PROCESS)
 
         Returns:
-            List of insights: [{"aspect": "...", "sentiment": "...", "text": "..."}]
-        """
-        if not text or len(text.strip()) < 10:
-            return []
-
-        # Extract aspects
-        aspects = self.extract_aspects(text)
-
-        if not aspects:
-            # No aspects found, treat entire comment as generic sentiment
-            sentiment = self._fallback_sentiment(text, "overall")
-            return [{
-                "aspect": "general",
-                "sentiment": sentiment,
-                "text": text[:500]  # Truncate for storage
-            }]
-
-        # Classify sentiment for each aspect
-        insights = []
-        for aspect in aspects[:5]:  # Limit to top 5 aspects per comment
-            sentiment = self.classify_sentiment(text, aspect)
-            insights.append({
-                "aspect": aspect,
-                "sentiment": sentiment,
-                "text": text[:500]  # Store truncated text
-            })
+            One Doc per comment (None for comments too short to analyze)
+        """
+        self._load_models()
+
+        indices = [i for i, text in enumerate(comments) if self._is_analyzable(text)]
+        docs = self._nlp.pipe(
+            (comments[i] for i in indices),
+            batch_size=batch_size or settings.SPACY_BATCH_SIZE,
+            n_process=n_process or settings.SPACY_N_PROCESS
+        )
 
-        return insights
+        parsed: List[Doc | None] = [None] * len(comments)
+        for i, doc in zip(indices, docs, strict=True):
+            parsed[i] = doc
+        return parsed
 
-    def batch_analyze(self, comments: List[str]) -> List[List[Dict[str, str]]]:
+    async def abatch_analyze(
+        self,
+        comments: List[str],
+        batch_size: int | None = None,
+        n_process: int | None = None,
+        llm_calls: List[int] | None = None
+    ) -> List[List[Dict[str, str]]]:
         """
-        Analyze multiple comments in batch.
+        Analyze multiple comments, classifying through the sentiment backend.
+
+        Comments are parsed together with nlp.pipe and each Doc is reused for
+        aspect extraction and the rule-based fallback. With the OpenAI backend,
+        requests are fanned out on AsyncOpenAI, at most OPENAI_MAX_CONCURRENCY
+        in flight, each bounded by OPENAI_REQUEST_TIMEOUT; the local backend
+        runs batched on the CPU. Results keep input order. (comment, aspect)
+        pairs found in the sentiment cache are not classified again.
 
         Args:
             comments: List of comment texts
+            batch_size: Texts per spaCy batch (default SPACY_BATCH_SIZE)
+            n_process: Parser processes (default SPACY_N_PROCESS)
+            llm_calls: Receives the LLM requests made for each comment (cache
+                hits and rule-based insights cost none)
 
         Returns:
             List of insight lists (one per comment)
         """
-        return [self.analyze_comment(comment) for comment in comments]
+        docs = self.parse_batch(comments, batch_size=batch_size, n_process=n_process)
+
+        results: List[List[Dict[str, str]]] = [[] for _ in comments]
+        pending = []  # (index, text, aspects, doc)
+
+        for i, (text, doc) in enumerate(zip(comments, docs, strict=True)):
+            if doc is None:
+                continue
+            aspects = self.extract_aspects(text, doc=doc)[:MAX_ASPECTS_PER_COMMENT]
+            if aspects:
+                pending.append((i, text, aspects, doc))
+            else:
+                results[i] = self._general_insight(text, doc)
+
+        # Labels already known for each pending comment, from the cache
+        known: List[Dict[str, str]] = [{} for _ in pending]
+        if self.sentiment_cache is not None and pending:
+            keys = [
+                [self.sentiment_cache.key(text, aspect) for aspect in aspects]
+                for _, text, aspects, _ in pending
+            ]
+            cached = await self.sentiment_cache.get_many(key for row in keys for key in row)
+            for labels, (_, _, aspects, _), row in zip(known, pending, keys, strict=True):
+                for aspect, key in zip(aspects, row, strict=True):
+                    if key in cached:
+                        labels[aspect] = cached[key]
+
+        # Only classify the aspects the cache couldn't answer
+        to_classify = [
+            (n, text, [aspect for aspect in aspects if aspect not in known[n]], doc)
+            for n, (_, text, aspects, doc) in enumerate(pending)
+        ]
+        to_classify = [item for item in to_classify if item[2]]
+        degraded: set = set()
+
+        if llm_calls is not None:
+            llm_calls[:] = [0] * len(comments)
+            for n, _, aspects, _ in to_classify:
+                llm_calls[pending[n][0]] = self.count_llm_calls(len(aspects))
+
+        labels = await self.backend.classify(
+            [(text, aspects, doc) for _, text, aspects, doc in to_classify],
+            degraded
+        )
+
+        fresh = {}
+        for (n, text, _, _), sentiments in zip(to_classify, labels, strict=True):
+            known[n].update(sentiments)
+            if self.sentiment_cache is not None:
+                # Rule-based fallbacks are not cached, the LLM gets another try
+                fresh.update(
+                    (self.sentiment_cache.key(text, aspect), sentiment)
+                    for aspect, sentiment in sentiments.items()
+                    if (text, aspect) not in degraded
+                )
+
+        if fresh:
+            await self.sentiment_cache.set_many(fresh)
+
+        for (i, text, aspects, _), sentiments in zip(pending, known, strict=True):
+            results[i] = self._build_insights(text, aspects, sentiments)
+
+        return results
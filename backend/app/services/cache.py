@@ -0,0 +1,282 @@
+"""
+Two-tier content-addressed cache: an in-process LRU in front of Redis.
+
+The local tier is shared by everything in the worker process that uses the
+same namespace and is evicted by size (least recently used first). The Redis
+tier is shared by all workers and is evicted by TTL (and by the server's
+maxmemory policy, e.g. volatile-lru). Both tiers hold serialized values, so
+compact encodings (e.g. float16 embeddings) shrink memory as well as Redis.
+Redis errors are treated as misses, so a Redis outage only costs the cache,
+never the job.
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+import numpy as np
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.db.redis_client import get_redis_client
+
+# Local LRU tiers, one per namespace, shared by cache instances in this process
+_local_tiers: Dict[str, "LRUCache"] = {}
+
+
+class LRUCache:
+    """Size-bounded in-memory mapping that evicts the least recently used key."""
+
+    def __init__(self, max_size: int):
+        """
+        Initialize cache.
+
+        Args:
+            max_size: Maximum number of entries (0 disables the tier)
+        """
+        self.max_size = max_size
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: str):
+        """Get a value (None if absent), marking it as recently used."""
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value):
+        """Store a value, evicting the oldest entries beyond max_size."""
+        if self.max_size <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Batch cache over a local LRU tier and a Redis tier.
+
+    Usage:
+        cache = TieredCache("sentiment", ttl=86400, local_size=10000)
+        found = await cache.get_many(keys)
+        await cache.set_many({key: value for key in missing})
+        cache.stats()  # {"local_hits": ..., "redis_hits": ..., "misses": ...}
+
+    Values are strings; subclasses override serialize/deserialize for others
+    (and set binary when they serialize to bytes).
+    """
+
+    binary = False
+
+    def __init__(self, namespace: str, ttl: int, local_size: int):
+        """
+        Initialize cache.
+
+        Args:
+            namespace: Redis key prefix (also selects the local tier)
+            ttl: Seconds entries live in Redis
+            local_size: Max entries in the local tier
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self._local = _local_tiers.setdefault(namespace, LRUCache(local_size))
+
+        # Counters for this instance (e.g. one job)
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """
+        Build a content-addressed key from its parts.
+
+        Args:
+            parts: Values identifying the entry
+
+        Returns:
+            Hex digest of the parts
+        """
+        return hashlib.sha256("\x1f".join(parts).encode('utf-8')).hexdigest()
+
+    def serialize(self, value) -> str | bytes:
+        """Encode a value for storage."""
+        return value
+
+    def deserialize(self, raw: str | bytes):
+        """Decode a stored value."""
+        return raw
+
+    async def get_many(self, keys: Iterable[str]) -> Dict:
+        """
+        Look up keys, local tier first.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Mapping of found keys to values (misses are absent)
+        """
+        found = {}
+        remote: List[str] = []
+
+        for key in dict.fromkeys(keys):
+            raw = self._local.get(key)
+            if raw is not None:
+                found[key] = self.deserialize(raw)
+                self.local_hits += 1
+            else:
+                remote.append(key)
+
+        if remote:
+            try:
+                redis = await get_redis_client(decode_responses=not self.binary)
+                raws = await redis.mget([f"{self.namespace}:{key}" for key in remote])
+            except RedisError as e:
+                print(f"Cache {self.namespace} unavailable, treating as miss: {e}")
+                raws = [None] * len(remote)
+
+            for key, raw in zip(remote, raws, strict=True):
+                if raw is None:
+                    self.misses += 1
+                    continue
+                self._local.set(key, raw)
+                found[key] = self.deserialize(raw)
+                self.redis_hits += 1
+
+        return found
+
+    async def set_many(self, values: Dict):
+        """
+        Store values in both tiers.
+
+        Args:
+            values: Mapping of key to value
+        """
+        if not values:
+            return
+
+        raws = {key: self.serialize(value) for key, value in values.items()}
+        for key, raw in raws.items():
+            self._local.set(key, raw)
+
+        try:
+            redis = await get_redis_client(decode_responses=not self.binary)
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, raw in raws.items():
+                    pipe.set(f"{self.namespace}:{key}", raw, ex=self.ttl)
+                await pipe.execute()
+        except RedisError as e:
+            print(f"Cache {self.namespace} write failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get hit/miss counters of this instance.
+
+        Returns:
+            Dict with local_hits, redis_hits, hits and misses
+        """
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "hits": self.local_hits + self.redis_hits,
+            "misses": self.misses
+        }
+
+
+class SentimentCache(TieredCache):
+    """
+    Cache of aspect sentiment labels.
+
+    Keyed on normalized comment text, aspect, model and prompt version, so a
+    model or prompt change never serves stale labels.
+    """
+
+    def __init__(self, model: str, prompt_version: str):
+        """
+        Initialize cache.
+
+        Args:
+            model: Model producing the labels
+            prompt_version: Version of the classification prompts
+        """
+        super().__init__(
+            "sentiment",
+            ttl=settings.SENTIMENT_CACHE_TTL,
+            local_size=settings.SENTIMENT_CACHE_LOCAL_SIZE
+        )
+        self.model = model
+        self.prompt_version = prompt_version
+
+    def key(self, text: str, aspect: str) -> str:
+        """
+        Build the key of a (comment text, aspect) pair.
+
+        Only case and whitespace are normalized; punctuation can carry sentiment.
+
+        Args:
+            text: Comment text
+            aspect: Aspect
+
+        Returns:
+            Cache key
+        """
+        return self.make_key(
+            " ".join(text.lower().split()),
+            aspect.lower(),
+            self.model,
+            self.prompt_version
+        )
+
+
+class EmbeddingCache(TieredCache):
+    """
+    Cache of embedding vectors.
+
+    Keyed on model, dimension and the exact input string (embeddings are
+    sensitive to every character), stored as float16 bytes: half the size of
+    float32 and a fraction of a JSON list, with cosine similarities unchanged
+    to about three decimal places.
+    """
+
+    binary = True
+
+    def __init__(self, model: str, dimension: int):
+        """
+        Initialize cache.
+
+        Args:
+            model: Embedding model
+            dimension: Embedding dimension
+        """
+        super().__init__(
+            "embedding",
+            ttl=settings.EMBEDDING_CACHE_TTL,
+            local_size=settings.EMBEDDING_CACHE_LOCAL_SIZE
+        )
+        self.model = model
+        self.dimension = dimension
+
+    def key(self, text: str) -> str:
+        """
+        Build the key of an embedding input.
+
+        Args:
+            text: Input string as sent to the API
+
+        Returns:
+            Cache key
+        """
+        return self.make_key(self.model, str(self.dimension), text)
+
+    def serialize(self, value: List[float]) -> bytes:
+        """Encode a vector as float16 bytes."""
+        return np.asarray(value, dtype=np.float16).tobytes()
+
+    def deserialize(self, raw: bytes) -> List[float]:
+        """Decode float16 bytes to a vector."""
+        return np.frombuffer(raw, dtype=np.float16).astype(np.float32).tolist()
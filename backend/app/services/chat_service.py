@@ -1,14 +1,15 @@
 """
 Chat service implementing RAG with LlamaIndex.
 CRITICAL: Stateless service - chat history passed explicitly.
+
+The LLM, the embedding model and the Postgres pool are process-wide: built
+once per API worker at startup (init_rag_components) and shared by every
+request. They hold clients and connections only; chat memory stays per request.
 """
-from typing import List, Dict
-from llama_index.core import VectorStoreIndex
+from typing import AsyncIterator, List, Dict
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.chat_engine import CondensePlusContextChatEngine
 from llama_index.core.memory import ChatMemoryBuffer
-try:
-    from llama_index.vector_stores.supabase import SupabaseVectorStore
-except ImportError:
-    from llama_index_vector_stores_supabase import SupabaseVectorStore
 try:
     from llama_index.embeddings.openai import OpenAIEmbedding
 except ImportError:
@@ -20,6 +21,92 @@ except ImportError:
 from supabase import Client
 
 from app.core.config import settings
+from app.db.bulk_loader import close_pg_pool, get_pg_pool
+from app.db.vector_schema import SHORTENABLE_MODELS
+from app.services.cache import EmbeddingCache
+from app.services.vector_search import InsightRetriever
+
+
+class CachedOpenAIEmbedding(OpenAIEmbedding):
+    """OpenAI embedding whose async query vectors go through the embedding cache."""
+
+    _cache: EmbeddingCache = PrivateAttr()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._cache = EmbeddingCache(self.model_name, settings.VECTOR_DIMENSION)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        """Embed a query, reusing the cached vector of an identical query."""
+        key = self._cache.key(query.replace("\n", " ").strip())
+        found = await self._cache.get_many([key])
+        if key in found:
+            return found[key]
+
+        embedding = await super()._aget_query_embedding(query)
+        await self._cache.set_many({key: embedding})
+        return embedding
+
+
+# Global RAG components (shared by all requests of this worker)
+_llm: OpenAI | None = None
+_embed_model: OpenAIEmbedding | None = None
+
+
+def get_llm() -> OpenAI:
+    """Get or create the shared chat LLM."""
+    global _llm
+
+    if _llm is None:
+        _llm = OpenAI(
+            model=settings.DEFAULT_LLM_MODEL,
+            api_key=settings.OPENAI_API_KEY,
+            temperature=0.7
+        )
+    return _llm
+
+
+def get_embed_model() -> OpenAIEmbedding:
+    """Get or create the shared query embedding model."""
+    global _embed_model
+
+    if _embed_model is None:
+        embedding_class = (
+            CachedOpenAIEmbedding if settings.EMBEDDING_CACHE_ENABLED else OpenAIEmbedding
+        )
+        # Same dimension as the stored vectors
+        options = (
+            {"dimensions": settings.VECTOR_DIMENSION}
+            if settings.EMBEDDING_MODEL in SHORTENABLE_MODELS else {}
+        )
+        _embed_model = embedding_class(
+            model=settings.EMBEDDING_MODEL,
+            api_key=settings.OPENAI_API_KEY,
+            **options
+        )
+    return _embed_model
+
+
+async def init_rag_components():
+    """Build the shared RAG components and open the Postgres pool (at startup)."""
+    get_llm()
+    get_embed_model()
+
+    try:
+        await get_pg_pool()
+    except Exception as e:
+        # Not fatal (bad credentials, database down, asyncpg missing, ...):
+        # the API starts degraded and the first chat request retries
+        print(f"Postgres pool not opened at startup: {type(e).__name__}: {e}")
+
+
+async def close_rag_components():
+    """Close the Postgres pool and drop the shared components (for cleanup on shutdown)."""
+    global _llm, _embed_model
+
+    await close_pg_pool()
+    _llm = None
+    _embed_model = None
 
 
 class ChatService:
@@ -28,80 +115,58 @@ class ChatService:
 
     Each request:
     1. Receives chat history explicitly
-    2. Queries vector store for relevant insights
+    2. Queries the insights table for relevant insights
     3. Generates response with context
     4. Returns response (no state stored)
     """
 
-    def __init__(self, supabase_client: Client):
+    def __init__(
+        self,
+        supabase_client: Client,
+        ef_search: int | None = None,
+        probes: int | None = None
+    ):
         """
         Initialize chat service with Supabase client.
 
         Args:
             supabase_client: Supabase client for vector store access
+            ef_search: HNSW search candidates (recall vs latency, default VECTOR_HNSW_EF_SEARCH)
+            probes: IVFFlat lists scanned (default VECTOR_IVFFLAT_PROBES)
         """
         self.supabase = supabase_client
-        self._vector_store = None
-        self._index = None
-        self._llm = None
-        self._embed_model = None
-
-    def _get_vector_store(self) -> SupabaseVectorStore:
-        """Lazy-load vector store."""
-        if self._vector_store is None:
-            self._vector_store = SupabaseVectorStore(
-                postgres_connection_string=settings.DATABASE_URL,
-                collection_name="insights",
-                dimension=settings.VECTOR_DIMENSION,
-            )
-        return self._vector_store
-
-    def _get_index(self) -> VectorStoreIndex:
-        """Lazy-load vector store index."""
-        if self._index is None:
-            vector_store = self._get_vector_store()
-            self._index = VectorStoreIndex.from_vector_store(
-                vector_store=vector_store,
-                embed_model=self._get_embed_model()
-            )
-        return self._index
+        self.ef_search = ef_search
+        self.probes = probes
+
+    def _get_retriever(self, top_k: int = 5) -> InsightRetriever:
+        """Create a retriever over the insights table."""
+        return InsightRetriever(
+            self._get_embed_model(),
+            similarity_top_k=top_k,
+            ef_search=self.ef_search,
+            probes=self.probes
+        )
 
     def _get_llm(self) -> OpenAI:
-        """Lazy-load LLM."""
-        if self._llm is None:
-            self._llm = OpenAI(
-                model=settings.DEFAULT_LLM_MODEL,
-                api_key=settings.OPENAI_API_KEY,
-                temperature=0.7
-            )
-        return self._llm
+        """Get the shared LLM."""
+        return get_llm()
 
     def _get_embed_model(self) -> OpenAIEmbedding:
-        """Lazy-load embedding model."""
-        if self._embed_model is None:
-            self._embed_model = OpenAIEmbedding(
-                model=settings.EMBEDDING_MODEL,
-                api_key=settings.OPENAI_API_KEY
-            )
-        return self._embed_model
+        """Get the shared embedding model."""
+        return get_embed_model()
 
-    async def get_response(
-        self,
-        message: str,
-        chat_history: List[Dict[str, str]]
-    ) -> str:
+    def _build_chat_engine(self, chat_history: List[Dict[str, str]]) -> CondensePlusContextChatEngine:
         """
-        Generate AI response using RAG.
+        Create a chat engine with retrieval and memory for one request.
 
         Args:
-            message: User's current message
             chat_history: List of previous messages [{"role": "user/assistant", "content": "..."}]
 
         Returns:
-            AI-generated response string
+            Chat engine (not shared between requests)
         """
-        # Get index and query engine
-        index = self._get_index()
+        # Get retriever and LLM
+        retriever = self._get_retriever()
         llm = self._get_llm()
 
         # Create chat memory from history
@@ -111,8 +176,8 @@ class ChatService:
         )
 
         # Create chat engine with retrieval
-        chat_engine = index.as_chat_engine(
-            chat_mode="condense_plus_context",
+        chat_engine = CondensePlusContextChatEngine.from_defaults(
+            retriever=retriever,
             memory=memory,
             llm=llm,
             verbose=True,
@@ -123,12 +188,54 @@ class ChatService:
                 "If the context doesn't contain relevant information, say so honestly."
             )
         )
+        return chat_engine
+
+    async def get_response(
+        self,
+        message: str,
+        chat_history: List[Dict[str, str]]
+    ) -> str:
+        """
+        Generate AI response using RAG.
+
+        Args:
+            message: User's current message
+            chat_history: List of previous messages [{"role": "user/assistant", "content": "..."}]
+
+        Returns:
+            AI-generated response string
+        """
+        chat_engine = self._build_chat_engine(chat_history)
 
         # Get response
         response = await chat_engine.achat(message)
 
         return str(response)
 
+    async def stream_response(
+        self,
+        message: str,
+        chat_history: List[Dict[str, str]]
+    ) -> AsyncIterator[str]:
+        """
+        Generate AI response using RAG, yielding tokens as the LLM produces them.
+
+        Retrieval runs before the first token; the text of all yielded tokens
+        is the full response.
+
+        Args:
+            message: User's current message
+            chat_history: List of previous messages [{"role": "user/assistant", "content": "..."}]
+
+        Yields:
+            Response text deltas
+        """
+        chat_engine = self._build_chat_engine(chat_history)
+
+        response = await chat_engine.astream_chat(message)
+        async for token in response.async_response_gen():
+            yield token
+
     def _convert_history_format(self, history: List[Dict[str, str]]) -> List:
         """
         Convert database chat history to LlamaIndex format.
@@ -163,8 +270,7 @@ class ChatService:
         Returns:
             List of matching insights
         """
-        index = self._get_index()
-        retriever = index.as_retriever(similarity_top_k=top_k)
+        retriever = self._get_retriever(top_k)
 
         results = await retriever.aretrieve(query)
 
@@ -0,0 +1,171 @@
+"""
+Near-duplicate comment collapsing before ABSA analysis.
+
+Copy-pasta, bot replies and "this"/"+1" variants are grouped so each group is
+analyzed once:
+1. Exact duplicates are matched on a hash of the normalized text
+2. Near-duplicates are found with MinHash signatures over character shingles,
+   bucketed with LSH (banding) and confirmed by estimated Jaccard similarity
+
+Only cluster representatives are indexed, so assignment is incremental and
+each comment costs one signature plus a few bucket lookups.
+"""
+import hashlib
+import re
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.config import settings
+
+# Largest prime below 2**32, so (a * x + b) with 32-bit operands fits in uint64
+_PRIME = np.uint64(4294967291)
+
+_URL_RE = re.compile(r"https?://\S+")
+_NON_WORD_RE = re.compile(r"[^\w\s]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize comment text for duplicate detection.
+
+    Args:
+        text: Raw comment text
+
+    Returns:
+        Lowercased text without URLs, punctuation or extra whitespace
+    """
+    text = _URL_RE.sub(" ", text.lower())
+    text = _NON_WORD_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+class CommentDeduplicator:
+    """
+    Groups exact and near-duplicate comments.
+
+    Usage:
+        dedup = CommentDeduplicator()
+        clusters = dedup.cluster(comments)
+        # [{"comment": representative, "weight": 3, "duplicate_ids": [...]}, ...]
+    """
+
+    def __init__(
+        self,
+        threshold: float | None = None,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 5,
+        seed: int = 1
+    ):
+        """
+        Initialize deduplicator.
+
+        Args:
+            threshold: Min estimated Jaccard similarity to count as duplicate
+            num_perm: MinHash signature length
+            bands: LSH bands (num_perm must divide evenly)
+            shingle_size: Character shingle length
+            seed: Seed for the MinHash permutations
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold if threshold is not None else settings.DEDUP_SIMILARITY_THRESHOLD
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+        self._exact: Dict[str, int] = {}  # normalized hash -> cluster index
+        self._buckets: Dict[tuple, List[int]] = {}  # (band, band signature) -> cluster indices
+        self._signatures: List[np.ndarray] = []  # per cluster representative
+        self.clusters: List[Dict] = []
+
+    def add(self, comment: Dict) -> Dict:
+        """
+        Assign a comment to a cluster, creating one if it is not a duplicate.
+
+        Args:
+            comment: Comment dict with at least "text" (and "id")
+
+        Returns:
+            The cluster the comment joined or created
+        """
+        normalized = normalize_text(comment['text'])
+        digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+        # Exact duplicate
+        index = self._exact.get(digest)
+        if index is not None:
+            return self._join(index, comment)
+
+        # Near duplicate: candidates share at least one LSH band
+        signature = self._signature(normalized)
+        band_keys = [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+        checked = set()
+        for key in band_keys:
+            for index in self._buckets.get(key, ()):
+                if index in checked:
+                    continue
+                checked.add(index)
+                similarity = float(np.mean(self._signatures[index] == signature))
+                if similarity >= self.threshold:
+                    self._exact[digest] = index
+                    return self._join(index, comment)
+
+        # New representative
+        index = len(self.clusters)
+        self.clusters.append({"comment": comment, "weight": 1, "duplicate_ids": []})
+        self._signatures.append(signature)
+        self._exact[digest] = index
+        for key in band_keys:
+            self._buckets.setdefault(key, []).append(index)
+
+        return self.clusters[index]
+
+    def cluster(self, comments: List[Dict]) -> List[Dict]:
+        """
+        Group comments into clusters (representative = first occurrence).
+
+        Args:
+            comments: Comment dicts
+
+        Returns:
+            Clusters with representative comment, weight and duplicate ids
+        """
+        for comment in comments:
+            self.add(comment)
+        return self.clusters
+
+    def _join(self, index: int, comment: Dict) -> Dict:
+        """Add a duplicate to an existing cluster."""
+        cluster = self.clusters[index]
+        cluster["weight"] += 1
+        if comment.get('id'):
+            cluster["duplicate_ids"].append(comment['id'])
+        return cluster
+
+    def _signature(self, normalized: str) -> np.ndarray:
+        """Compute the MinHash signature of normalized text."""
+        k = self.shingle_size
+        if len(normalized) <= k:
+            shingles = {normalized}
+        else:
+            shingles = {normalized[i:i + k] for i in range(len(normalized) - k + 1)}
+
+        hashes = np.fromiter(
+            (hash(shingle) & 0xFFFFFFFF for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
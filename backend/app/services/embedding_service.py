@@ -0,0 +1,198 @@
+"""
+Batched, concurrent text embeddings for insight storage.
+
+Texts are packed into requests by token budget (many inputs per call instead
+of one call per insight), requests run concurrently up to
+EMBEDDING_CONCURRENCY, and results are reassembled in input order. A failed
+request is retried with backoff; a request the API rejects is split in half so
+one bad input doesn't fail its whole batch.
+
+Vectors are cached by (model, dimension, input string), so repeated inputs
+(re-scrapes, cross-posts, identical insights within a batch) are embedded once.
+"""
+import asyncio
+from typing import Dict, List, Tuple
+
+from openai import AsyncOpenAI, BadRequestError, OpenAIError
+
+from app.core.config import settings
+from app.db.vector_schema import SHORTENABLE_MODELS
+from app.services.cache import EmbeddingCache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Per-input limit of OpenAI embedding models
+MAX_INPUT_TOKENS = 8191
+# Rough tokens-per-character ratio when tiktoken isn't installed
+CHARS_PER_TOKEN = 4
+
+
+class EmbeddingService:
+    """
+    Embeds texts with the OpenAI embeddings API.
+
+    Usage:
+        embedder = EmbeddingService()
+        vectors = await embedder.aembed(texts)  # one vector per text, same order
+        embedder.cache.stats()  # {"hits": ..., "misses": ...} when caching is enabled
+    """
+
+    def __init__(self, model: str | None = None):
+        """
+        Initialize service.
+
+        Args:
+            model: Embedding model (defaults to EMBEDDING_MODEL)
+        """
+        self.model = model or settings.EMBEDDING_MODEL
+        self.dimension = settings.VECTOR_DIMENSION
+        # Shortened vectors come from the API rather than truncating locally
+        self._options = {"dimensions": self.dimension} if self.model in SHORTENABLE_MODELS else {}
+        self._client: AsyncOpenAI | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._encoding = None
+
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+
+        self.cache = (
+            EmbeddingCache(self.model, self.dimension)
+            if settings.EMBEDDING_CACHE_ENABLED else None
+        )
+
+        self.requests = 0  # API calls made (for reporting)
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts in token-budgeted batches, concurrently, skipping cached ones.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One embedding per text, in input order
+        """
+        if not texts:
+            return []
+
+        if self._client is None:
+            # Created lazily so it binds to the event loop that uses it
+            self._client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                timeout=settings.OPENAI_REQUEST_TIMEOUT
+            )
+            self._semaphore = asyncio.Semaphore(settings.EMBEDDING_CONCURRENCY)
+
+        prepared = [self._prepare(text) for text in texts]
+
+        # Identical inputs share one vector
+        unique: Dict[str, Tuple[str, int]] = {}
+        for text, tokens in prepared:
+            unique.setdefault(text, (text, tokens))
+
+        vectors: Dict[str, List[float]] = {}
+        if self.cache is not None:
+            keys = {text: self.cache.key(text) for text in unique}
+            found = await self.cache.get_many(keys.values())
+            vectors = {text: found[key] for text, key in keys.items() if key in found}
+
+        inputs = [item for text, item in unique.items() if text not in vectors]
+        batches = self._batches(inputs)
+
+        results = await asyncio.gather(*(
+            self._embed_batch([inputs[i] for i in batch]) for batch in batches
+        ))
+
+        fresh: Dict[str, List[float]] = {}
+        for batch, embeddings in zip(batches, results, strict=True):
+            for i, vector in zip(batch, embeddings, strict=True):
+                fresh[inputs[i][0]] = vector
+
+        if self.cache is not None:
+            await self.cache.set_many({keys[text]: vector for text, vector in fresh.items()})
+
+        vectors.update(fresh)
+        return [vectors[text] for text, _ in prepared]
+
+    def _prepare(self, text: str) -> Tuple[str, int]:
+        """Clip a text to the per-input limit and count its tokens."""
+        text = text.replace("\n", " ").strip() or " "  # Empty inputs are rejected
+
+        if self._encoding is None:
+            text = text[:MAX_INPUT_TOKENS * CHARS_PER_TOKEN // 2]  # Conservative for non-English
+            return text, len(text) // CHARS_PER_TOKEN + 1
+
+        tokens = self._encoding.encode(text)
+        if len(tokens) > MAX_INPUT_TOKENS:
+            tokens = tokens[:MAX_INPUT_TOKENS]
+            text = self._encoding.decode(tokens)
+        return text, len(tokens)
+
+    @staticmethod
+    def _batches(inputs: List[Tuple[str, int]]) -> List[List[int]]:
+        """Group input indices into requests within the token and input budgets."""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        tokens = 0
+
+        for i, (_, count) in enumerate(inputs):
+            if current and (
+                tokens + count > settings.EMBEDDING_BATCH_TOKENS
+                or len(current) >= settings.EMBEDDING_BATCH_SIZE
+            ):
+                batches.append(current)
+                current, tokens = [], 0
+            current.append(i)
+            tokens += count
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_batch(self, inputs: List[Tuple[str, int]]) -> List[List[float]]:
+        """
+        Embed one batch, retrying transient failures and splitting rejected batches.
+
+        Args:
+            inputs: (text, tokens) pairs
+
+        Returns:
+            Embeddings in input order
+
+        Raises:
+            OpenAIError: If a single input keeps failing
+        """
+        texts = [text for text, _ in inputs]
+
+        for attempt in range(settings.EMBEDDING_MAX_RETRIES + 1):
+            try:
+                async with self._semaphore:
+                    self.requests += 1
+                    response = await asyncio.wait_for(
+                        self._client.embeddings.create(model=self.model, input=texts, **self._options),
+                        timeout=settings.OPENAI_REQUEST_TIMEOUT
+                    )
+                return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+            except BadRequestError:
+                # Something in the batch is invalid: isolate it instead of failing everyone
+                if len(inputs) == 1:
+                    raise
+                middle = len(inputs) // 2
+                left, right = await asyncio.gather(
+                    self._embed_batch(inputs[:middle]),
+                    self._embed_batch(inputs[middle:])
+                )
+                return left + right
+
+            except (OpenAIError, asyncio.TimeoutError) as e:
+                if attempt == settings.EMBEDDING_MAX_RETRIES:
+                    raise
+                print(f"Embedding batch of {len(inputs)} failed, retrying: {e}")
+                await asyncio.sleep(2 ** attempt)
@@ -0,0 +1,172 @@
+"""
+Token-level lexicon sentiment scorer used as the rule-based fallback.
+
+Runs on an already parsed Doc: lexicon terms are found with one compiled
+PhraseMatcher pass (token LOWER attribute, so "good" never matches inside
+"goodbye"), negated within a short window, and cached on the Doc so scoring
+several aspects of a comment matches only once.
+"""
+import json
+from typing import Dict, List, Tuple
+
+from spacy.language import Language
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import Doc
+
+from app.core.config import settings
+
+DEFAULT_LEXICON: Dict[str, float] = {
+    # Positive
+    "good": 1.0, "great": 1.0, "excellent": 1.0, "love": 1.0, "amazing": 1.0,
+    "best": 1.0, "perfect": 1.0, "awesome": 1.0, "fantastic": 1.0, "nice": 1.0,
+    "solid": 1.0, "recommend": 1.0, "impressive": 1.0, "reliable": 1.0,
+    "worth it": 1.0, "happy": 1.0, "fast": 0.5, "better": 0.5, "like": 0.5,
+    # Negative
+    "bad": -1.0, "terrible": -1.0, "awful": -1.0, "hate": -1.0, "worst": -1.0,
+    "poor": -1.0, "disappointing": -1.0, "broken": -1.0, "useless": -1.0,
+    "garbage": -1.0, "buggy": -1.0, "overpriced": -1.0, "waste": -1.0,
+    "not worth": -1.0, "slow": -0.5, "worse": -0.5, "annoying": -0.5,
+}
+
+NEGATIONS = frozenset({
+    "not", "no", "never", "n't", "nt", "hardly", "barely", "without",
+    "nothing", "nobody", "neither", "nor", "none"
+})
+
+# Doc.user_data keys for per-Doc caches
+_HITS_KEY = "lexicon_hits"
+_LOWERS_KEY = "lexicon_lowers"
+
+
+def load_lexicon(path: str | None) -> Dict[str, float]:
+    """
+    Load a lexicon file, or the built-in default.
+
+    Args:
+        path: JSON file mapping terms (one or more words) to scores
+
+    Returns:
+        Mapping of lowercased term to score (positive > 0 > negative)
+    """
+    if not path:
+        return dict(DEFAULT_LEXICON)
+
+    with open(path, encoding="utf-8") as f:
+        return {term.lower(): float(score) for term, score in json.load(f).items()}
+
+
+class LexiconScorer:
+    """
+    Scores sentiment about an aspect from lexicon hits in its sentences.
+
+    Usage:
+        scorer = LexiconScorer(nlp)
+        scorer.score(doc, "battery life")  # "positive" | "negative" | "neutral"
+        scorer.score(doc)  # whole comment
+    """
+
+    def __init__(
+        self,
+        nlp: Language,
+        lexicon: Dict[str, float] | None = None,
+        negation_window: int | None = None
+    ):
+        """
+        Compile the lexicon.
+
+        Args:
+            nlp: Pipeline whose vocab/tokenizer produced the Docs
+            lexicon: Term scores (defaults to SENTIMENT_LEXICON_PATH or built-in)
+            negation_window: Tokens before a term searched for a negation
+        """
+        self.tokenizer = nlp.tokenizer
+        self.lexicon = lexicon if lexicon is not None else load_lexicon(settings.SENTIMENT_LEXICON_PATH)
+        self.negation_window = (
+            negation_window if negation_window is not None else settings.SENTIMENT_NEGATION_WINDOW
+        )
+
+        self.matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+        self._scores: Dict[int, float] = {}
+
+        terms = list(self.lexicon)
+        for term, pattern in zip(terms, self.tokenizer.pipe(terms), strict=True):
+            self.matcher.add(term, [pattern])
+            self._scores[nlp.vocab.strings[term]] = self.lexicon[term]
+
+    def score(self, doc: Doc, aspect: str | None = None) -> str:
+        """
+        Classify the sentiment about an aspect (or the whole comment).
+
+        Args:
+            doc: Parsed comment
+            aspect: Aspect term; only sentences mentioning it count
+
+        Returns:
+            "positive", "negative" or "neutral"
+        """
+        hits = self._hits(doc)
+
+        if aspect is None:
+            total = sum(score for _, score in hits)
+        else:
+            ranges = self._aspect_sentences(doc, aspect)
+            if not ranges:
+                return "neutral"
+            total = sum(
+                score for start, score in hits
+                if any(sent_start <= start < sent_end for sent_start, sent_end in ranges)
+            )
+
+        if total > 0:
+            return "positive"
+        elif total < 0:
+            return "negative"
+        return "neutral"
+
+    def _hits(self, doc: Doc) -> List[Tuple[int, float]]:
+        """Lexicon matches of a Doc as (token index, signed score), cached on the Doc."""
+        hits = doc.user_data.get(_HITS_KEY)
+        if hits is not None:
+            return hits
+
+        hits = []
+        last_end = 0
+        # Longest match wins where terms overlap ("not worth" over "worth")
+        for match_id, start, end in sorted(self.matcher(doc), key=lambda m: (m[1], -m[2])):
+            if start < last_end:
+                continue
+            last_end = end
+            score = self._scores[match_id]
+            hits.append((start, -score if self._negated(doc, start) else score))
+
+        doc.user_data[_HITS_KEY] = hits
+        return hits
+
+    def _negated(self, doc: Doc, start: int) -> bool:
+        """Check the window before a term, stopping at clause punctuation."""
+        for i in range(start - 1, max(start - self.negation_window, 0) - 1, -1):
+            token = doc[i]
+            if token.is_punct or token.is_sent_end:
+                return False
+            if token.lower_ in NEGATIONS or token.dep_ == "neg":
+                return True
+        return False
+
+    def _aspect_sentences(self, doc: Doc, aspect: str) -> List[Tuple[int, int]]:
+        """Token ranges of sentences containing the aspect's tokens."""
+        lowers = doc.user_data.get(_LOWERS_KEY)
+        if lowers is None:
+            lowers = doc.user_data[_LOWERS_KEY] = [token.lower_ for token in doc]
+
+        needle = [token.lower_ for token in self.tokenizer(aspect)]
+        if not needle:
+            return []
+
+        size = len(needle)
+        ranges = []
+        for i in range(len(lowers) - size + 1):
+            if lowers[i] == needle[0] and lowers[i:i + size] == needle:
+                sent = doc[i].sent if doc.has_annotation("SENT_START") else doc[:]
+                if (sent.start, sent.end) not in ranges:
+                    ranges.append((sent.start, sent.end))
+        return ranges
@@ -0,0 +1,101 @@
+"""
+Process-level registry of loaded NLP models.
+
+Models are loaded once per process and shared by every AnalysisService. In
+Celery workers, preload_models runs in the parent at worker_init, before the
+prefork pool starts, so children (including ones recycled after
+worker_max_tasks_per_child) inherit the spaCy pipeline and lexicon instead of
+loading their own. gc.freeze() moves everything allocated so far out of the
+collector's reach, so garbage collection in the children doesn't write to
+those pages and they stay shared copy-on-write.
+
+The local sentiment model is loaded in each child instead, at
+worker_process_init: torch and onnxruntime thread pools (and the thread count
+set for them) don't survive fork, so a model built in the parent would run
+with broken or default threading in the children.
+"""
+import gc
+import time
+from typing import Callable, Dict
+
+import spacy
+from spacy.language import Language
+
+from app.core.config import settings
+from app.services.lexicon import LexiconScorer
+
+# Pipeline components ABSA doesn't use (noun chunks need tagger/parser, entities need ner)
+SPACY_EXCLUDED_COMPONENTS = ["lemmatizer", "textcat", "textcat_multilabel"]
+
+_models: Dict[str, object] = {}
+
+
+def get_model(name: str, loader: Callable[[], object]):
+    """
+    Get a model from the registry, loading it on first use.
+
+    Args:
+        name: Registry key
+        loader: Builds the model if it isn't loaded yet
+
+    Returns:
+        The shared model instance
+    """
+    model = _models.get(name)
+    if model is None:
+        start = time.perf_counter()
+        model = _models[name] = loader()
+        print(f"Loaded {name} in {time.perf_counter() - start:.1f}s")
+    return model
+
+
+def _load_spacy() -> Language:
+    """Load the trimmed spaCy pipeline, falling back to the small model."""
+    try:
+        return spacy.load(settings.SPACY_MODEL, exclude=SPACY_EXCLUDED_COMPONENTS)
+    except OSError:
+        # Model not downloaded, use smaller model
+        print(f"Warning: {settings.SPACY_MODEL} not found, using en_core_web_sm")
+        return spacy.load("en_core_web_sm", exclude=SPACY_EXCLUDED_COMPONENTS)
+
+
+def get_nlp() -> Language:
+    """Get the shared spaCy pipeline."""
+    return get_model("spacy", _load_spacy)
+
+
+def get_lexicon() -> LexiconScorer:
+    """Get the shared lexicon scorer (compiled against the spaCy vocab)."""
+    return get_model("lexicon", lambda: LexiconScorer(get_nlp()))
+
+
+def preload_models(**kwargs):
+    """
+    Load worker models up front and freeze them for copy-on-write sharing.
+
+    Connected to Celery's worker_init signal (runs in the parent process).
+    """
+    if not settings.MODEL_PRELOAD:
+        return
+
+    get_nlp()
+    get_lexicon()
+
+    gc.collect()
+    gc.freeze()
+    print(f"Preloaded models: {', '.join(_models)} ({gc.get_freeze_count()} objects frozen)")
+
+
+def preload_process_models(**kwargs):
+    """
+    Load models that must be built after fork (the local sentiment model).
+
+    Connected to Celery's worker_process_init signal (runs in each child), so
+    the runtime's thread pools and SENTIMENT_LOCAL_THREADS apply to the
+    process that runs inference.
+    """
+    if not settings.MODEL_PRELOAD or settings.SENTIMENT_BACKEND != "local":
+        return
+
+    from app.services.sentiment_backends import load_local_pipeline
+    load_local_pipeline()
@@ -0,0 +1,268 @@
+"""
+Adaptive stratified sampling for very large threads.
+
+Instead of classifying every comment, comments are drawn in batches from
+depth strata (proportional allocation, so the sample is self-weighting) and
+the per-aspect sentiment proportions are tracked with Wilson score intervals.
+Sampling stops once the overall proportions and those of the most mentioned
+aspects are within the target margin at the target confidence, or when the
+thread is exhausted.
+
+The unit of observation is an analyzed comment: each counts once per aspect
+it mentions, and once overall (split across its sentiments when it has
+several insights). Duplicates collapsed into one analysis are still separate
+comments of the sample and count once each.
+"""
+import math
+import random
+from statistics import NormalDist
+from typing import Dict, List, Tuple
+
+from app.core.config import settings
+
+SENTIMENTS = ("positive", "negative", "neutral")
+
+# Depth strata: top-level, direct replies, second-level, everything deeper
+MAX_STRATUM = 3
+
+# Pseudo-aspect pooling every comment
+OVERALL = "overall"
+
+
+def z_score(confidence: float) -> float:
+    """Two-sided standard normal quantile for a confidence level."""
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(
+    successes: float,
+    n: float,
+    z: float,
+    fpc: float = 1.0
+) -> Tuple[float, float]:
+    """
+    Wilson score interval for a binomial proportion.
+
+    Args:
+        successes: Observations with the property
+        n: Observations
+        z: Normal quantile of the confidence level
+        fpc: Finite population correction factor applied to the half-width
+
+    Returns:
+        (low, high) bounds
+    """
+    if n <= 0:
+        return 0.0, 1.0
+
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator * fpc
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+class StratifiedSampler:
+    """
+    Draws random comments without replacement, proportionally from depth strata.
+
+    Usage:
+        sampler = StratifiedSampler(comments)
+        while not sampler.exhausted:
+            batch = sampler.next_batch(100)
+    """
+
+    def __init__(self, comments: List[Dict], seed: int | None = None):
+        """
+        Shuffle each stratum of the population.
+
+        Args:
+            comments: Population of comments
+            seed: Random seed (for reproducible samples)
+        """
+        rng = random.Random(seed)
+        self._strata: Dict[int, List[Dict]] = {}
+        for comment in comments:
+            stratum = min(comment.get('depth') or 0, MAX_STRATUM)
+            self._strata.setdefault(stratum, []).append(comment)
+        for members in self._strata.values():
+            rng.shuffle(members)
+
+        self.population = len(comments)
+        self.sampled = 0
+        self._drawn = dict.fromkeys(self._strata, 0)
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether every comment has been drawn."""
+        return self.sampled >= self.population
+
+    def next_batch(self, size: int) -> List[Dict]:
+        """
+        Draw the next batch, keeping each stratum's share of the sample
+        equal to its share of the population (largest remainder).
+
+        Args:
+            size: Comments to draw
+
+        Returns:
+            Drawn comments (fewer when the population runs out)
+        """
+        target = min(self.sampled + size, self.population)
+        shares = {
+            stratum: target * len(members) / self.population
+            for stratum, members in self._strata.items()
+        }
+        quotas = {stratum: int(share) for stratum, share in shares.items()}
+        leftover = target - sum(quotas.values())
+        for stratum in sorted(shares, key=lambda s: shares[s] - quotas[s], reverse=True)[:leftover]:
+            quotas[stratum] += 1
+
+        batch = []
+        for stratum, members in self._strata.items():
+            start = self._drawn[stratum]
+            end = min(max(quotas[stratum], start), len(members))
+            batch.extend(members[start:end])
+            self._drawn[stratum] = end
+
+        self.sampled += len(batch)
+        return batch
+
+
+class SentimentEstimator:
+    """
+    Per-aspect sentiment proportions with Wilson confidence intervals.
+
+    Usage:
+        estimator = SentimentEstimator(population=12000)
+        estimator.add(insights, comments=1)
+        estimator.converged()
+        estimator.summary(sampled=400)
+    """
+
+    def __init__(
+        self,
+        population: int,
+        confidence: float | None = None,
+        margin: float | None = None,
+        top_aspects: int | None = None,
+        min_mentions: int | None = None
+    ):
+        """
+        Initialize estimator.
+
+        Args:
+            population: Comments in the sampling frame
+            confidence: Confidence level (default SAMPLING_CONFIDENCE)
+            margin: Target interval half-width (default SAMPLING_MARGIN)
+            top_aspects: Most mentioned aspects that must converge (default SAMPLING_TOP_ASPECTS)
+            min_mentions: Mentions before an aspect's interval is trusted (default SAMPLING_MIN_MENTIONS)
+        """
+        self.population = population
+        self.confidence = confidence or settings.SAMPLING_CONFIDENCE
+        self.margin = margin or settings.SAMPLING_MARGIN
+        self.top_aspects = top_aspects if top_aspects is not None else settings.SAMPLING_TOP_ASPECTS
+        self.min_mentions = min_mentions or settings.SAMPLING_MIN_MENTIONS
+        self.z = z_score(self.confidence)
+
+        # Comments observed (analyzed, with or without insights)
+        self.analyzed = 0
+
+        # aspect -> sentiment -> comments (fractional overall for mixed comments)
+        self._counts: Dict[str, Dict[str, float]] = {OVERALL: dict.fromkeys(SENTIMENTS, 0.0)}
+
+    def add(self, insights: List[Dict[str, str]], comments: int = 1):
+        """
+        Count analyzed comments with the same insights.
+
+        Args:
+            insights: Insights of the comment (at most one per aspect)
+            comments: Analyzed comments that share them (a cluster of duplicates)
+        """
+        self.analyzed += comments
+
+        for insight in insights:
+            counts = self._counts.setdefault(insight["aspect"], dict.fromkeys(SENTIMENTS, 0.0))
+            counts[insight["sentiment"]] += comments
+            self._counts[OVERALL][insight["sentiment"]] += comments / len(insights)
+
+    def _fpc(self) -> float:
+        """Finite population correction for the analyzed share of comments."""
+        if self.population <= 1:
+            return 1.0
+        return math.sqrt(max(self.population - self.analyzed, 0) / (self.population - 1))
+
+    def _tracked(self) -> List[str]:
+        """Aspects whose intervals decide convergence (overall + most mentioned)."""
+        ranked = sorted(
+            (aspect for aspect in self._counts if aspect not in (OVERALL, "general")),
+            key=lambda aspect: sum(self._counts[aspect].values()),
+            reverse=True
+        )
+        return [OVERALL] + ranked[:self.top_aspects]
+
+    def _half_width(self, aspect: str, fpc: float) -> float:
+        """Widest interval half-width across sentiments of an aspect."""
+        counts = self._counts[aspect]
+        n = sum(counts.values())
+        widest = 0.0
+        for sentiment in SENTIMENTS:
+            low, high = wilson_interval(counts[sentiment], n, self.z, fpc)
+            widest = max(widest, (high - low) / 2)
+        return widest
+
+    def converged(self) -> bool:
+        """
+        Whether the tracked aspects reached the target margin.
+
+        Returns:
+            True once every tracked aspect has enough mentions and a narrow enough interval
+        """
+        fpc = self._fpc()
+        for aspect in self._tracked():
+            if sum(self._counts[aspect].values()) < self.min_mentions and fpc > 0:
+                return False
+            if self._half_width(aspect, fpc) > self.margin:
+                return False
+        return True
+
+    def summary(self, sampled: int) -> Dict:
+        """
+        Estimates for the job result.
+
+        Args:
+            sampled: Comments drawn (including unchanged ones that weren't analyzed)
+
+        Returns:
+            Sampling parameters and, per tracked aspect, mentions, proportions and intervals
+        """
+        fpc = self._fpc()
+        aspects = {}
+
+        for aspect in self._tracked():
+            counts = self._counts[aspect]
+            n = sum(counts.values())
+            aspects[aspect] = {
+                "mentions": round(n, 2),
+                "margin": round(self._half_width(aspect, fpc), 4),
+                "sentiment": {
+                    sentiment: {
+                        "proportion": round(counts[sentiment] / n, 4) if n else None,
+                        "interval": [
+                            round(bound, 4)
+                            for bound in wilson_interval(counts[sentiment], n, self.z, fpc)
+                        ]
+                    }
+                    for sentiment in SENTIMENTS
+                }
+            }
+
+        return {
+            "population": self.population,
+            "sampled": sampled,
+            "analyzed": self.analyzed,
+            "confidence": self.confidence,
+            "target_margin": self.margin,
+            "converged": self.converged(),
+            "aspects": aspects
+        }
@@ -0,0 +1,287 @@
+"""
+Pluggable aspect sentiment classifiers.
+
+- openai: LLM classification through AnalysisService (per_aspect, multi_aspect
+  or packed requests, see SENTIMENT_MODE)
+- local: a sentence-pair ABSA model (text, aspect) -> label run on the worker's
+  CPU in batches, preferably an ONNX-quantized export (scripts/export_absa_onnx.py)
+
+The backend is chosen per deployment (SENTIMENT_BACKEND) or per job.
+"""
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from spacy.tokens import Doc
+
+from app.core.config import settings
+from app.services.model_registry import get_model
+
+if TYPE_CHECKING:
+    from app.services.analysis_service import AnalysisService
+
+SENTIMENT_BACKENDS = ("openai", "local")
+
+# (comment text, aspects, parsed doc)
+ClassificationItem = Tuple[str, List[str], Doc]
+
+# Spellings of our sentiments among local model labels (lowercased)
+_LABEL_ALIASES = {
+    "positive": ("positive", "pos"),
+    "negative": ("negative", "neg"),
+    "neutral": ("neutral", "neu")
+}
+
+
+class SentimentBackend(ABC):
+    """Classifies the sentiment of aspects within comments."""
+
+    name: str = ""
+    uses_llm: bool = False  # Whether classifications cost LLM calls
+
+    @property
+    @abstractmethod
+    def model(self) -> str:
+        """Identity of the model, used in cache keys."""
+
+    @abstractmethod
+    async def classify(
+        self,
+        items: List[ClassificationItem],
+        degraded: set
+    ) -> List[Dict[str, str]]:
+        """
+        Classify every aspect of every item.
+
+        Args:
+            items: (comment text, aspects, doc) triples
+            degraded: Receives (text, aspect) pairs answered by a fallback
+
+        Returns:
+            One aspect-to-sentiment mapping per item, in input order
+        """
+
+
+class OpenAISentimentBackend(SentimentBackend):
+    """Concurrent OpenAI classification (bounded by OPENAI_MAX_CONCURRENCY)."""
+
+    name = "openai"
+    uses_llm = True
+
+    def __init__(self, analysis_service: "AnalysisService"):
+        """
+        Initialize backend.
+
+        Args:
+            analysis_service: Service owning the OpenAI clients and prompts
+        """
+        self.analysis = analysis_service
+
+    @property
+    def model(self) -> str:
+        return settings.SENTIMENT_MODEL
+
+    async def classify(
+        self,
+        items: List[ClassificationItem],
+        degraded: set
+    ) -> List[Dict[str, str]]:
+        analysis = self.analysis
+
+        if settings.SENTIMENT_MODE == "packed":
+            pack_size = settings.SENTIMENT_PACK_SIZE
+            packs = [items[i:i + pack_size] for i in range(0, len(items), pack_size)]
+            packed = await asyncio.gather(*(
+                analysis.aclassify_packed(
+                    [(text, aspects) for text, aspects, _ in pack],
+                    docs=[doc for _, _, doc in pack],
+                    degraded=degraded
+                )
+                for pack in packs
+            ))
+            return [labels for pack_labels in packed for labels in pack_labels]
+
+        async def classify_one(text: str, aspects: List[str], doc: Doc) -> Dict[str, str]:
+            if settings.SENTIMENT_MODE == "per_aspect":
+                labels = await asyncio.gather(*(
+                    analysis.aclassify_sentiment(text, aspect, doc=doc, degraded=degraded)
+                    for aspect in aspects
+                ))
+                return dict(zip(aspects, labels, strict=True))
+            return await analysis.aclassify_aspects(text, aspects, doc=doc, degraded=degraded)
+
+        return list(await asyncio.gather(*(
+            classify_one(text, aspects, doc) for text, aspects, doc in items
+        )))
+
+
+class LocalSentimentBackend(SentimentBackend):
+    """
+    Batched sentence-pair ABSA model on the worker CPU.
+
+    SENTIMENT_LOCAL_MODEL is a Hugging Face id or a local directory; a
+    directory holding an ONNX export is run with onnxruntime, anything else
+    with PyTorch. Inference runs in a thread so the event loop stays free.
+    """
+
+    name = "local"
+
+    @property
+    def model(self) -> str:
+        return settings.SENTIMENT_LOCAL_MODEL
+
+    async def classify(
+        self,
+        items: List[ClassificationItem],
+        degraded: set
+    ) -> List[Dict[str, str]]:
+        pairs = [(text, aspect) for text, aspects, _ in items for aspect in aspects]
+        if not pairs:
+            return [{} for _ in items]
+
+        labels = iter(await asyncio.to_thread(self.predict, pairs))
+        return [{aspect: next(labels) for aspect in aspects} for _, aspects, _ in items]
+
+    def predict(self, pairs: List[Tuple[str, str]]) -> List[str]:
+        """
+        Classify (text, aspect) pairs in batches.
+
+        Args:
+            pairs: (comment text, aspect) pairs
+
+        Returns:
+            One of "positive", "negative", "neutral" per pair
+        """
+        classifier, labels = load_local_pipeline()
+        outputs = classifier(
+            [{"text": text, "text_pair": aspect} for text, aspect in pairs],
+            batch_size=settings.SENTIMENT_LOCAL_BATCH_SIZE,
+            truncation=True
+        )
+        return [labels[output["label"]] for output in outputs]
+
+
+def label_mapping(id2label: Dict[int, str]) -> Dict[str, str]:
+    """
+    Map a model's output labels (its config.id2label) to our sentiments.
+
+    Args:
+        id2label: Class index to label, e.g. {0: "NEG", 1: "NEU", 2: "POS"}
+
+    Returns:
+        Model label -> "positive", "negative" or "neutral"
+
+    Raises:
+        ValueError: If a label isn't a known spelling of a sentiment
+            (e.g. generic "LABEL_0" names)
+    """
+    mapping, unknown = {}, []
+    for label in id2label.values():
+        sentiment = next(
+            (name for name, aliases in _LABEL_ALIASES.items() if label.lower() in aliases),
+            None
+        )
+        if sentiment is None:
+            unknown.append(label)
+        else:
+            mapping[label] = sentiment
+
+    if unknown:
+        raise ValueError(
+            f"Unrecognised sentiment labels {unknown} in the local model's id2label; "
+            f"name them positive/negative/neutral in its config.json"
+        )
+    return mapping
+
+
+def load_local_pipeline():
+    """
+    Get the local ABSA model, loaded once per process (see model_registry).
+
+    Returns:
+        (transformers text-classification pipeline, model label -> sentiment)
+    """
+    model_name = settings.SENTIMENT_LOCAL_MODEL
+    return get_model(f"sentiment:{model_name}", lambda: _build_local_pipeline(model_name))
+
+
+def _build_local_pipeline(model_name: str):
+    """Load the local ABSA model, on onnxruntime when an ONNX export exists."""
+    try:
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+    except ImportError as e:
+        raise RuntimeError("transformers is required for the local sentiment backend") from e
+
+    threads = settings.SENTIMENT_LOCAL_THREADS
+    onnx_file = _find_onnx_file(model_name)
+
+    ORTModelForSequenceClassification = None
+    if onnx_file:
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError:
+            pass
+
+    if ORTModelForSequenceClassification is not None:
+        session_options = onnxruntime.SessionOptions()
+        if threads:
+            session_options.intra_op_num_threads = threads
+        model = ORTModelForSequenceClassification.from_pretrained(
+            model_name,
+            file_name=onnx_file,
+            session_options=session_options
+        )
+    else:
+        if onnx_file:
+            print("Warning: optimum[onnxruntime] not installed, running the local model on PyTorch")
+        import torch
+        if threads:
+            # Per process: built after fork in workers (see model_registry)
+            torch.set_num_threads(threads)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+
+    labels = label_mapping(model.config.id2label)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    classifier = pipeline(
+        "text-classification",
+        model=model,
+        tokenizer=tokenizer,
+        device=-1
+    )
+    return classifier, labels
+
+
+def _find_onnx_file(model_name: str) -> str | None:
+    """Pick the ONNX file of a local export, preferring the quantized one."""
+    if not os.path.isdir(model_name):
+        return None
+    for file_name in ("model_quantized.onnx", "model.onnx"):
+        if os.path.exists(os.path.join(model_name, file_name)):
+            return file_name
+    return None
+
+
+def get_sentiment_backend(
+    name: str | None,
+    analysis_service: "AnalysisService"
+) -> SentimentBackend:
+    """
+    Create a sentiment backend.
+
+    Args:
+        name: "openai" or "local" (defaults to SENTIMENT_BACKEND)
+        analysis_service: Service the OpenAI backend classifies through
+
+    Returns:
+        Sentiment backend
+    """
+    name = name or settings.SENTIMENT_BACKEND
+
+    if name == "openai":
+        return OpenAISentimentBackend(analysis_service)
+    if name == "local":
+        return LocalSentimentBackend()
+
+    raise ValueError(f"Unknown sentiment backend: {name}")
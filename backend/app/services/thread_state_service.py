@@ -0,0 +1,183 @@
+"""
+Per-thread comment state for incremental re-scrapes.
+Remembers which comments were analyzed (id, edit time, content hash) so a
+fresh scrape only sends new or edited comments through analysis.
+"""
+import hashlib
+from typing import Dict, List, Tuple
+from uuid import NAMESPACE_URL, uuid5
+
+from supabase import Client
+
+from app.utils.helpers import chunk_list, extract_submission_id, sanitize_reddit_url
+
+# PostgREST caps rows per response; page through larger threads
+PAGE_SIZE = 1000
+# Keep IN (...) filters well under URL length limits
+FILTER_CHUNK_SIZE = 100
+
+
+class ThreadStateService:
+    """
+    Tracks analyzed comments per thread in the thread_comments table.
+
+    Usage:
+        state = ThreadStateService(supabase)
+        known = state.load(thread_url)
+        fresh, unchanged = state.diff(known, comments)
+        ... analyze and store fresh ...
+        state.record(thread_url, fresh)
+    """
+
+    def __init__(self, supabase_client: Client):
+        """
+        Initialize service.
+
+        Args:
+            supabase_client: Supabase client (service role)
+        """
+        self.supabase = supabase_client
+
+    @staticmethod
+    def canonical_url(url: str) -> str:
+        """
+        Normalize a thread URL so resubmissions map to the same state.
+
+        Every form naming the same submission (slugged or not, www./old./bare
+        host, redd.it) maps to https://www.reddit.com/comments/<id>.
+
+        Args:
+            url: Reddit thread URL
+
+        Returns:
+            Canonical URL (normalized URL if no submission ID can be found)
+        """
+        try:
+            return f"https://www.reddit.com/comments/{extract_submission_id(url)}"
+        except ValueError:
+            pass
+
+        url = sanitize_reddit_url(url.strip()).rstrip('/')
+        if url.endswith('.json'):
+            url = url[:-len('.json')]
+        return url.replace('://old.reddit.com', '://www.reddit.com').lower()
+
+    @classmethod
+    def insight_id(cls, thread_url: str, comment_id: str, aspect: str, model_version: str) -> str:
+        """
+        Deterministic insight id, so re-storing an insight overwrites it.
+
+        Args:
+            thread_url: Reddit thread URL (canonicalized here)
+            comment_id: Comment the insight comes from
+            aspect: Insight aspect
+            model_version: Analysis model version (AnalysisService.model_version)
+
+        Returns:
+            UUID (v5) string
+        """
+        name = "\x1f".join((cls.canonical_url(thread_url), comment_id, aspect.lower(), model_version))
+        return str(uuid5(NAMESPACE_URL, name))
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """Hash comment text to detect edits Reddit didn't flag."""
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def load(self, thread_url: str) -> Dict[str, Dict]:
+        """
+        Load the state of every comment analyzed for a thread.
+
+        Args:
+            thread_url: Canonical thread URL
+
+        Returns:
+            Mapping of comment id to {"edited": ..., "content_hash": ...}
+        """
+        known = {}
+        offset = 0
+
+        while True:
+            result = self.supabase.table("thread_comments")\
+                .select("comment_id, edited, content_hash")\
+                .eq("thread_url", thread_url)\
+                .range(offset, offset + PAGE_SIZE - 1)\
+                .execute()
+
+            for row in result.data:
+                known[row["comment_id"]] = row
+
+            if len(result.data) < PAGE_SIZE:
+                return known
+            offset += PAGE_SIZE
+
+    def diff(
+        self,
+        known: Dict[str, Dict],
+        comments: List[Dict]
+    ) -> Tuple[List[Dict], int]:
+        """
+        Split a fresh scrape into comments needing analysis and unchanged ones.
+
+        Args:
+            known: State from load()
+            comments: Freshly scraped comments
+
+        Returns:
+            (new or edited comments, number of unchanged comments)
+        """
+        fresh = []
+        unchanged = 0
+
+        for comment in comments:
+            state = known.get(comment.get('id'))
+            if (
+                state is not None
+                and float(state.get("edited") or 0) == float(comment.get('edited') or 0)
+                and state.get("content_hash") == self.content_hash(comment['text'])
+            ):
+                unchanged += 1
+            else:
+                fresh.append(comment)
+
+        return fresh, unchanged
+
+    def purge_insights(self, comment_ids: List[str]):
+        """
+        Delete stored insights of comments that are about to be re-analyzed.
+
+        Reddit comment ids are globally unique, so no thread filter is needed.
+
+        Args:
+            comment_ids: Ids of edited comments
+        """
+        for chunk in chunk_list([cid for cid in comment_ids if cid], FILTER_CHUNK_SIZE):
+            self.supabase.table("insights")\
+                .delete()\
+                .in_("metadata->>comment_id", chunk)\
+                .execute()
+
+    def record(self, thread_url: str, comments: List[Dict]):
+        """
+        Remember analyzed comments (call after their insights are stored).
+
+        Args:
+            thread_url: Canonical thread URL
+            comments: Comments that were analyzed
+        """
+        rows = [
+            {
+                "thread_url": thread_url,
+                "comment_id": comment['id'],
+                "edited": float(comment.get('edited') or 0),
+                "content_hash": self.content_hash(comment['text']),
+                "analyzed_at": "now()"
+            }
+            for comment in comments
+            if comment.get('id')
+        ]
+
+        for chunk in chunk_list(rows, PAGE_SIZE):
+            self.supabase.table("thread_comments")\
+                .upsert(chunk, on_conflict="thread_url,comment_id")\
+                .execute()
@@ -0,0 +1,144 @@
+"""
+LlamaIndex retriever over the insights table.
+
+Queries public.insights directly through the pooled asyncpg connection, with
+the SQL from vector_schema, so retrieval follows the configured storage
+precision, dimension and binary-index rerank. Index search knobs (HNSW
+ef_search, IVF probes) are set per query.
+
+Synchronous retrieval (retrieve, chat, query) runs the same search on a
+private event loop in a background thread with its own pool, since the
+caller may itself be inside a running loop.
+"""
+import asyncio
+import json
+import threading
+from typing import List
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+
+from app.db.bulk_loader import create_pg_pool, get_pg_pool
+from app.db.vector_index import search_settings
+from app.db.vector_schema import search_query
+
+_COLUMNS = "id, source_url, aspect, sentiment, text, metadata"
+
+# Bookkeeping metadata kept on nodes but not shown to the LLM
+_HIDDEN_METADATA = ["comment_id", "comment_index", "submission_id", "duplicate_ids", "sampled"]
+
+# Event loop and pool for synchronous retrieval (one per process)
+_sync_loop: asyncio.AbstractEventLoop | None = None
+_sync_pool: asyncio.Future | None = None
+_sync_lock = threading.Lock()
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """Get or start the background event loop used by synchronous retrieval."""
+    global _sync_loop
+
+    with _sync_lock:
+        if _sync_loop is None or _sync_loop.is_closed():
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_sync_loop.run_forever, name="insight-retriever", daemon=True
+            ).start()
+    return _sync_loop
+
+
+async def _get_sync_pool():
+    """Get or create the pool of the synchronous retrieval loop (runs on that loop)."""
+    global _sync_pool
+
+    # Concurrent first searches await the same creation; a failed one is retried
+    if _sync_pool is None or (_sync_pool.done() and _sync_pool.exception() is not None):
+        _sync_pool = asyncio.ensure_future(create_pg_pool())
+    return await asyncio.shield(_sync_pool)
+
+
+class InsightRetriever(BaseRetriever):
+    """
+    Top-k insights by cosine similarity to the query.
+
+    Usage:
+        retriever = InsightRetriever(embed_model, similarity_top_k=5)
+        nodes = await retriever.aretrieve("what do people think of the battery?")
+        nodes = retriever.retrieve("what do people think of the battery?")
+    """
+
+    def __init__(
+        self,
+        embed_model: BaseEmbedding,
+        similarity_top_k: int = 5,
+        ef_search: int | None = None,
+        probes: int | None = None
+    ):
+        """
+        Initialize retriever.
+
+        Args:
+            embed_model: Query embedding model (same model and dimension as ingestion)
+            similarity_top_k: Insights to return
+            ef_search: HNSW candidate list size (default VECTOR_HNSW_EF_SEARCH)
+            probes: IVF lists to scan (default VECTOR_IVFFLAT_PROBES)
+        """
+        self._embed_model = embed_model
+        self.similarity_top_k = similarity_top_k
+        self.ef_search = ef_search
+        self.probes = probes
+        super().__init__()
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        """Embed the query and search the insights table (blocking)."""
+        embedding = query_bundle.embedding
+        if embedding is None:
+            embedding = self._embed_model.get_agg_embedding_from_queries(
+                query_bundle.embedding_strs
+            )
+
+        async def search() -> List[NodeWithScore]:
+            return await self._search(await _get_sync_pool(), embedding)
+
+        return asyncio.run_coroutine_threadsafe(search(), _get_sync_loop()).result()
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        """Embed the query and search the insights table."""
+        embedding = query_bundle.embedding
+        if embedding is None:
+            embedding = await self._embed_model.aget_agg_embedding_from_queries(
+                query_bundle.embedding_strs
+            )
+
+        return await self._search(await get_pg_pool(), embedding)
+
+    async def _search(self, pool, embedding: List[float]) -> List[NodeWithScore]:
+        """Top-k rows nearest to an embedding, over a connection from pool."""
+        async with pool.acquire() as conn:
+            # SET LOCAL scopes the knobs to this query's transaction
+            async with conn.transaction():
+                for statement in search_settings(self.similarity_top_k, self.ef_search, self.probes):
+                    await conn.execute(statement)
+                rows = await conn.fetch(search_query(_COLUMNS), embedding, self.similarity_top_k)
+
+        return [
+            NodeWithScore(node=self._to_node(row), score=row["score"])
+            for row in rows
+        ]
+
+    @staticmethod
+    def _to_node(row) -> TextNode:
+        """Build a node from an insights row."""
+        metadata = json.loads(row["metadata"]) if row["metadata"] else {}
+        metadata.update({
+            "aspect": row["aspect"],
+            "sentiment": row["sentiment"],
+            "source_url": row["source_url"]
+        })
+        return TextNode(
+            id_=str(row["id"]),
+            text=row["text"],
+            metadata=metadata,
+            excluded_llm_metadata_keys=_HIDDEN_METADATA,
+            excluded_embed_metadata_keys=_HIDDEN_METADATA
+        )
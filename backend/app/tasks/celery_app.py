@@ -3,7 +3,10 @@ Celery application configuration.
 Runs as separate worker process: celery -A app.tasks.celery_app worker --loglevel=info
 """
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
 from app.core.config import settings
+from app.services.model_registry import preload_models, preload_process_models
+from app.tasks.http_client import shutdown_worker_loop
 
 # Initialize Celery app
 celery_app = Celery(
@@ -13,6 +16,7 @@ celery_app = Celery(
     include=[
         "app.tasks.reddit_scraper",
         "app.tasks.reddit_scraper_public",
+        "app.tasks.index_maintenance",
         "app.tasks.web_search"
     ]
 )
@@ -36,3 +40,12 @@ celery_app.conf.task_routes = {
     "app.tasks.reddit_scraper.*": {"queue": "scraping"},
     "app.tasks.web_search.*": {"queue": "search"},
 }
+
+# Load NLP models once in the parent so prefork children share them
+worker_init.connect(preload_models, weak=False)
+
+# Load the local sentiment model in each child (its thread pools don't survive fork)
+worker_process_init.connect(preload_process_models, weak=False)
+
+# Close pooled HTTP connections when a worker child exits
+worker_process_shutdown.connect(shutdown_worker_loop, weak=False)
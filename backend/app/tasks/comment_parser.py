@@ -0,0 +1,202 @@
+"""
+Iterative parsing of Reddit comment trees.
+
+Two sources produce the same stream of "things" ({"kind": ..., "data": ...}):
+- ThingStreamParser: incremental parser over raw JSON bytes (ijson). Things are
+  detached from the tree as soon as their object closes. Reddit serialises
+  "replies" before "body", so a thing closes after its replies: closed replies
+  are held until their top-level comment closes, then the subtree is emitted
+  parent first. Memory stays bounded by the largest top-level subtree, not
+  thread size.
+- iter_things: explicit-stack walk over an already decoded listing, used for
+  morechildren responses and when ijson is not installed.
+
+Both emit things in pre-order (every comment before its replies), so a
+"first N" selection keeps top-level comments over deep replies.
+
+Neither recurses, so deep reply chains can't hit the recursion limit.
+"""
+from typing import Dict, Iterator, List
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Thing kinds the scraper consumes
+EMIT_KINDS = {'t1', 't3', 'more'}
+
+
+def build_comment(data: Dict) -> Dict | None:
+    """
+    Build a comment record from t1 data.
+
+    Args:
+        data: "data" object of a t1 thing
+
+    Returns:
+        Comment dict, or None for deleted/removed/empty comments
+    """
+    body = data.get('body', '')
+
+    # Skip deleted/removed comments
+    if body in ['[deleted]', '[removed]', '']:
+        return None
+
+    return {
+        'text': body,
+        'author': data.get('author', '[deleted]'),
+        'score': data.get('score', 0),
+        'created_utc': data.get('created_utc', 0),
+        'id': data.get('id', ''),
+        'depth': data.get('depth', 0),
+        'edited': data.get('edited') or 0  # false, or edit timestamp
+    }
+
+
+def more_children_ids(data: Dict) -> List[str]:
+    """
+    Get comment ids hidden behind a "more" stub.
+
+    Args:
+        data: "data" object of a more thing
+
+    Returns:
+        Comment ids ("continue this thread" stubs have none)
+    """
+    return [child for child in data.get('children', []) if child != '_']
+
+
+def iter_things(items: list) -> Iterator[Dict]:
+    """
+    Walk a decoded listing depth-first without recursion.
+
+    Args:
+        items: Children of a Reddit listing
+
+    Yields:
+        Things in document (pre-)order, replies after their parent
+    """
+    stack = [iter(items)]
+
+    while stack:
+        thing = next(stack[-1], None)
+        if thing is None:
+            stack.pop()
+            continue
+
+        yield thing
+
+        if thing.get('kind') == 't1':
+            replies = thing['data'].get('replies', '')
+            if isinstance(replies, dict):
+                stack.append(iter(replies['data']['children']))
+
+
+class ThingStreamParser:
+    """
+    Incremental parser turning raw Reddit JSON bytes into things.
+
+    Usage:
+        parser = ThingStreamParser()
+        for chunk in chunks:
+            for thing in parser.feed(chunk):
+                ...
+        for thing in parser.close():
+            ...
+    """
+
+    def __init__(self):
+        """Initialize the ijson push parser."""
+        if ijson is None:
+            raise RuntimeError("ijson is required for streaming parsing")
+
+        self._events = ijson.sendable_list()
+        self._coro = ijson.basic_parse_coro(self._events, use_float=True)
+        self._stack: list = []  # Open containers
+        self._keys: list = []  # Current key of each open map (None for arrays)
+        # Closed replies awaiting their parent: (nesting, subtree in pre-order)
+        self._pending: list = []
+
+    def feed(self, chunk: bytes) -> List[Dict]:
+        """
+        Parse the next chunk of the document.
+
+        Args:
+            chunk: Raw bytes
+
+        Returns:
+            Things completed by this chunk
+        """
+        self._coro.send(chunk)
+        return self._drain()
+
+    def close(self) -> List[Dict]:
+        """
+        Finish parsing.
+
+        Returns:
+            Things completed by the end of the document
+        """
+        self._coro.close()
+        return self._drain()
+
+    def _drain(self) -> List[Dict]:
+        """Apply buffered parse events, collecting completed things."""
+        things = []
+
+        for event, value in self._events:
+            if event == 'map_key':
+                self._keys[-1] = value
+            elif event == 'start_map':
+                self._stack.append({})
+                self._keys.append(None)
+            elif event == 'start_array':
+                self._stack.append([])
+                self._keys.append(None)
+            elif event in ('end_map', 'end_array'):
+                container = self._stack.pop()
+                self._keys.pop()
+                if (
+                    event == 'end_map'
+                    and container.get('kind') in EMIT_KINDS
+                    and 'data' in container
+                ):
+                    # Hand the thing over instead of keeping it in the tree
+                    self._close_thing(container, things)
+                else:
+                    self._attach(container)
+            else:
+                self._attach(value)
+
+        del self._events[:]
+        return things
+
+    def _close_thing(self, thing: Dict, things: List[Dict]):
+        """Emit a closed thing with its held replies, or hold it if it's a reply itself."""
+        nesting = len(self._stack)
+
+        # Held subtrees nested deeper than this thing are its replies (in order)
+        start = len(self._pending)
+        while start and self._pending[start - 1][0] > nesting:
+            start -= 1
+        subtree = [thing]
+        for _, replies in self._pending[start:]:
+            subtree.extend(replies)
+        del self._pending[start:]
+
+        if 'replies' in self._keys:
+            self._pending.append((nesting, subtree))
+        else:
+            things.extend(subtree)
+
+    def _attach(self, value):
+        """Add a finished value to the enclosing container."""
+        if not self._stack:
+            return  # Top-level document, nothing to keep
+
+        parent = self._stack[-1]
+        if isinstance(parent, list):
+            parent.append(value)
+        else:
+            parent[self._keys[-1]] = value
@@ -0,0 +1,172 @@
+"""
+Comment selection strategies for capping how many comments get analyzed.
+
+Comments are streamed through a selector instead of being collected and
+truncated, so memory is O(limit) whatever the thread size:
+- first: first N in parse order (lets the scraper stop reading early)
+- top: N highest-scored comments (bounded min-heap, O(n log N))
+- stratified: weighted random sample per depth stratum, favouring higher
+  scores, allocated proportionally to each stratum's share of the thread
+"""
+import heapq
+import random
+from typing import Dict, List
+
+SELECTION_MODES = ("first", "top", "stratified")
+
+# Depth strata: top-level, direct replies, second-level, everything deeper
+MAX_STRATUM = 3
+
+
+class CommentSelector:
+    """Keeps the first `limit` comments in the order they arrive."""
+
+    # Accepted comments are final on arrival, so they can be streamed with take()
+    incremental = True
+
+    def __init__(self, limit: int):
+        """
+        Initialize selector.
+
+        Args:
+            limit: Number of comments to keep
+        """
+        self.limit = limit
+        self.seen = 0
+        self._comments: List[Dict] = []
+        self._taken = 0
+
+    @property
+    def full(self) -> bool:
+        """Whether further comments can no longer change the selection."""
+        return len(self._comments) >= self.limit
+
+    def add(self, comment: Dict):
+        """Offer a comment to the selection."""
+        self.seen += 1
+        if len(self._comments) < self.limit:
+            self._comments.append(comment)
+
+    def results(self) -> List[Dict]:
+        """Get the selected comments."""
+        return list(self._comments)
+
+    @property
+    def pending(self) -> int:
+        """Number of accepted comments not handed out by take() yet."""
+        return len(self._comments) - self._taken
+
+    def take(self) -> List[Dict]:
+        """Get the comments accepted since the last take()."""
+        taken = self._comments[self._taken:]
+        self._taken = len(self._comments)
+        return taken
+
+
+class TopScoreSelector(CommentSelector):
+    """Keeps the `limit` highest-scored comments."""
+
+    incremental = False
+
+    def __init__(self, limit: int):
+        super().__init__(limit)
+        self._heap: list = []  # (score, arrival, comment), lowest score on top
+
+    @property
+    def full(self) -> bool:
+        return False
+
+    def add(self, comment: Dict):
+        self.seen += 1
+        entry = (comment.get('score') or 0, -self.seen, comment)
+
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def results(self) -> List[Dict]:
+        return [comment for _, _, comment in sorted(self._heap, reverse=True)]
+
+
+class StratifiedSelector(CommentSelector):
+    """
+    Weighted reservoir sample (A-Res) per depth stratum.
+
+    Each comment gets key u ** (1 / w) with w = max(score, 0) + 1, and each
+    stratum keeps its `limit` largest keys. At the end the limit is split across
+    strata in proportion to how many comments each one saw.
+    """
+
+    incremental = False
+
+    def __init__(self, limit: int, seed: int | None = None):
+        super().__init__(limit)
+        self._random = random.Random(seed)
+        self._strata: Dict[int, list] = {}  # stratum -> min-heap of (key, arrival, comment)
+        self._counts: Dict[int, int] = {}
+
+    @property
+    def full(self) -> bool:
+        return False
+
+    def add(self, comment: Dict):
+        self.seen += 1
+        stratum = min(comment.get('depth') or 0, MAX_STRATUM)
+        weight = max(comment.get('score') or 0, 0) + 1
+        entry = (self._random.random() ** (1.0 / weight), -self.seen, comment)
+
+        self._counts[stratum] = self._counts.get(stratum, 0) + 1
+        heap = self._strata.setdefault(stratum, [])
+
+        if len(heap) < self.limit:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    def results(self) -> List[Dict]:
+        if self.seen <= self.limit:
+            quotas = {stratum: len(heap) for stratum, heap in self._strata.items()}
+        else:
+            quotas = self._allocate()
+
+        selected = []
+        for stratum in sorted(self._strata):
+            ranked = sorted(self._strata[stratum], reverse=True)
+            selected.extend(comment for _, _, comment in ranked[:quotas[stratum]])
+        return selected
+
+    def _allocate(self) -> Dict[int, int]:
+        """Split the limit across strata proportionally (largest remainder)."""
+        shares = {
+            stratum: self.limit * count / self.seen
+            for stratum, count in self._counts.items()
+        }
+        quotas = {stratum: int(share) for stratum, share in shares.items()}
+
+        leftover = self.limit - sum(quotas.values())
+        by_remainder = sorted(shares, key=lambda s: shares[s] - quotas[s], reverse=True)
+        for stratum in by_remainder[:leftover]:
+            quotas[stratum] += 1
+
+        return quotas
+
+
+def make_selector(mode: str, limit: int) -> CommentSelector:
+    """
+    Create a selector for a selection mode.
+
+    Args:
+        mode: One of SELECTION_MODES
+        limit: Number of comments to keep
+
+    Returns:
+        Comment selector
+    """
+    if mode == "top":
+        return TopScoreSelector(limit)
+    if mode == "stratified":
+        return StratifiedSelector(limit)
+    if mode == "first":
+        return CommentSelector(limit)
+    raise ValueError(f"Unknown comment selection mode: {mode}")
@@ -0,0 +1,119 @@
+"""
+Process-wide HTTP client for Reddit fetches.
+
+Each worker process keeps one pooled httpx client (HTTP/2 when available) and
+one long-lived event loop, so connections and TLS sessions survive across
+requests and tasks instead of being re-established on every fetch.
+"""
+import asyncio
+from typing import Any, Coroutine
+
+import httpx
+
+from app.core.config import settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Global instances (one per worker process)
+_worker_loop: asyncio.AbstractEventLoop | None = None
+_http_client: httpx.AsyncClient | None = None
+_http_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get or create the event loop owned by this worker process.
+
+    Returns:
+        Long-lived event loop for running async code from sync tasks
+    """
+    global _worker_loop
+
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+
+    return _worker_loop
+
+
+def run_async(coro: Coroutine) -> Any:
+    """
+    Run a coroutine to completion on the worker's event loop.
+
+    Use instead of asyncio.run() in Celery tasks: asyncio.run() creates and
+    closes a new loop per call, which invalidates pooled connections.
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        Coroutine result
+    """
+    return get_worker_loop().run_until_complete(coro)
+
+
+async def get_http_client() -> httpx.AsyncClient:
+    """
+    Get or create the pooled HTTP client for the running event loop.
+
+    Returns:
+        Shared httpx client with keep-alive and connection limits
+    """
+    global _http_client, _http_client_loop
+
+    loop = asyncio.get_running_loop()
+
+    # Connections are bound to the loop that opened them
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client = httpx.AsyncClient(
+            http2=settings.REDDIT_HTTP2 and HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=settings.REDDIT_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.REDDIT_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.REDDIT_HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            follow_redirects=True
+        )
+        _http_client_loop = loop
+
+    return _http_client
+
+
+async def close_http_client():
+    """Close the pooled HTTP client (for cleanup on shutdown)."""
+    global _http_client, _http_client_loop
+
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+
+    _http_client = None
+    _http_client_loop = None
+
+
+def shutdown_worker_loop(**kwargs):
+    """
+    Close the HTTP/Redis/Postgres clients and event loop of this worker process.
+
+    Connected to Celery's worker_process_shutdown signal.
+    """
+    global _worker_loop
+
+    if _worker_loop is None or _worker_loop.is_closed():
+        return
+
+    from app.db.bulk_loader import close_pg_pool
+    from app.db.redis_client import close_redis_client
+
+    if _http_client is not None and _http_client_loop is _worker_loop:
+        _worker_loop.run_until_complete(close_http_client())
+
+    _worker_loop.run_until_complete(close_redis_client())
+    _worker_loop.run_until_complete(close_pg_pool())
+
+    _worker_loop.run_until_complete(_worker_loop.shutdown_asyncgens())
+    _worker_loop.close()
+    _worker_loop = None
@@ -0,0 +1,27 @@
+"""
+Vector index upkeep after bulk ingestion.
+Queued by the scrape tasks once they've stored insights; rebuilds the
+embedding index concurrently only when it's missing or outgrown (see
+vector_index), so most runs are a cheap check.
+"""
+from typing import Dict
+
+from app.db.vector_index import rebuild_index
+from app.tasks.celery_app import celery_app
+from app.tasks.http_client import run_async
+
+
+@celery_app.task(name="maintain_vector_index", time_limit=6 * 3600, soft_time_limit=6 * 3600 - 300)
+def maintain_vector_index(force: bool = False) -> Dict:
+    """
+    Rebuild the insights embedding index if needed.
+
+    Args:
+        force: Rebuild even if the index is up to date
+
+    Returns:
+        Rebuild result (rebuilt, reason, and build details when rebuilt)
+    """
+    result = run_async(rebuild_index(force=force))
+    print(f"Vector index: {result}")
+    return result
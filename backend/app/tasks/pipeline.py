@@ -0,0 +1,338 @@
+"""
+Streaming scrape -> analyze -> embed -> store pipeline for one thread.
+
+Stages run concurrently on the worker's event loop and hand batches to each
+other through bounded queues, so analysis starts on the first page of
+comments, embedding on the first analyzed batch and inserts as soon as
+embeddings land. A full queue blocks the stage feeding it, which keeps
+memory bounded by the queue sizes rather than the thread size.
+
+    scraper --comments--> analyze --insights--> embed --records--> store
+
+In sample mode the thread is scraped first and the comment stage draws a
+stratified random sample batch by batch instead, until the sentiment
+estimates reach the target confidence interval (see sampling).
+"""
+import asyncio
+from typing import Callable, Dict, List, Set
+
+from supabase import Client
+
+from app.core.config import settings
+from app.db.bulk_loader import InsightWriter
+from app.services.analysis_service import AnalysisService
+from app.services.dedup_service import CommentDeduplicator
+from app.services.embedding_service import EmbeddingService
+from app.services.sampling import SentimentEstimator, StratifiedSampler
+from app.services.thread_state_service import ThreadStateService
+
+# End of stream marker passed down the queues
+_DONE = None
+
+
+class InsightPipeline:
+    """
+    Runs one thread through the overlapped pipeline.
+
+    Usage:
+        pipeline = InsightPipeline(reddit_url, supabase, analysis_service,
+                                   thread_state, known, EmbeddingService())
+        stats = await pipeline.run(scraper, max_comments, selection)
+    """
+
+    def __init__(
+        self,
+        reddit_url: str,
+        supabase: Client,
+        analysis_service: AnalysisService,
+        thread_state: ThreadStateService,
+        known: Dict[str, Dict],
+        embedder: EmbeddingService,
+        on_progress: Callable[[Dict], None] | None = None
+    ):
+        """
+        Initialize pipeline.
+
+        Args:
+            reddit_url: Thread URL (insight source_url)
+            supabase: Supabase client (service role)
+            analysis_service: ABSA service
+            thread_state: Per-thread comment state
+            known: Previously analyzed comments of the thread (thread_state.load)
+            embedder: Batched embedding service
+            on_progress: Called (in a thread) with the counters after each stored batch
+        """
+        self.reddit_url = reddit_url
+        self.supabase = supabase
+        self.analysis = analysis_service
+        self.thread_state = thread_state
+        self.known = known
+        self.embedder = embedder
+        self.writer = InsightWriter(supabase)
+        self.on_progress = on_progress
+
+        self.batch_size = settings.PIPELINE_BATCH_SIZE
+        self.queue_size = settings.PIPELINE_QUEUE_SIZE
+
+        self.post: Dict = {}
+        self.fresh: List[Dict] = []  # New or edited comments (recorded at the end)
+        self._dedup = CommentDeduplicator() if settings.DEDUP_ENABLED else None
+        self._to_purge: Set[str] = set()  # Edited comments with old insights
+        self._stored: List[Dict] = []  # Clusters whose insights are stored
+
+        # Sample mode: estimates, and batches analyzed so far (to pace sampling)
+        self.estimator: SentimentEstimator | None = None
+        self._batches_analyzed = 0
+        self._analyzed_changed = asyncio.Condition()
+
+        self.stats = {
+            "comments_scraped": 0,
+            "comments_unchanged": 0,
+            "clusters_analyzed": 0,
+            "comments_processed": 0,
+            "insights_count": 0
+        }
+
+    async def run(
+        self,
+        scraper,
+        max_comments: int,
+        selection: str,
+        sample: bool = False
+    ) -> Dict:
+        """
+        Scrape, analyze, embed and store a thread.
+
+        Args:
+            scraper: PublicJSONScraper
+            max_comments: Maximum comments to analyze (sampling frame in sample mode)
+            selection: Comment selection mode
+            sample: Analyze an adaptive stratified sample instead of every comment
+
+        Returns:
+            Counters (comments, duplicates, LLM calls saved, insights, and
+            the "sampling" estimates in sample mode)
+        """
+        comments = asyncio.Queue(maxsize=self.queue_size)
+        analyzed = asyncio.Queue(maxsize=self.queue_size)
+        embedded = asyncio.Queue(maxsize=self.queue_size)
+
+        source = (
+            self._sample(scraper, max_comments, selection, comments) if sample
+            else self._scrape(scraper, max_comments, selection, comments)
+        )
+
+        tasks = [
+            asyncio.create_task(source),
+            asyncio.create_task(self._analyze(comments, analyzed)),
+            asyncio.create_task(self._embed(analyzed, embedded)),
+            asyncio.create_task(self._store(embedded))
+        ]
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # One stage failed: stop the others instead of leaving them blocked on a queue
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        await asyncio.to_thread(self._finish)
+
+        clusters = len(self._stored)
+        self.stats["comments_analyzed"] = len(self.fresh)
+        self.stats["duplicates_collapsed"] = len(self.fresh) - clusters
+        self.stats["llm_calls_saved"] = sum(
+            (cluster["weight"] - 1) * cluster["llm_calls"] for cluster in self._stored
+        )
+        if self.estimator is not None:
+            self.stats["sampling"] = self.estimator.summary(self.stats["comments_sampled"])
+        return self.stats
+
+    async def _feed(self, post: Dict, batch: List[Dict], out: asyncio.Queue) -> bool:
+        """
+        Queue the new representatives of the fresh comments in a batch.
+
+        Returns:
+            Whether anything was queued for analysis
+        """
+        self.post = post
+
+        # Only new or edited comments need analysis on a re-scrape
+        fresh, unchanged = self.thread_state.diff(self.known, batch)
+        self.stats["comments_unchanged"] += unchanged
+        self.fresh.extend(fresh)
+        self._to_purge.update(c['id'] for c in fresh if c['id'] in self.known)
+
+        # Duplicates (also of earlier batches) join a cluster and aren't analyzed again
+        clusters = []
+        for comment in fresh:
+            if self._dedup is None:
+                clusters.append({"comment": comment, "weight": 1, "duplicate_ids": []})
+                continue
+            cluster = self._dedup.add(comment)
+            if cluster["comment"] is comment:
+                clusters.append(cluster)
+                continue
+
+            # A duplicate is done here: its representative's insights stand for it
+            self.stats["comments_processed"] += 1
+            if self.estimator is not None and "sampled_insights" in cluster:
+                # Joined a cluster that was already analyzed and counted
+                self.estimator.add(cluster["sampled_insights"])
+
+        if clusters:
+            await out.put(clusters)
+        return bool(clusters)
+
+    async def _scrape(self, scraper, max_comments: int, selection: str, out: asyncio.Queue):
+        """Stream comment batches as the thread downloads."""
+
+        async def on_comments(post: Dict, batch: List[Dict]):
+            self.stats["comments_scraped"] += len(batch)
+            await self._feed(post, batch, out)
+
+        await scraper.scrape_thread(
+            self.reddit_url,
+            max_comments,
+            selection=selection,
+            on_comments=on_comments,
+            batch_size=self.batch_size
+        )
+        await out.put(_DONE)
+
+    async def _sample(self, scraper, max_comments: int, selection: str, out: asyncio.Queue):
+        """Draw sample batches until the estimates converge or the thread runs out."""
+        data = await scraper.scrape_thread(self.reddit_url, max_comments, selection=selection)
+        post = {key: value for key, value in data.items() if key != 'comments'}
+
+        sampler = StratifiedSampler(data['comments'])
+        self.estimator = SentimentEstimator(sampler.population)
+        self.stats["comments_scraped"] = sampler.population
+        self.stats["comments_sampled"] = 0
+        queued = 0
+
+        while not sampler.exhausted:
+            if (
+                sampler.sampled >= settings.SAMPLING_MIN_SIZE
+                and self.estimator.converged()
+            ):
+                break
+
+            batch = sampler.next_batch(self.batch_size)
+            self.stats["comments_sampled"] = sampler.sampled
+            if await self._feed(post, batch, out):
+                queued += 1
+
+            # Stay at most one batch ahead of analysis so we don't overshoot the sample
+            async with self._analyzed_changed:
+                await self._analyzed_changed.wait_for(
+                    lambda queued=queued: self._batches_analyzed >= queued - 1
+                )
+
+        await out.put(_DONE)
+
+    async def _analyze(self, inp: asyncio.Queue, out: asyncio.Queue):
+        """Run ABSA on cluster representatives."""
+        while (clusters := await inp.get()) is not _DONE:
+            llm_calls: List[int] = []
+            results = await self.analysis.abatch_analyze(
+                [cluster["comment"]['text'] for cluster in clusters],
+                llm_calls=llm_calls
+            )
+
+            for cluster, insights, calls in zip(clusters, results, llm_calls, strict=True):
+                cluster["insights"] = insights
+                cluster["llm_calls"] = calls  # Cache hits cost none, so duplicates save none
+                if self.estimator is not None:
+                    # Every comment of the cluster so far; later duplicates are added in _feed
+                    self.estimator.add(insights, cluster["weight"])
+                    cluster["sampled_insights"] = insights
+
+            self.stats["clusters_analyzed"] += len(clusters)
+            async with self._analyzed_changed:
+                self._batches_analyzed += 1
+                self._analyzed_changed.notify_all()
+
+            await out.put(clusters)
+
+        await out.put(_DONE)
+
+    async def _embed(self, inp: asyncio.Queue, out: asyncio.Queue):
+        """Embed the insights of each analyzed batch."""
+        while (clusters := await inp.get()) is not _DONE:
+            texts = [
+                f"{insight['aspect']}: {insight['text']}"
+                for cluster in clusters
+                for insight in cluster["insights"]
+            ]
+            embeddings = await self.embedder.aembed(texts)
+            await out.put((clusters, embeddings))
+
+        await out.put(_DONE)
+
+    async def _store(self, inp: asyncio.Queue):
+        """Insert embedded insights, replacing those of edited comments."""
+        while (item := await inp.get()) is not _DONE:
+            clusters, embeddings = item
+            vectors = iter(embeddings)
+
+            records = []
+            for cluster in clusters:
+                # Snapshot the weight; duplicates arriving later are patched in _finish
+                cluster["stored_weight"] = cluster["weight"]
+                metadata = self._metadata(cluster)
+                for insight in cluster.pop("insights"):
+                    records.append({
+                        "id": self.thread_state.insight_id(
+                            self.reddit_url,
+                            cluster["comment"]['id'],
+                            insight["aspect"],
+                            self.analysis.model_version
+                        ),
+                        "source_url": self.reddit_url,
+                        "aspect": insight["aspect"],
+                        "sentiment": insight["sentiment"],
+                        "text": insight["text"],
+                        "embedding": next(vectors),
+                        "metadata": metadata
+                    })
+
+            edited = [c["comment"]['id'] for c in clusters if c["comment"]['id'] in self._to_purge]
+            self._to_purge.difference_update(edited)
+
+            await asyncio.to_thread(self.thread_state.purge_insights, edited)
+            self.stats["insights_count"] += await self.writer.write(records)
+
+            self._stored.extend(clusters)
+            # Representatives; their duplicates are counted as they're collapsed in _feed
+            self.stats["comments_processed"] += len(clusters)
+            if self.on_progress is not None:
+                await asyncio.to_thread(self.on_progress, dict(self.stats))
+
+    def _metadata(self, cluster: Dict) -> Dict:
+        """Insight metadata for a cluster representative."""
+        return {
+            "submission_title": self.post.get('title', ''),
+            "subreddit": self.post.get('subreddit', ''),
+            "comment_id": cluster["comment"]['id'],
+            "weight": cluster["weight"],  # Comments this insight stands for
+            "duplicate_ids": list(cluster["duplicate_ids"]),
+            "sampled": self.estimator is not None  # Part of a sample, not the whole thread
+        }
+
+    def _finish(self):
+        """Patch clusters that grew after storing, purge leftovers, record state (blocking)."""
+        for cluster in self._stored:
+            if cluster["weight"] != cluster["stored_weight"]:
+                self.supabase.table("insights")\
+                    .update({"metadata": self._metadata(cluster)})\
+                    .eq("metadata->>comment_id", cluster["comment"]['id'])\
+                    .execute()
+
+        # Edited comments that are now duplicates lost their own insights
+        self.thread_state.purge_insights(list(self._to_purge))
+
+        # Remember what was analyzed so the next re-scrape only sees the delta
+        self.thread_state.record(self.thread_state.canonical_url(self.reddit_url), self.fresh)
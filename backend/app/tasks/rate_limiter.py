@@ -0,0 +1,217 @@
+"""
+Cluster-wide Reddit rate limiter shared by all Celery workers.
+
+A token bucket lives in Redis and is updated atomically by Lua scripts, using
+Redis server time so worker clocks don't matter. Reddit's rate-limit headers
+adjust the refill rate, and 429 responses block the bucket for everyone.
+
+Waits short enough to sleep through reserve their token up front. Longer ones
+re-queue the task without a reservation, so retry_countdown adds random jitter:
+tasks throttled together come back spread out instead of all at once.
+"""
+import asyncio
+import random
+
+import httpx
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.db.redis_client import get_redis_client
+
+# Take a token if one is available within max_wait seconds.
+# Returns the wait in seconds; a wait above max_wait means no token was taken.
+ACQUIRE_SCRIPT = """
+local key = KEYS[1]
+local default_rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HMGET', key, 'tokens', 'ts', 'rate', 'blocked_until')
+local rate = tonumber(state[3]) or default_rate
+local blocked_until = tonumber(state[4]) or 0
+
+if blocked_until > now then
+    return tostring(blocked_until - now)
+end
+
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local wait = 0
+if tokens < 1 then
+    wait = (1 - tokens) / rate
+end
+
+if wait <= max_wait then
+    tokens = tokens - 1
+end
+
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', key, 3600)
+return tostring(wait)
+"""
+
+# Apply what Reddit told us: a new refill rate and/or a block until some time.
+ADAPT_SCRIPT = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local rate_ttl = tonumber(ARGV[2])
+local block_for = tonumber(ARGV[3])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+if rate then
+    redis.call('HSET', key, 'rate', rate)
+    redis.call('EXPIRE', key, math.max(60, math.ceil(rate_ttl or 600)))
+end
+
+if block_for and block_for > 0 then
+    local blocked_until = tonumber(redis.call('HGET', key, 'blocked_until')) or 0
+    redis.call('HSET', key, 'blocked_until', math.max(blocked_until, now + block_for))
+    redis.call('EXPIRE', key, math.max(3600, math.ceil(block_for)))
+end
+return 1
+"""
+
+
+class RateLimited(Exception):
+    """Raised when a request can't be sent without waiting longer than allowed."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Reddit rate limit reached, retry in {retry_after:.0f}s")
+
+
+class RedisTokenBucket:
+    """
+    Token bucket stored in Redis and shared by every worker process.
+
+    Short waits are slept inside the task; longer ones raise RateLimited so the
+    task can be re-queued with a countdown instead of holding a worker slot.
+    """
+
+    def __init__(
+        self,
+        key: str = "ratelimit:reddit",
+        rate_per_minute: float | None = None,
+        burst: int | None = None,
+        max_wait: float | None = None
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            key: Redis key holding the bucket state
+            rate_per_minute: Default refill rate (until headers say otherwise)
+            burst: Bucket capacity
+            max_wait: Longest wait (seconds) to sleep through before raising
+        """
+        self.key = key
+        self.rate = (rate_per_minute or settings.REDDIT_RATE_LIMIT_PER_MINUTE) / 60.0
+        self.capacity = burst or settings.REDDIT_RATE_LIMIT_BURST
+        self.max_wait = max_wait if max_wait is not None else settings.REDDIT_RATE_LIMIT_MAX_WAIT
+
+    async def acquire(self) -> bool:
+        """
+        Wait for a token.
+
+        Returns:
+            True once a token was taken, False if Redis was unavailable
+            (the request goes ahead unpaced)
+
+        Raises:
+            RateLimited: If the next token is further away than max_wait
+        """
+        try:
+            redis = await get_redis_client()
+            wait = float(await redis.eval(
+                ACQUIRE_SCRIPT, 1, self.key, self.rate, self.capacity, self.max_wait
+            ))
+        except RedisError as e:
+            # Fail open: a Redis outage shouldn't stop scraping
+            print(f"Rate limiter unavailable, continuing without it: {e}")
+            return False
+
+        if wait > self.max_wait:
+            raise RateLimited(wait)
+
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    async def observe(self, response: httpx.Response):
+        """
+        Adapt the shared bucket from Reddit's response headers.
+
+        Args:
+            response: Response from Reddit
+
+        Raises:
+            RateLimited: If Reddit answered 429
+        """
+        headers = response.headers
+        rate = None
+        rate_ttl = None
+        block_for = 0.0
+
+        remaining = _parse_float(headers.get("x-ratelimit-remaining"))
+        reset = _parse_float(headers.get("x-ratelimit-reset"))
+
+        if remaining is not None and reset:
+            # Spread what's left of the window evenly over the time until reset
+            rate = max(remaining, 0.0) / reset
+            rate_ttl = reset
+            if remaining < 1:
+                block_for = reset
+
+        if response.status_code == 429:
+            block_for = max(
+                block_for,
+                _parse_float(headers.get("retry-after")) or reset or 60.0
+            )
+
+        if rate is not None or block_for:
+            try:
+                redis = await get_redis_client()
+                await redis.eval(
+                    ADAPT_SCRIPT, 1, self.key,
+                    "" if rate is None else max(rate, 0.01),
+                    "" if rate_ttl is None else rate_ttl,
+                    block_for
+                )
+            except RedisError as e:
+                print(f"Rate limiter unavailable, continuing without it: {e}")
+
+        if response.status_code == 429:
+            raise RateLimited(block_for)
+
+
+def retry_countdown(retry_after: float) -> int:
+    """
+    Countdown before re-queuing a throttled task, with random jitter.
+
+    Args:
+        retry_after: Seconds until the bucket has a token again
+
+    Returns:
+        retry_after plus up to REDDIT_RATE_LIMIT_RETRY_JITTER of it (at least
+        up to REDDIT_RATE_LIMIT_MAX_WAIT), in whole seconds
+    """
+    spread = max(
+        retry_after * settings.REDDIT_RATE_LIMIT_RETRY_JITTER,
+        settings.REDDIT_RATE_LIMIT_MAX_WAIT
+    )
+    return max(1, int(retry_after + random.uniform(0, spread)))
+
+
+def _parse_float(value: str | None) -> float | None:
+    """Parse a numeric header value, ignoring junk."""
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
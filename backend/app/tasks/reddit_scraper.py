@@ -1,19 +1,34 @@
 """
 Celery task for scraping Reddit and performing ABSA analysis.
 Runs in background worker to avoid blocking the API server.
+
+Comments are fetched through the Reddit API (PRAW), then analyzed, embedded
+and stored by the same InsightPipeline as the public JSON scraper, so both
+tasks share the delta, dedup and statistics logic.
 """
-import re
-from typing import List, Dict
-from uuid import uuid4
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, List
 
 import praw
-from llama_index.core import Document
-from llama_index.embeddings.openai import OpenAIEmbedding
+from praw.models import MoreComments
 
-from app.tasks.celery_app import celery_app
 from app.core.config import settings
-from app.services.analysis_service import AnalysisService
 from app.db.supabase_client import get_supabase_client
+from app.services.analysis_service import AnalysisService
+from app.services.embedding_service import EmbeddingService
+from app.services.thread_state_service import ThreadStateService
+from app.tasks.celery_app import celery_app
+from app.tasks.comment_selection import CommentSelector, make_selector
+from app.tasks.http_client import run_async
+from app.tasks.index_maintenance import maintain_vector_index
+from app.tasks.pipeline import InsightPipeline
+from app.tasks.rate_limiter import RateLimited, RedisTokenBucket
+from app.utils.helpers import chunk_list, extract_submission_id
+
+# One PRAW instance per thread (PRAW is not thread-safe)
+_thread_local = threading.local()
 
 
 @celery_app.task(bind=True, name="scrape_and_analyze_reddit")
@@ -22,7 +37,9 @@ def scrape_and_analyze_reddit(
     reddit_url: str,
     max_comments: int,
     user_id: str,
-    job_id: str
+    job_id: str,
+    selection: str | None = None,
+    sentiment_backend: str | None = None
 ) -> Dict:
     """
     Scrape Reddit post/comments and perform ABSA analysis.
@@ -33,6 +50,8 @@ def scrape_and_analyze_reddit(
         max_comments: Maximum comments to scrape
         user_id: User who initiated the task
         job_id: Database job ID
+        selection: Comment selection mode (defaults to COMMENT_SELECTION_MODE)
+        sentiment_backend: "openai" or "local" (defaults to SENTIMENT_BACKEND)
 
     Returns:
         Dict with task results (comment count, insights count, etc.)
@@ -41,62 +60,62 @@ def scrape_and_analyze_reddit(
         # Update job status
         _update_job_status(job_id, "started")
 
-        # Initialize Reddit client
-        reddit = praw.Reddit(
-            client_id=settings.REDDIT_CLIENT_ID,
-            client_secret=settings.REDDIT_CLIENT_SECRET,
-            user_agent=settings.REDDIT_USER_AGENT
-        )
-
-        # Extract submission ID from URL
-        submission_id = _extract_submission_id(reddit_url)
-        submission = reddit.submission(id=submission_id)
-
-        # Scrape comments
+        # Scrape comments (blocking PRAW requests, before the pipeline's event loop runs)
         self.update_state(state="PROGRESS", meta={"stage": "scraping", "progress": 0})
-        comments = _scrape_comments(submission, max_comments)
+        selection = selection or settings.COMMENT_SELECTION_MODE
+        thread = _scrape_thread(reddit_url, max_comments, selection)
 
-        total_comments = len(comments)
+        total_comments = len(thread["comments"])
         _update_job_status(job_id, "processing", total_comments=total_comments)
 
-        # Analyze comments with ABSA
+        # Analyze, embed and store; only new or edited comments need analysis on a re-scrape
         self.update_state(state="PROGRESS", meta={"stage": "analyzing", "progress": 0})
-        analysis_service = AnalysisService()
-        all_insights = []
-
-        for idx, comment_text in enumerate(comments):
-            # Analyze individual comment
-            insights = analysis_service.analyze_comment(comment_text)
-
-            # Add metadata
-            for insight in insights:
-                insight["source_url"] = reddit_url
-                insight["metadata"] = {
-                    "submission_title": submission.title,
-                    "submission_id": submission_id,
-                    "comment_index": idx
-                }
-
-            all_insights.extend(insights)
-
-            # Update progress every 10 comments
-            if (idx + 1) % 10 == 0:
-                progress = int((idx + 1) / total_comments * 100)
-                self.update_state(
-                    state="PROGRESS",
-                    meta={"stage": "analyzing", "progress": progress}
-                )
-                _update_job_status(
-                    job_id,
-                    "processing",
-                    processed_comments=idx + 1
-                )
-
-        # Store insights in vector database
-        self.update_state(state="PROGRESS", meta={"stage": "storing", "progress": 0})
-        insights_count = _store_insights(all_insights)
+        supabase = run_async(get_supabase_client())
+        thread_state = ThreadStateService(supabase)
+        known = thread_state.load(thread_state.canonical_url(reddit_url))
+        analysis_service = AnalysisService(backend=sentiment_backend)
+
+        task_id = self.request.id  # request context is thread-local
+
+        def report_progress(stats: Dict):
+            processed = stats["comments_unchanged"] + stats["comments_processed"]
+            self.update_state(
+                task_id=task_id,
+                state="PROGRESS",
+                meta={"stage": "analyzing", "progress": int(processed / max(total_comments, 1) * 100)}
+            )
+            supabase.table("scrape_jobs").update({
+                "processed_comments": processed
+            }).eq("id", job_id).execute()
+
+        pipeline = InsightPipeline(
+            reddit_url,
+            supabase,
+            analysis_service,
+            thread_state,
+            known,
+            EmbeddingService(),
+            on_progress=report_progress
+        )
+        stats = run_async(pipeline.run(_ScrapedThread(thread), max_comments, selection))
+
+        print(
+            f"Job {job_id}: {stats['duplicates_collapsed']} duplicate comments collapsed, "
+            f"{stats['llm_calls_saved']} LLM calls saved"
+        )
+
+        cache_stats = (
+            analysis_service.sentiment_cache.stats()
+            if analysis_service.sentiment_cache is not None else None
+        )
+        if cache_stats:
+            print(
+                f"Job {job_id}: sentiment cache {cache_stats['hits']} hits "
+                f"({cache_stats['local_hits']} local), {cache_stats['misses']} misses"
+            )
 
         # Mark job complete
+        insights_count = stats["insights_count"]
         _update_job_status(
             job_id,
             "completed",
@@ -104,9 +123,18 @@ def scrape_and_analyze_reddit(
             insights_count=insights_count
         )
 
+        # Build or retrain the embedding index if this load outgrew it
+        if insights_count:
+            maintain_vector_index.delay()
+
         return {
             "status": "success",
             "comments_scraped": total_comments,
+            "comments_analyzed": stats["comments_analyzed"],
+            "comments_unchanged": stats["comments_unchanged"],
+            "duplicates_collapsed": stats["duplicates_collapsed"],
+            "llm_calls_saved": stats["llm_calls_saved"],
+            "sentiment_cache": cache_stats,
             "insights_count": insights_count,
             "job_id": job_id
         }
@@ -117,91 +145,238 @@ def scrape_and_analyze_reddit(
         raise
 
 
-def _extract_submission_id(url: str) -> str:
-    """Extract Reddit submission ID from URL."""
-    patterns = [
-        r"reddit\.com/r/\w+/comments/(\w+)",
-        r"redd\.it/(\w+)"
-    ]
+class _ScrapedThread:
+    """
+    An already scraped thread behind the scraper interface of InsightPipeline.
+
+    PRAW requests block, so the thread is fetched before the pipeline runs
+    and handed to it in batches from memory.
+    """
+
+    def __init__(self, thread: Dict):
+        """
+        Initialize with scraped thread data.
+
+        Args:
+            thread: Post fields and "comments", as returned by _scrape_thread
+        """
+        self.thread = thread
+
+    async def scrape_thread(
+        self,
+        reddit_url: str,
+        max_comments: int = 500,
+        selection: str = "first",
+        on_comments: Callable[[Dict, List[Dict]], Awaitable] | None = None,
+        batch_size: int = 100
+    ) -> Dict:
+        """Feed the scraped comments to on_comments in batches (see PublicJSONScraper)."""
+        if on_comments is not None:
+            post = {key: value for key, value in self.thread.items() if key != 'comments'}
+            for batch in chunk_list(self.thread['comments'], batch_size):
+                await on_comments(post, batch)
+        return self.thread
+
+
+def _scrape_thread(reddit_url: str, max_comments: int, selection: str) -> Dict:
+    """
+    Fetch a submission and its selected comments through PRAW.
+
+    Args:
+        reddit_url: URL to Reddit post
+        max_comments: Maximum comments to keep
+        selection: How to pick max_comments ("first", "top" or "stratified")
+
+    Returns:
+        Dict with post title, subreddit and comments
+    """
+    reddit = _create_reddit()
+    submission = reddit.submission(id=extract_submission_id(reddit_url))
+    comments = _scrape_comments(submission, max_comments, selection=selection)
+
+    return {
+        'url': reddit_url,
+        'title': submission.title,
+        'subreddit': str(submission.subreddit),
+        'comments': comments
+    }
+
+
+def _create_reddit() -> praw.Reddit:
+    """Create an authenticated PRAW client."""
+    return praw.Reddit(
+        client_id=settings.REDDIT_CLIENT_ID,
+        client_secret=settings.REDDIT_CLIENT_SECRET,
+        user_agent=settings.REDDIT_USER_AGENT
+    )
 
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
 
-    raise ValueError(f"Could not extract submission ID from URL: {url}")
+def _get_thread_reddit() -> praw.Reddit:
+    """Get the PRAW client owned by the current thread."""
+    if not hasattr(_thread_local, "reddit"):
+        _thread_local.reddit = _create_reddit()
+    return _thread_local.reddit
 
 
-def _scrape_comments(submission, max_comments: int) -> List[str]:
+def _scrape_comments(submission, max_comments: int, selection: str = "first") -> List[Dict]:
     """
     Scrape comments from submission.
 
-    Note: This is the MVP version using PRAW's default behavior.
-    For production, implement the recursive morechildren API approach.
+    MoreComments stubs are resolved through /api/morechildren in concurrent
+    batches of up to 100 ids (one PRAW client per thread), within the
+    REDDIT_MORECHILDREN_MAX_REQUESTS and REDDIT_MORECHILDREN_TIME_BUDGET limits,
+    instead of replace_more() fetching them one blocking request at a time.
+    Each request takes a token from the shared Reddit rate limiter first.
+
+    Args:
+        submission: PRAW submission
+        max_comments: Maximum comments to keep
+        selection: How to pick max_comments ("first", "top" or "stratified")
+
+    Returns:
+        Comment dicts with text, author, score, created_utc, id, depth, edited
     """
-    # Replace MoreComments objects to load all comments
-    submission.comments.replace_more(limit=None)
+    selector = make_selector(selection, max_comments)
+    more_ids: List[str] = []
 
-    comments = []
-    for comment in submission.comments.list()[:max_comments]:
-        if hasattr(comment, 'body') and comment.body:
-            # Filter out deleted/removed comments
-            if comment.body not in ["[deleted]", "[removed]"]:
-                comments.append(comment.body)
+    # Comments of the initial response; MoreComments are queued, not resolved
+    for item in submission.comments.list():
+        _collect_comment(item, selector, more_ids)
+        if selector.full:
+            break
 
-    return comments
+    if more_ids and not selector.full:
+        _expand_more_comments(submission, more_ids, selector)
 
+    return selector.results()
 
-def _store_insights(insights: List[Dict]) -> int:
+
+def _expand_more_comments(submission, more_ids: List[str], selector: CommentSelector):
     """
-    Store insights in Supabase with embeddings.
+    Resolve MoreComments ids concurrently until the selection or a budget is full.
+
+    The per-thread PRAW clients each track Reddit's rate-limit headers on
+    their own, so every request is first paced by the cluster-wide token
+    bucket. Expansion stops, keeping what was collected, when the bucket
+    would make us wait longer than REDDIT_RATE_LIMIT_MAX_WAIT. While the
+    bucket is unavailable (Redis down) requests are sent one at a time, so
+    concurrency can't multiply an unpaced request rate.
 
     Args:
-        insights: List of insight dicts
+        submission: PRAW submission the ids belong to
+        more_ids: Pending comment ids (consumed in place)
+        selector: Selection receiving parsed comments
+    """
+    rate_limiter = RedisTokenBucket()
+    batch_size = settings.REDDIT_MORECHILDREN_BATCH_SIZE
+    concurrency = settings.REDDIT_MORECHILDREN_CONCURRENCY
+    budget = settings.REDDIT_MORECHILDREN_MAX_REQUESTS
+    deadline = time.monotonic() + settings.REDDIT_MORECHILDREN_TIME_BUDGET
 
-    Returns:
-        Number of insights stored
+    link_id = submission.fullname
+    sort = submission.comment_sort
+
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="morechildren")
+    in_flight = set()
+    throttled = False
+    paced = True  # Whether the last request got a token from the shared bucket
+
+    try:
+        while more_ids or in_flight:
+            # Top up in-flight requests while budget and selection allow
+            while (
+                more_ids and budget > 0 and len(in_flight) < (concurrency if paced else 1)
+                and not selector.full and not throttled
+            ):
+                try:
+                    paced = run_async(rate_limiter.acquire())
+                except RateLimited as e:
+                    # Keep what we have rather than losing it to a re-queue
+                    print(f"Stopping more comments expansion: {e}")
+                    throttled = True
+                    break
+
+                batch = more_ids[:batch_size]
+                del more_ids[:batch_size]
+                budget -= 1
+                in_flight.add(pool.submit(_fetch_more_children, link_id, sort, batch))
+
+            remaining = deadline - time.monotonic()
+            if not in_flight or remaining <= 0:
+                break
+
+            done, in_flight = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    things = future.result()
+                except Exception as e:
+                    print(f"Failed to expand more comments: {e}")
+                    continue
+
+                for item in things:
+                    if selector.full:
+                        break
+                    _collect_comment(item, selector, more_ids)
+
+            if selector.full:
+                break
+    finally:
+        # Don't wait on requests we no longer need
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _fetch_more_children(link_id: str, sort: str, comment_ids: List[str]) -> list:
     """
-    if not insights:
-        return 0
+    Resolve a batch of comment ids with the calling thread's PRAW client.
 
-    # Get Supabase client synchronously (Celery tasks are not async)
-    import asyncio
-    supabase = asyncio.run(get_supabase_client())
+    Args:
+        link_id: Fullname of the submission (t3_...)
+        sort: Comment sort of the submission
+        comment_ids: Up to 100 comment ids
 
-    # Initialize embedding model
-    embed_model = OpenAIEmbedding(
-        model=settings.EMBEDDING_MODEL,
-        api_key=settings.OPENAI_API_KEY
+    Returns:
+        Flat list of Comment and MoreComments objects
+    """
+    return _get_thread_reddit().post(
+        "api/morechildren/",
+        data={
+            "children": ",".join(comment_ids),
+            "link_id": link_id,
+            "sort": sort
+        }
     )
 
-    # Prepare records with embeddings
-    records = []
-    for insight in insights:
-        # Generate embedding for the insight text
-        embedding_text = f"{insight['aspect']}: {insight['text']}"
-        embedding = embed_model.get_text_embedding(embedding_text)
-
-        records.append({
-            "id": str(uuid4()),
-            "source_url": insight["source_url"],
-            "aspect": insight["aspect"],
-            "sentiment": insight["sentiment"],
-            "text": insight["text"],
-            "embedding": embedding,
-            "metadata": insight.get("metadata", {})
-        })
-
-    # Batch insert (Supabase supports up to 1000 per batch)
-    batch_size = 500
-    stored_count = 0
-
-    for i in range(0, len(records), batch_size):
-        batch = records[i:i + batch_size]
-        result = supabase.table("insights").insert(batch).execute()
-        stored_count += len(result.data) if result.data else 0
-
-    return stored_count
+
+def _collect_comment(item, selector: CommentSelector, more_ids: List[str]):
+    """
+    Route a PRAW comment into the selection, or queue a MoreComments stub.
+
+    Args:
+        item: Comment or MoreComments
+        selector: Selection receiving parsed comments
+        more_ids: List to collect ids behind MoreComments stubs
+    """
+    if isinstance(item, MoreComments):
+        # "Continue this thread" stubs have no children ids
+        more_ids.extend(item.children)
+        return
+
+    body = getattr(item, "body", "")
+
+    # Filter out deleted/removed comments
+    if not body or body in ["[deleted]", "[removed]"]:
+        return
+
+    selector.add({
+        "text": body,
+        "author": str(item.author) if item.author else "[deleted]",
+        "score": item.score,
+        "created_utc": item.created_utc,
+        "id": item.id,
+        "depth": getattr(item, "depth", 0),
+        "edited": item.edited or 0
+    })
 
 
 def _update_job_status(
@@ -3,26 +3,87 @@ Reddit scraper using public JSON endpoints (no API key required).
 This approach allows immediate development without waiting for Reddit API approval.
 """
 import asyncio
+import json
 import httpx
-from typing import List, Dict
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Callable, List, Dict
 from datetime import datetime
 
+from app.core.config import settings
+from app.services.thread_state_service import ThreadStateService
+from app.tasks.comment_parser import (
+    ThingStreamParser,
+    build_comment,
+    ijson,
+    iter_things,
+    more_children_ids,
+)
+from app.tasks.comment_selection import CommentSelector, make_selector
+from app.tasks.http_client import get_http_client, run_async
+from app.tasks.index_maintenance import maintain_vector_index
+from app.tasks.pipeline import InsightPipeline
+from app.tasks.rate_limiter import RateLimited, RedisTokenBucket, retry_countdown
+from app.utils.helpers import chunk_list
+
+# Reddit resolves "more comments" stubs through this endpoint (max 100 ids per call)
+MORECHILDREN_URL = "https://www.reddit.com/api/morechildren.json"
+MORECHILDREN_MAX_IDS = 100
+
 
 class PublicJSONScraper:
     """Scrapes Reddit using publicly available JSON endpoints."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        more_batch_size: int | None = None,
+        more_concurrency: int | None = None,
+        more_request_budget: int | None = None,
+        rate_limiter: RedisTokenBucket | None = None
+    ):
+        """
+        Initialize scraper.
+
+        Args:
+            more_batch_size: Comment ids per morechildren request (max 100)
+            more_concurrency: Max morechildren requests in flight at once
+            more_request_budget: Max morechildren requests per thread
+            rate_limiter: Shared Reddit rate limiter (cluster-wide by default)
+        """
         self.headers = {
             'User-Agent': 'JudgmentAI/1.0 (Educational Research Project; Open Source)'
         }
-
-    async def scrape_thread(self, reddit_url: str, max_comments: int = 500) -> Dict:
+        self.more_batch_size = min(
+            more_batch_size or settings.REDDIT_MORECHILDREN_BATCH_SIZE,
+            MORECHILDREN_MAX_IDS
+        )
+        self.more_concurrency = more_concurrency or settings.REDDIT_MORECHILDREN_CONCURRENCY
+        self.more_request_budget = (
+            more_request_budget if more_request_budget is not None
+            else settings.REDDIT_MORECHILDREN_MAX_REQUESTS
+        )
+        self.rate_limiter = rate_limiter or RedisTokenBucket()
+
+    async def scrape_thread(
+        self,
+        reddit_url: str,
+        max_comments: int = 500,
+        selection: str = "first",
+        on_comments: Callable[[Dict, List[Dict]], Awaitable] | None = None,
+        batch_size: int = 100
+    ) -> Dict:
         """
         Scrape a Reddit thread using public JSON endpoint.
 
         Args:
             reddit_url: Full Reddit post URL
             max_comments: Maximum number of comments to extract
+            selection: How to pick max_comments ("first", "top" or "stratified").
+                Only "first" stops reading early; the others read the whole
+                thread (within the morechildren budget) to choose from.
+            on_comments: Awaited with (post data, comment batch) as comments
+                are selected; with "first" selection batches arrive while the
+                thread is still downloading, otherwise once it's complete
+            batch_size: Comments per on_comments batch
 
         Returns:
             Dict with post data and comments
@@ -30,17 +91,44 @@ class PublicJSONScraper:
         # Convert URL to JSON endpoint
         json_url = self._to_json_url(reddit_url)
 
-        # Fetch JSON data
-        data = await self._fetch_json(json_url)
-
-        # Parse post metadata
-        post_data = self._extract_post_data(data)
-
-        # Extract all comments
-        comments = self._extract_all_comments(data)
-
-        # Limit to max_comments
-        comments = comments[:max_comments]
+        # Pooled client shared by every fetch in this worker process
+        client = await get_http_client()
+
+        post_data = self._extract_post_data(None)
+        selector = make_selector(selection, max_comments)
+        more_ids: List[str] = []
+
+        async def emit(final: bool = False):
+            """Hand selected comments to on_comments in batches."""
+            if on_comments is None:
+                return
+            if selector.incremental:
+                if selector.pending >= batch_size or (final and selector.pending):
+                    await on_comments(post_data, selector.take())
+            elif final:
+                for batch in chunk_list(selector.results(), batch_size):
+                    await on_comments(post_data, batch)
+
+        # Parse the thread as it downloads and stop reading once we have enough
+        async with aclosing(self._stream_things(client, json_url)) as things:
+            async for thing in things:
+                if thing['kind'] == 't3':
+                    post_data = self._extract_post_data(thing['data'])
+                    continue
+
+                self._collect_thing(thing, selector, more_ids)
+                await emit()
+                if selector.full:
+                    break
+
+        # Resolve "more" stubs until we have enough comments
+        if more_ids and post_data['name'] and not selector.full:
+            await self._expand_more_comments(
+                client, post_data['name'], more_ids, selector, emit=emit
+            )
+
+        await emit(final=True)
+        comments = selector.results()
 
         return {
             'url': reddit_url,
@@ -50,6 +138,7 @@ class PublicJSONScraper:
             'created_utc': post_data['created_utc'],
             'num_comments': post_data['num_comments'],
             'comments': comments,
+            'comments_seen': selector.seen,
             'scraped_at': datetime.utcnow().isoformat()
         }
 
@@ -64,60 +153,220 @@ class PublicJSONScraper:
 
         return url
 
-    async def _fetch_json(self, url: str, retry_count: int = 3) -> dict:
+    async def _fetch_json(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        params: Dict | None = None,
+        retry_count: int = 3
+    ):
         """
         Fetch JSON from Reddit with retry logic.
 
+        Every request takes a token from the shared rate limiter first.
+
         Args:
+            client: HTTP client to send the request with
             url: JSON endpoint URL
+            params: Optional query parameters
             retry_count: Number of retries on failure
 
         Returns:
             Parsed JSON data
+
+        Raises:
+            RateLimited: If Reddit throttles us beyond the allowed wait
         """
-        async with httpx.AsyncClient() as client:
-            for attempt in range(retry_count):
-                try:
-                    response = await client.get(
-                        url,
-                        headers=self.headers,
-                        timeout=30.0,
-                        follow_redirects=True
-                    )
+        for attempt in range(retry_count):
+            await self.rate_limiter.acquire()
+
+            try:
+                response = await client.get(
+                    url,
+                    params=params,
+                    headers=self.headers,
+                    timeout=30.0,
+                    follow_redirects=True
+                )
+                # Adapt the shared budget; raises RateLimited on 429
+                await self.rate_limiter.observe(response)
+                response.raise_for_status()
+                return response.json()
+
+            except httpx.RequestError as e:
+                if attempt == retry_count - 1:
+                    raise
+                await asyncio.sleep(5 * (attempt + 1))
+
+        raise Exception("Failed to fetch Reddit data after retries")
+
+    async def _stream_things(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        retry_count: int = 3
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream things from a Reddit JSON listing as the response downloads.
+
+        Falls back to decoding the whole body when ijson is not installed.
+
+        Args:
+            client: HTTP client to send the request with
+            url: JSON endpoint URL
+            retry_count: Number of retries on connection failure
+
+        Yields:
+            Things (t3 post, t1 comments, more stubs)
+
+        Raises:
+            RateLimited: If Reddit throttles us beyond the allowed wait
+        """
+        for attempt in range(retry_count):
+            await self.rate_limiter.acquire()
+            started = False
+
+            try:
+                async with client.stream(
+                    "GET",
+                    url,
+                    headers=self.headers,
+                    timeout=30.0,
+                    follow_redirects=True
+                ) as response:
+                    # Adapt the shared budget; raises RateLimited on 429
+                    await self.rate_limiter.observe(response)
                     response.raise_for_status()
-                    return response.json()
-
-                except httpx.HTTPStatusError as e:
-                    if e.response.status_code == 429:
-                        # Rate limited - wait and retry
-                        wait_time = 60 * (attempt + 1)
-                        print(f"Rate limited. Waiting {wait_time} seconds...")
-                        await asyncio.sleep(wait_time)
-                        continue
+
+                    if ijson is None:
+                        data = json.loads(await response.aread())
+                        for listing in data:
+                            for thing in iter_things(listing['data']['children']):
+                                started = True
+                                yield thing
+                        return
+
+                    parser = ThingStreamParser()
+                    async for chunk in response.aiter_bytes():
+                        for thing in parser.feed(chunk):
+                            started = True
+                            yield thing
+                    for thing in parser.close():
+                        yield thing
+                return
+
+            except httpx.RequestError:
+                # Can't transparently retry once things were handed out
+                if started or attempt == retry_count - 1:
                     raise
+                await asyncio.sleep(5 * (attempt + 1))
+
+    async def _fetch_more_children(
+        self,
+        client: httpx.AsyncClient,
+        link_id: str,
+        comment_ids: List[str]
+    ) -> list:
+        """
+        Resolve a batch of comment ids hidden behind "more" stubs.
+
+        Args:
+            client: HTTP client to send the request with
+            link_id: Fullname of the submission (t3_...)
+            comment_ids: Up to 100 comment ids (without t1_ prefix)
 
-                except httpx.RequestError as e:
-                    if attempt == retry_count - 1:
-                        raise
-                    await asyncio.sleep(5 * (attempt + 1))
+        Returns:
+            Flat list of things (comments and further "more" stubs)
+        """
+        data = await self._fetch_json(client, MORECHILDREN_URL, params={
+            'api_type': 'json',
+            'link_id': link_id,
+            'children': ','.join(comment_ids),
+            'limit_children': 'false',
+            'raw_json': 1
+        })
+        return data.get('json', {}).get('data', {}).get('things', [])
+
+    async def _expand_more_comments(
+        self,
+        client: httpx.AsyncClient,
+        link_id: str,
+        more_ids: List[str],
+        selector: CommentSelector,
+        emit: Callable[[], Awaitable] | None = None
+    ):
+        """
+        Resolve "more" stubs with bounded concurrency until the selection or budget is full.
 
-        raise Exception("Failed to fetch Reddit data after retries")
+        Newly discovered stubs are queued as responses arrive, so nested "more"
+        placeholders are expanded too.
 
-    def _extract_post_data(self, data: list) -> Dict:
-        """Extract post metadata from JSON response."""
-        try:
-            post = data[0]['data']['children'][0]['data']
-            return {
-                'title': post.get('title', ''),
-                'subreddit': post.get('subreddit', ''),
-                'author': post.get('author', '[deleted]'),
-                'created_utc': post.get('created_utc', 0),
-                'num_comments': post.get('num_comments', 0),
-                'score': post.get('score', 0),
-                'selftext': post.get('selftext', '')
-            }
-        except (KeyError, IndexError):
+        Args:
+            client: HTTP client shared by all requests
+            link_id: Fullname of the submission (t3_...)
+            more_ids: Pending comment ids (consumed in place)
+            selector: Selection receiving parsed comments
+            emit: Awaited after each response to stream selected comments on
+        """
+        budget = self.more_request_budget
+        in_flight = set()
+
+        while more_ids or in_flight:
+            # Top up in-flight requests while budget and cap allow
+            while (
+                more_ids
+                and budget > 0
+                and len(in_flight) < self.more_concurrency
+                and not selector.full
+            ):
+                batch = more_ids[:self.more_batch_size]
+                del more_ids[:self.more_batch_size]
+                budget -= 1
+                in_flight.add(asyncio.create_task(
+                    self._fetch_more_children(client, link_id, batch)
+                ))
+
+            if not in_flight:
+                break
+
+            done, in_flight = await asyncio.wait(
+                in_flight, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            throttled = False
+            for task in done:
+                try:
+                    things = task.result()
+                except RateLimited as e:
+                    # Keep what we have rather than losing it to a re-queue
+                    print(f"Stopping more comments expansion: {e}")
+                    throttled = True
+                    continue
+                except (httpx.HTTPError, ValueError) as e:
+                    print(f"Failed to expand more comments: {e}")
+                    continue
+                for thing in iter_things(things):
+                    if selector.full:
+                        break
+                    self._collect_thing(thing, selector, more_ids)
+
+            if emit is not None:
+                await emit()
+
+            if throttled or selector.full:
+                break
+
+        # Cap reached or throttled - drop requests we no longer need
+        for task in in_flight:
+            task.cancel()
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+    def _extract_post_data(self, post: Dict | None) -> Dict:
+        """Extract post metadata from the t3 thing's data."""
+        if not post:
             return {
+                'name': '',
                 'title': 'Unknown',
                 'subreddit': 'unknown',
                 'author': 'unknown',
@@ -127,70 +376,39 @@ class PublicJSONScraper:
                 'selftext': ''
             }
 
-    def _extract_all_comments(self, data: list) -> List[Dict]:
-        """
-        Recursively extract all comments from JSON response.
-
-        Args:
-            data: JSON response from Reddit
-
-        Returns:
-            List of comment dictionaries
-        """
-        comments = []
-
-        if len(data) < 2:
-            return comments
-
-        # Comments are in the second element
-        comment_listing = data[1]['data']['children']
-
-        self._parse_comments_recursive(comment_listing, comments)
-
-        return comments
+        return {
+            'name': post.get('name', ''),
+            'title': post.get('title', ''),
+            'subreddit': post.get('subreddit', ''),
+            'author': post.get('author', '[deleted]'),
+            'created_utc': post.get('created_utc', 0),
+            'num_comments': post.get('num_comments', 0),
+            'score': post.get('score', 0),
+            'selftext': post.get('selftext', '')
+        }
 
-    def _parse_comments_recursive(self, items: list, comments: List[Dict]):
+    def _collect_thing(self, thing: Dict, selector: CommentSelector, more_ids: List[str]):
         """
-        Recursively parse comments and their replies.
+        Route a parsed thing into the comment selection or the "more" queue.
 
         Args:
-            items: List of comment items
-            comments: List to append parsed comments to
+            thing: Parsed thing (replies are yielded separately, never walked here)
+            selector: Selection receiving parsed comments
+            more_ids: List to collect ids behind "more" stubs
         """
-        for item in items:
-            # Skip "more comments" placeholders
-            if item['kind'] != 't1':
-                continue
-
-            comment_data = item['data']
-            body = comment_data.get('body', '')
-
-            # Skip deleted/removed comments
-            if body in ['[deleted]', '[removed]', '']:
-                continue
-
-            # Add comment
-            comments.append({
-                'text': body,
-                'author': comment_data.get('author', '[deleted]'),
-                'score': comment_data.get('score', 0),
-                'created_utc': comment_data.get('created_utc', 0),
-                'id': comment_data.get('id', '')
-            })
-
-            # Process replies recursively
-            replies = comment_data.get('replies', '')
-
-            if isinstance(replies, dict):
-                reply_children = replies['data']['children']
-                self._parse_comments_recursive(reply_children, comments)
+        if thing['kind'] == 'more':
+            more_ids.extend(more_children_ids(thing['data']))
+        elif thing['kind'] == 't1':
+            comment = build_comment(thing['data'])
+            if comment is not None:
+                selector.add(comment)
 
 
 # Celery task wrapper
 from app.tasks.celery_app import celery_app
 from app.services.analysis_service import AnalysisService
+from app.services.embedding_service import EmbeddingService
 from app.db.supabase_client import get_supabase_client
-from uuid import uuid4
 
 
 @celery_app.task(bind=True, name="scrape_and_analyze_reddit_public")
@@ -199,7 +417,10 @@ def scrape_and_analyze_reddit_public(
     reddit_url: str,
     max_comments: int,
     user_id: str,
-    job_id: str
+    job_id: str,
+    selection: str | None = None,
+    sentiment_backend: str | None = None,
+    analysis_mode: str | None = None
 ) -> Dict:
     """
     Scrape Reddit using public JSON and perform ABSA analysis.
@@ -210,115 +431,146 @@ def scrape_and_analyze_reddit_public(
         max_comments: Maximum comments to analyze
         user_id: User who initiated the task
         job_id: Database job ID
+        selection: Comment selection mode (defaults to COMMENT_SELECTION_MODE)
+        sentiment_backend: "openai" or "local" (defaults to SENTIMENT_BACKEND)
+        analysis_mode: "full" or "sample" (defaults to ANALYSIS_MODE)
 
     Returns:
         Dict with task results
     """
-    import asyncio
-
     try:
         # Update job status
-        supabase = asyncio.run(get_supabase_client())
+        supabase = run_async(get_supabase_client())
         supabase.table("scrape_jobs").update({
             "status": "started"
         }).eq("id", job_id).execute()
 
-        # Scrape Reddit
+        # Scrape, analyze, embed and store as overlapping stages
         self.update_state(state="PROGRESS", meta={"stage": "scraping", "progress": 0})
 
-        scraper = PublicJSONScraper()
-        data = asyncio.run(scraper.scrape_thread(reddit_url, max_comments))
-
-        comments = [c['text'] for c in data['comments']]
-        total_comments = len(comments)
+        # Only new or edited comments need analysis on a re-scrape
+        thread_state = ThreadStateService(supabase)
+        known = thread_state.load(thread_state.canonical_url(reddit_url))
 
-        # Update job with comment count
-        supabase.table("scrape_jobs").update({
-            "total_comments": total_comments
-        }).eq("id", job_id).execute()
+        analysis_service = AnalysisService(backend=sentiment_backend)
 
-        # Analyze with ABSA
-        self.update_state(state="PROGRESS", meta={"stage": "analyzing", "progress": 0})
+        task_id = self.request.id  # request context is thread-local
 
-        analysis_service = AnalysisService()
-        all_insights = []
-
-        for idx, comment_text in enumerate(comments):
-            insights = analysis_service.analyze_comment(comment_text)
-
-            for insight in insights:
-                insight["source_url"] = reddit_url
-                insight["metadata"] = {
-                    "submission_title": data['title'],
-                    "subreddit": data['subreddit']
+        def report_progress(stats: Dict):
+            processed = stats["comments_unchanged"] + stats["comments_processed"]
+            self.update_state(
+                task_id=task_id,
+                state="PROGRESS",
+                meta={
+                    "stage": "processing",
+                    "progress": int(processed / max(max_comments, 1) * 100),
+                    **stats
                 }
-
-            all_insights.extend(insights)
-
-            # Update progress every 10 comments
-            if (idx + 1) % 10 == 0:
-                progress = int((idx + 1) / total_comments * 100)
-                self.update_state(
-                    state="PROGRESS",
-                    meta={"stage": "analyzing", "progress": progress}
-                )
-                supabase.table("scrape_jobs").update({
-                    "processed_comments": idx + 1
-                }).eq("id", job_id).execute()
-
-        # Store insights
-        self.update_state(state="PROGRESS", meta={"stage": "storing", "progress": 0})
-
-        from llama_index.embeddings.openai import OpenAIEmbedding
-        from app.core.config import settings
-
-        embed_model = OpenAIEmbedding(
-            model=settings.EMBEDDING_MODEL,
-            api_key=settings.OPENAI_API_KEY
+            )
+            supabase.table("scrape_jobs").update({
+                "total_comments": stats["comments_scraped"],
+                "processed_comments": processed
+            }).eq("id", job_id).execute()
+
+        embedder = EmbeddingService()
+        pipeline = InsightPipeline(
+            reddit_url,
+            supabase,
+            analysis_service,
+            thread_state,
+            known,
+            embedder,
+            on_progress=report_progress
+        )
+        stats = run_async(pipeline.run(
+            PublicJSONScraper(),
+            max_comments,
+            selection or settings.COMMENT_SELECTION_MODE,
+            sample=(analysis_mode or settings.ANALYSIS_MODE) == "sample"
+        ))
+
+        total_comments = stats["comments_scraped"]
+
+        print(
+            f"Job {job_id}: {stats['duplicates_collapsed']} duplicate comments collapsed, "
+            f"{stats['llm_calls_saved']} LLM calls saved"
         )
 
-        # Store insights in vector database
-        insights_count = 0
-        batch_size = 100
-
-        for i in range(0, len(all_insights), batch_size):
-            batch = all_insights[i:i + batch_size]
-            records = []
-
-            for insight in batch:
-                embedding_text = f"{insight['aspect']}: {insight['text']}"
-                embedding = embed_model.get_text_embedding(embedding_text)
-
-                records.append({
-                    "id": str(uuid4()),
-                    "source_url": insight["source_url"],
-                    "aspect": insight["aspect"],
-                    "sentiment": insight["sentiment"],
-                    "text": insight["text"],
-                    "embedding": embedding,
-                    "metadata": insight.get("metadata", {})
-                })
-
-            result = supabase.table("insights").insert(records).execute()
-            insights_count += len(result.data) if result.data else 0
+        cache_stats = (
+            analysis_service.sentiment_cache.stats()
+            if analysis_service.sentiment_cache is not None else None
+        )
+        if cache_stats:
+            print(
+                f"Job {job_id}: sentiment cache {cache_stats['hits']} hits "
+                f"({cache_stats['local_hits']} local), {cache_stats['misses']} misses"
+            )
+
+        embedding_cache_stats = embedder.cache.stats() if embedder.cache is not None else None
+        if embedding_cache_stats:
+            print(
+                f"Job {job_id}: embedding cache {embedding_cache_stats['hits']} hits, "
+                f"{embedding_cache_stats['misses']} misses, {embedder.requests} API requests"
+            )
+
+        sampling = stats.get("sampling")
+        if sampling:
+            overall = sampling["aspects"]["overall"]
+            print(
+                f"Job {job_id}: sampled {sampling['sampled']}/{sampling['population']} comments, "
+                f"overall margin {overall['margin']} at {sampling['confidence']:.0%} confidence"
+            )
 
         # Mark job complete
         supabase.table("scrape_jobs").update({
             "status": "completed",
+            "total_comments": total_comments,
             "processed_comments": total_comments,
+            "metadata": {"sampling": sampling} if sampling else None,
             "completed_at": "now()"
         }).eq("id", job_id).execute()
 
+        # Build or retrain the embedding index if this load outgrew it
+        if stats["insights_count"]:
+            maintain_vector_index.delay()
+
         return {
             "status": "success",
             "comments_scraped": total_comments,
-            "insights_count": insights_count,
+            "comments_analyzed": stats["comments_analyzed"],
+            "comments_unchanged": stats["comments_unchanged"],
+            "duplicates_collapsed": stats["duplicates_collapsed"],
+            "llm_calls_saved": stats["llm_calls_saved"],
+            "sentiment_cache": cache_stats,
+            "embedding_cache": embedding_cache_stats,
+            "insights_count": stats["insights_count"],
+            "sampling": sampling,
             "job_id": job_id
         }
 
+    except RateLimited as e:
+        supabase = run_async(get_supabase_client())
+
+        if self.request.retries >= settings.REDDIT_RATE_LIMIT_MAX_RETRIES:
+            supabase.table("scrape_jobs").update({
+                "status": "failed",
+                "error": str(e)
+            }).eq("id", job_id).execute()
+            raise
+
+        # Free the worker slot and come back when the budget allows
+        supabase.table("scrape_jobs").update({
+            "status": "throttled"
+        }).eq("id", job_id).execute()
+        raise self.retry(
+            exc=e,
+            countdown=retry_countdown(e.retry_after),
+            max_retries=settings.REDDIT_RATE_LIMIT_MAX_RETRIES
+        ) from e
+
     except Exception as e:
         # Mark job as failed
-        supabase = asyncio.run(get_supabase_client())
+        supabase = run_async(get_supabase_client())
         supabase.table("scrape_jobs").update({
             "status": "failed",
             "error": str(e)
@@ -1,6 +1,7 @@
 """
 Utility functions and helpers.
 """
+import re
 from typing import List, Dict
 from datetime import datetime, timezone
 
@@ -59,3 +60,32 @@ def sanitize_reddit_url(url: str) -> str:
         url = url.replace("http://", "https://")
 
     return url
+
+
+def extract_submission_id(url: str) -> str:
+    """
+    Extract the Reddit submission ID from a thread URL.
+
+    Handles slugged and unslugged /comments/ links on any reddit.com host
+    (www., old., bare) and redd.it short links.
+
+    Args:
+        url: Reddit thread URL
+
+    Returns:
+        Submission ID (base36, lowercase)
+
+    Raises:
+        ValueError: If the URL doesn't name a submission
+    """
+    patterns = [
+        r"reddit\.com/(?:r/\w+/)?comments/(\w+)",
+        r"redd\.it/(\w+)"
+    ]
+
+    for pattern in patterns:
+        match = re.search(pattern, url, re.IGNORECASE)
+        if match:
+            return match.group(1).lower()
+
+    raise ValueError(f"Could not extract submission ID from URL: {url}")
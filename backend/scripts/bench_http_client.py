@@ -0,0 +1,115 @@
+"""
+Benchmark: per-request httpx client vs the pooled worker client.
+
+Starts a local keep-alive stub server that returns a Reddit-shaped JSON
+payload and measures requests/sec for:
+  - before: a new AsyncClient per request (old _fetch_json behaviour)
+  - after:  the shared client from app.tasks.http_client
+
+Usage (from backend/, with .env configured):
+    python scripts/bench_http_client.py --requests 2000 --concurrency 8
+
+The stub is plain HTTP, so the gap measured here is TCP setup only; against
+reddit.com each new client also pays a full TLS handshake.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx  # noqa: E402
+
+from app.tasks.http_client import close_http_client, get_http_client  # noqa: E402
+
+PAYLOAD = json.dumps([
+    {"kind": "Listing", "data": {"children": [{"kind": "t3", "data": {"title": "stub"}}]}},
+    {"kind": "Listing", "data": {"children": [
+        {"kind": "t1", "data": {"id": f"c{i}", "body": "stub comment " * 10, "score": i}}
+        for i in range(20)
+    ]}}
+]).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves the same JSON payload over HTTP/1.1 keep-alive."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server() -> ThreadingHTTPServer:
+    """Start the stub server on a free local port."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run_before(url: str, total: int, concurrency: int) -> float:
+    """New client per request, as _fetch_json used to do."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch():
+        async with semaphore:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(url)
+                response.json()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def run_after(url: str, total: int, concurrency: int) -> float:
+    """Shared pooled client from app.tasks.http_client."""
+    semaphore = asyncio.Semaphore(concurrency)
+    client = await get_http_client()
+
+    async def fetch():
+        async with semaphore:
+            response = await client.get(url)
+            response.json()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch() for _ in range(total)))
+    rate = total / (time.perf_counter() - start)
+    await close_http_client()
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    url = f"http://127.0.0.1:{server.server_address[1]}/r/test/comments/abc.json"
+
+    before = asyncio.run(run_before(url, args.requests, args.concurrency))
+    after = asyncio.run(run_after(url, args.requests, args.concurrency))
+    server.shutdown()
+
+    print(f"requests={args.requests} concurrency={args.concurrency}")
+    print(f"before (client per request): {before:8.1f} req/s")
+    print(f"after  (pooled client):      {after:8.1f} req/s")
+    print(f"speedup:                     {after / before:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: substring keyword fallback vs the token-level LexiconScorer.
+
+Times per-aspect scoring of a synthetic comment set with:
+  - original:      the old _fallback_sentiment as shipped, which re-parsed
+                   text.lower() with spaCy on every (comment, aspect) call
+                   before its substring scan
+  - scan only:     that substring scan on a Doc parsed once per comment
+  - lexicon only:  LexiconScorer.score on the same Doc (matches cached per Doc)
+  - lexicon+parse: one nlp.pipe parse per comment plus LexiconScorer, i.e. the
+                   current end-to-end cost, comparable to "original"
+
+"scan only" and "lexicon only" exclude parsing and compare the scorers alone.
+
+Also prints cases where the two disagree ("goodbye", negation, ...).
+
+Usage (from backend/, with a spaCy model installed):
+    python scripts/bench_lexicon.py --comments 2000 --model en_core_web_sm
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import spacy  # noqa: E402
+
+from app.services.lexicon import LexiconScorer  # noqa: E402
+
+TEMPLATES = [
+    "The {a} is great, but the {b} is terrible.",
+    "I said goodbye to my old phone because the {a} was not good at all.",
+    "Honestly the {a} isn't bad. The {b} could be better though.",
+    "Never had a problem with the {a}, love it. Support was awful.",
+    "The {a} is fine I guess, nothing special about the {b}.",
+    "Worst {a} ever, would not recommend. The {b} is perfect.",
+]
+ASPECTS = ["battery life", "camera", "screen", "price", "customer support", "software"]
+
+CASES = [
+    ("I said goodbye to the battery.", "battery"),
+    ("The camera is not good.", "camera"),
+    ("The screen isn't bad at all.", "screen"),
+    ("The price is not worth it.", "price"),
+]
+
+
+def original_fallback(nlp, text: str, aspect: str) -> str:
+    """The original _fallback_sentiment: parse the lowercased text, then scan."""
+    return legacy_scan(nlp(text.lower()), aspect)
+
+
+def legacy_scan(doc, aspect: str) -> str:
+    """The keyword scan of _fallback_sentiment on an already parsed Doc."""
+    aspect_lower = aspect.lower()
+    relevant_sentences = [
+        sent.text.lower() for sent in doc.sents
+        if aspect_lower in sent.text.lower()
+    ]
+
+    if not relevant_sentences:
+        return "neutral"
+
+    positive_words = {"good", "great", "excellent", "love", "amazing", "best", "perfect"}
+    negative_words = {"bad", "terrible", "awful", "hate", "worst", "poor", "disappointing"}
+
+    context = " ".join(relevant_sentences).lower()
+    pos_count = sum(1 for word in positive_words if word in context)
+    neg_count = sum(1 for word in negative_words if word in context)
+
+    if pos_count > neg_count:
+        return "positive"
+    elif neg_count > pos_count:
+        return "negative"
+    return "neutral"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--comments", type=int, default=2000)
+    parser.add_argument("--model", default="en_core_web_sm")
+    args = parser.parse_args()
+
+    nlp = spacy.load(args.model, exclude=["lemmatizer", "textcat", "textcat_multilabel"])
+    scorer = LexiconScorer(nlp)
+
+    rng = random.Random(0)
+    items = []
+    for _ in range(args.comments):
+        a, b = rng.sample(ASPECTS, 2)
+        items.append((rng.choice(TEMPLATES).format(a=a, b=b), [a, b]))
+
+    start = time.perf_counter()
+    for text, aspects in items:
+        for aspect in aspects:
+            original_fallback(nlp, text, aspect)
+    original = time.perf_counter() - start
+
+    docs = list(nlp.pipe(text for text, _ in items))
+    pairs = [(doc, aspect) for doc, (_, aspects) in zip(docs, items, strict=True) for aspect in aspects]
+
+    start = time.perf_counter()
+    for doc, aspect in pairs:
+        legacy_scan(doc, aspect)
+    scan = time.perf_counter() - start
+
+    # Fresh Docs so the scorer's per-Doc cache starts empty
+    docs = list(nlp.pipe(text for text, _ in items))
+    pairs = [(doc, aspect) for doc, (_, aspects) in zip(docs, items, strict=True) for aspect in aspects]
+
+    start = time.perf_counter()
+    for doc, aspect in pairs:
+        scorer.score(doc, aspect)
+    lexicon = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for doc, (_, aspects) in zip(nlp.pipe(text for text, _ in items), items, strict=True):
+        for aspect in aspects:
+            scorer.score(doc, aspect)
+    end_to_end = time.perf_counter() - start
+
+    n = len(pairs)
+    print(f"{n} (comment, aspect) pairs over {len(items)} comments")
+    print(f"original:      {original / n * 1e6:10.1f} us/pair  (parse per pair + scan)")
+    print(f"lexicon+parse: {end_to_end / n * 1e6:10.1f} us/pair  ({original / end_to_end:.1f}x)")
+    print(f"scan only:     {scan / n * 1e6:10.1f} us/pair  (Doc parsed once, excluded)")
+    print(f"lexicon only:  {lexicon / n * 1e6:10.1f} us/pair  ({scan / lexicon:.1f}x)")
+
+    print("\nCase                                   original  lexicon")
+    for text, aspect in CASES:
+        print(f"{text:38} {original_fallback(nlp, text, aspect):9} {scorer.score(nlp(text), aspect)}")
+
+
+if __name__ == "__main__":
+    main()
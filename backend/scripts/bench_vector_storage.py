@@ -0,0 +1,139 @@
+"""
+Benchmark: recall@k vs size and latency of the vector storage layouts.
+
+Compares, against exact float32 search at full dimension:
+  - vector:  float32 column (4 bytes/dim)
+  - halfvec: float16 column (2 bytes/dim)
+  - shortened dimensions (leading components, renormalized, as the API's
+    dimensions parameter and `maintenance migrate-vectors` produce them)
+  - binary:  1 bit/dim Hamming search, top k * factor reranked on float32
+
+Searches are brute force in numpy, so latencies compare layouts rather than
+predict Postgres timings; "index" is the per-row size of what the ANN index
+stores (the scaling limit), "column" what the heap stores.
+
+Usage (from backend/):
+    python scripts/bench_vector_storage.py --rows 20000            # from the insights table
+    python scripts/bench_vector_storage.py --synthetic --rows 20000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Set bits per byte value, for Hamming distances on packed bits
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+async def load_embeddings(rows: int) -> np.ndarray:
+    """Random sample of stored insight embeddings."""
+    from app.db.bulk_loader import close_pg_pool, get_pg_pool
+
+    pool = await get_pg_pool()
+    try:
+        records = await pool.fetch(
+            "SELECT embedding::vector AS embedding FROM insights "
+            "WHERE embedding IS NOT NULL ORDER BY random() LIMIT $1",
+            rows
+        )
+    finally:
+        await close_pg_pool()
+    # The pgvector codec decodes rows as pgvector.Vector
+    return np.array([record["embedding"].to_numpy() for record in records], dtype=np.float32)
+
+
+def synthetic_embeddings(rows: int, dimension: int, seed: int = 0) -> np.ndarray:
+    """Clustered vectors whose variance decays with the component index, like text-embedding-3."""
+    rng = np.random.default_rng(seed)
+    scale = 1 / np.sqrt(1 + np.arange(dimension) / 64)
+    centers = rng.normal(size=(max(rows // 50, 1), dimension)) * scale
+    points = centers[rng.integers(len(centers), size=rows)]
+    points += rng.normal(size=(rows, dimension)) * scale * 0.6
+    return normalize(points.astype(np.float32))
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+def run(name: str, search, queries: np.ndarray, truth, k: int, column: int, index: int):
+    start = time.perf_counter()
+    results = [search(query) for query in queries]
+    elapsed = (time.perf_counter() - start) / len(queries)
+
+    recall = np.mean([
+        len(set(result.tolist()) & set(expected.tolist())) / k
+        for result, expected in zip(results, truth, strict=True)
+    ])
+    print(f"{name:28} {recall:9.3f} {column:9d} {index:9d} {elapsed * 1e3:10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--synthetic", action="store_true", help="Generated vectors instead of the DB")
+    parser.add_argument("--dimension", type=int, default=1536, help="Synthetic dimension")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = synthetic_embeddings(args.rows + args.queries, args.dimension)
+    else:
+        vectors = normalize(asyncio.run(load_embeddings(args.rows + args.queries)))
+
+    queries, corpus = vectors[:args.queries], vectors[args.queries:]
+    dimension, k = corpus.shape[1], args.k
+    print(f"{len(corpus)} vectors x {dimension} dims, {len(queries)} queries, recall@{k}\n")
+
+    truth = [top_k(corpus @ query, k) for query in queries]
+
+    print(f"{'layout':28} {'recall':>9} {'column B':>9} {'index B':>9} {'ms/query':>10}")
+
+    run("vector", lambda q: top_k(corpus @ q, k), queries, truth, k, 4 * dimension, 4 * dimension)
+
+    half = corpus.astype(np.float16)
+    run(
+        "halfvec",
+        lambda q: top_k((half @ q.astype(np.float16)).astype(np.float32), k),
+        queries, truth, k, 2 * dimension, 2 * dimension
+    )
+
+    for short in (1024, 512, 256):
+        if short >= dimension:
+            continue
+        shortened = normalize(corpus[:, :short]).astype(np.float16)
+        run(
+            f"halfvec({short})",
+            lambda q, s=shortened, d=short: top_k(
+                (s @ normalize(q[None, :d])[0].astype(np.float16)).astype(np.float32), k
+            ),
+            queries, truth, k, 2 * short, 2 * short
+        )
+
+    bits = np.packbits(corpus > 0, axis=1)
+    for factor in (1, 4, 10):
+        def binary_search(query, factor=factor):
+            distances = POPCOUNT[np.bitwise_xor(bits, np.packbits(query > 0))].sum(axis=1)
+            candidates = np.argpartition(distances, k * factor - 1)[:k * factor]
+            return candidates[top_k(corpus[candidates] @ query, k)]
+
+        run(
+            f"binary + rerank x{factor}",
+            binary_search, queries, truth, k, 4 * dimension, dimension // 8
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Export the local ABSA model to ONNX and quantize it for CPU inference.
+
+Produces a directory holding model.onnx, model_quantized.onnx (dynamic int8)
+and the tokenizer; point SENTIMENT_LOCAL_MODEL at it and set
+SENTIMENT_BACKEND=local (or pass sentiment_backend="local" per job).
+
+Usage (from backend/, requires optimum[onnxruntime]):
+    python scripts/export_absa_onnx.py --model yangheng/deberta-v3-base-absa-v1.1 \
+        --output models/absa-onnx
+"""
+import argparse
+
+from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+from transformers import AutoTokenizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default="yangheng/deberta-v3-base-absa-v1.1")
+    parser.add_argument("--output", default="models/absa-onnx")
+    parser.add_argument(
+        "--isa",
+        choices=["avx2", "avx512", "avx512_vnni", "arm64"],
+        default="avx2",
+        help="Instruction set the quantized kernels target (match the worker hosts)"
+    )
+    args = parser.parse_args()
+
+    model = ORTModelForSequenceClassification.from_pretrained(args.model, export=True)
+    model.save_pretrained(args.output)
+    AutoTokenizer.from_pretrained(args.model).save_pretrained(args.output)
+
+    # Dynamic int8 quantization: no calibration data needed
+    config = getattr(AutoQuantizationConfig, args.isa)(is_static=False, per_channel=False)
+    quantizer = ORTQuantizer.from_pretrained(args.output, file_name="model.onnx")
+    quantizer.quantize(save_dir=args.output, quantization_config=config)
+
+    print(f"Exported {args.model} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
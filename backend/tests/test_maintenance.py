@@ -0,0 +1,82 @@
+"""
+Duplicate insight compaction (app.db.maintenance).
+
+Needs TEST_DATABASE_URL: the insights table is created in that database for
+the test and dropped afterwards (the test refuses to run if it exists).
+"""
+import json
+import uuid
+
+import pytest
+
+from tests.conftest import TEST_DATABASE_URL
+
+asyncpg = pytest.importorskip("asyncpg")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+_CREATE_SQL = """
+    CREATE TABLE insights (
+        id uuid PRIMARY KEY,
+        source_url text NOT NULL,
+        aspect text NOT NULL,
+        sentiment text NOT NULL,
+        text text NOT NULL,
+        metadata jsonb,
+        created_at timestamptz NOT NULL DEFAULT now()
+    )
+"""
+
+SLUGGED = "https://www.reddit.com/r/phones/comments/abc123/battery_thread/"
+SHORT = "https://redd.it/abc123"
+OTHER = "https://www.reddit.com/r/phones/comments/def456/"
+
+
+@pytest.fixture
+async def insights():
+    """Create an empty insights table; yields a function inserting rows."""
+    conn = await asyncpg.connect(TEST_DATABASE_URL)
+    if await conn.fetchval("SELECT to_regclass('public.insights')") is not None:
+        await conn.close()
+        pytest.fail("TEST_DATABASE_URL already has an insights table; use a scratch database")
+
+    await conn.execute(_CREATE_SQL)
+
+    async def insert(source_url: str, aspect: str, text: str, metadata: dict | None):
+        await conn.execute(
+            "INSERT INTO insights (id, source_url, aspect, sentiment, text, metadata) "
+            "VALUES ($1, $2, $3, 'neutral', $4, $5::jsonb)",
+            uuid.uuid4(), source_url, aspect, text, json.dumps(metadata)
+        )
+
+    try:
+        yield insert
+    finally:
+        await conn.execute("DROP TABLE insights")
+        await conn.close()
+
+        from app.db.bulk_loader import close_pg_pool
+        await close_pg_pool()
+
+
+async def test_compact_dry_run_counts_duplicates_only(insights):
+    from app.db.maintenance import compact_insights
+
+    # Same comment stored under two URL forms of the thread: one duplicate
+    await insights(SLUGGED, "battery", "Battery is great", {"comment_id": "c1"})
+    await insights(SHORT, "Battery", "Battery is great", {"comment_id": "c1"})
+
+    # Older PRAW rows: same position and text in a re-scrape, one duplicate
+    await insights(SLUGGED, "screen", "Screen is dim", {"comment_index": 4})
+    await insights(SHORT, "screen", "Screen is dim", {"comment_index": 4})
+
+    # Same position, different comment
+    await insights(SLUGGED, "screen", "Screen is fine", {"comment_index": 5})
+
+    # Legacy rows without a comment id or index: identical short replies from
+    # different comments, in one thread and across threads, are kept
+    await insights(SLUGGED, "general", "This.", {"submission_title": "Battery thread"})
+    await insights(SLUGGED, "general", "This.", {"submission_title": "Battery thread"})
+    await insights(OTHER, "general", "This.", None)
+
+    assert await compact_insights(dry_run=True) == 2
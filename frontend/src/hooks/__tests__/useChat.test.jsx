@@ -2,20 +2,27 @@ import { renderHook, act, waitFor } from '@testing-library/react';
 import { QueryClient, QueryClientProvider } from '@tanstack/react-query';
 import { useChat } from '../useChat';
 
-const { mockGetMessages, mockSendMessage } = vi.hoisted(() => ({
-  mockGetMessages: vi.fn(() => Promise.resolve([])),
-  mockSendMessage: vi.fn(() =>
-    Promise.resolve({
-      user_message: { id: 'u1', role: 'user', content: 'Hi', created_at: new Date().toISOString() },
-      assistant_message: { id: 'a1', role: 'assistant', content: 'Hello', created_at: new Date().toISOString() },
-    })
-  ),
-}));
+const { mockGetMessages, mockSendMessage, mockSendMessageStream } = vi.hoisted(() => {
+  const response = () => ({
+    user_message: { id: 'u1', role: 'user', content: 'Hi', created_at: new Date().toISOString() },
+    assistant_message: { id: 'a1', role: 'assistant', content: 'Hello', created_at: new Date().toISOString() },
+  });
+  return {
+    mockGetMessages: vi.fn(() => Promise.resolve([])),
+    mockSendMessage: vi.fn(() => Promise.resolve(response())),
+    mockSendMessageStream: vi.fn(async (_conversationId, _message, { onToken }) => {
+      onToken('Hel');
+      onToken('lo');
+      return response();
+    }),
+  };
+});
 
 vi.mock('../../services/chat.service.js', () => ({
   chatService: {
     getMessages: mockGetMessages,
     sendMessage: mockSendMessage,
+    sendMessageStream: mockSendMessageStream,
   },
 }));
 
@@ -34,6 +41,24 @@ describe('useChat', () => {
       result.current.sendMessage('How is the sentiment?');
     });
 
-    expect(mockSendMessage).toHaveBeenCalledWith('conversation-1', 'How is the sentiment?');
+    expect(mockSendMessageStream).toHaveBeenCalledWith(
+      'conversation-1',
+      'How is the sentiment?',
+      expect.objectContaining({ onToken: expect.any(Function) })
+    );
+  });
+
+  it('replaces the streamed placeholder with the saved messages', async () => {
+    const { result } = renderHook(() => useChat('conversation-2'), { wrapper: createWrapper() });
+
+    await waitFor(() => expect(result.current.isLoading).toBe(false));
+
+    await act(async () => {
+      result.current.sendMessage('Hi');
+    });
+
+    await waitFor(() => expect(result.current.isSending).toBe(false));
+    expect(result.current.messages.map((message) => message.id)).toEqual(['u1', 'a1']);
+    expect(result.current.messages[1].content).toBe('Hello');
   });
 });
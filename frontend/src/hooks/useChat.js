@@ -10,8 +10,20 @@ export function useChat(conversationId) {
     enabled: Boolean(conversationId),
   });
 
+  // Appends streamed text to the placeholder assistant message
+  const appendToken = (delta) => {
+    queryClient.setQueryData(['messages', conversationId], (old = []) =>
+      old.map((message) =>
+        String(message.id).startsWith('streaming-')
+          ? { ...message, content: message.content + delta }
+          : message
+      )
+    );
+  };
+
   const sendMutation = useMutation({
-    mutationFn: (message) => chatService.sendMessage(conversationId, message),
+    mutationFn: (message) =>
+      chatService.sendMessageStream(conversationId, message, { onToken: appendToken }),
     onMutate: async (message) => {
       await queryClient.cancelQueries({ queryKey: ['messages', conversationId] });
       const previousMessages = queryClient.getQueryData(['messages', conversationId]) || [];
@@ -21,7 +33,17 @@ export function useChat(conversationId) {
         content: message,
         created_at: new Date().toISOString(),
       };
-      queryClient.setQueryData(['messages', conversationId], [...previousMessages, optimisticMessage]);
+      const streamingMessage = {
+        id: `streaming-${Date.now()}`,
+        role: 'assistant',
+        content: '',
+        created_at: new Date().toISOString(),
+      };
+      queryClient.setQueryData(['messages', conversationId], [
+        ...previousMessages,
+        optimisticMessage,
+        streamingMessage,
+      ]);
       return { previousMessages };
     },
     onError: (_error, _variables, context) => {
@@ -31,7 +53,11 @@ export function useChat(conversationId) {
     },
     onSuccess: (data) => {
       queryClient.setQueryData(['messages', conversationId], (old = []) => {
-        const filtered = old.filter((message) => !String(message.id).startsWith('optimistic-'));
+        const filtered = old.filter(
+          (message) =>
+            !String(message.id).startsWith('optimistic-') &&
+            !String(message.id).startsWith('streaming-')
+        );
         return [...filtered, data.user_message, data.assistant_message];
       });
     },
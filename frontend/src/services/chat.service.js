@@ -1,4 +1,4 @@
-import apiClient from './api';
+import apiClient, { API_BASE_URL } from './api';
 import { demoMessages, demoQuickSummary, demoMetaAnalysis } from '../utils/demoData';
 
 const buildDemoAssistantMessage = (message) => {
@@ -35,6 +35,32 @@ const buildDemoResponse = (conversationId, message) => {
   };
 };
 
+const parseEvent = (block) => {
+  let event = 'message';
+  const data = [];
+  block.split('\n').forEach((line) => {
+    if (line.startsWith('event:')) {
+      event = line.slice(6).trim();
+    } else if (line.startsWith('data:')) {
+      data.push(line.slice(5).trimStart());
+    }
+  });
+  return { event, data: data.length ? JSON.parse(data.join('\n')) : null };
+};
+
+const streamError = async (response) => {
+  if (response.status === 401) {
+    localStorage.removeItem('access_token');
+    if (window.location.pathname !== '/login') {
+      window.location.href = '/login';
+    }
+  }
+  const data = await response.json().catch(() => ({}));
+  const error = new Error(data.detail || `Request failed with status code ${response.status}`);
+  error.response = { status: response.status, data };
+  return error;
+};
+
 export const chatService = {
   async getMessages(conversationId) {
     if (conversationId === 'demo') {
@@ -68,4 +94,58 @@ export const chatService = {
       throw error;
     }
   },
+
+  // Streams the reply over SSE (axios can't read a response body incrementally in the browser).
+  // Calls onToken with each text delta; resolves with the same payload as sendMessage once saved.
+  async sendMessageStream(conversationId, message, { onToken, signal } = {}) {
+    if (conversationId === 'demo') {
+      const demoResponse = buildDemoResponse(conversationId, message);
+      onToken?.(demoResponse.assistant_message.content);
+      return demoResponse;
+    }
+
+    const token = localStorage.getItem('access_token');
+    const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Accept: 'text/event-stream',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify({ conversation_id: conversationId, message }),
+      signal,
+    });
+
+    if (!response.ok) {
+      throw await streamError(response);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) {
+        break;
+      }
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const { event, data } = parseEvent(buffer.slice(0, boundary));
+        buffer = buffer.slice(boundary + 2);
+
+        if (event === 'token') {
+          onToken?.(data.delta);
+        } else if (event === 'done') {
+          return data;
+        } else if (event === 'error') {
+          throw new Error(data.detail);
+        }
+      }
+    }
+
+    throw new Error('Chat stream ended unexpectedly');
+  },
 };